@@ -0,0 +1,119 @@
+"""Reconcile legacy schema
+
+Folds the ad-hoc migrate_*.py scripts and main._run_migrations into one
+revision. Databases that never ran some of those scripts get the legacy
+tables/columns they are missing (each is checked once, from a single
+reflection pass), then everything gets what this revision introduces, unless an
+older release already created it with Base.metadata.create_all:
+  - idempotency_keys (Idempotency-Key replay)
+  - ix_sets_user_exercise_week (sets by user + exercise + week)
+  - ix_workout_sessions_user_start_id (keyset pagination of session history)
+On Postgres the sets index is built CONCURRENTLY, outside the DDL transaction.
+
+Revision ID: 5b2f8c1d9e4a
+Revises: 10649d95ff7a
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2f8c1d9e4a'
+down_revision: Union[str, Sequence[str], None] = '10649d95ff7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# What the legacy scripts added to pre-existing tables, as of this revision
+LEGACY_COLUMNS = [
+    ("users", lambda: sa.Column("is_admin", sa.Integer(), server_default="0")),
+    ("users", lambda: sa.Column("created_at", sa.DateTime(), nullable=True)),
+    ("workouts", lambda: sa.Column("created_by_user_id", sa.Integer(), sa.ForeignKey("users.id", name="fk_workouts_created_by_user_id"), nullable=True)),
+    ("exercises", lambda: sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", name="fk_exercises_user_id"), nullable=True)),
+    ("exercises", lambda: sa.Column("split", sa.String(), server_default="A")),
+    ("exercises", lambda: sa.Column("setup_notes", sa.String(), nullable=True)),
+    ("sets", lambda: sa.Column("timestamp", sa.DateTime(), nullable=True)),
+    ("workout_sessions", lambda: sa.Column("split", sa.String(), server_default="A")),
+    ("workout_sessions", lambda: sa.Column("pr_count", sa.Integer(), server_default="0")),
+    ("workout_sessions", lambda: sa.Column("pr_details", sa.String(), nullable=True)),
+]
+
+
+def _upgrade_legacy(inspector):
+    tables = set(inspector.get_table_names())
+    if "workout_sessions" not in tables:
+        op.create_table(
+            "workout_sessions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("workout_id", sa.Integer(), sa.ForeignKey("workouts.id")),
+            sa.Column("split", sa.String(), server_default="A"),
+            sa.Column("start_time", sa.DateTime()),
+            sa.Column("end_time", sa.DateTime(), nullable=True),
+            sa.Column("total_volume", sa.Float(), server_default="0"),
+            sa.Column("pr_count", sa.Integer(), server_default="0"),
+            sa.Column("pr_details", sa.String(), nullable=True),
+            sa.Column("notes", sa.String(), nullable=True),
+        )
+        op.create_index("ix_workout_sessions_id", "workout_sessions", ["id"])
+        tables.add("workout_sessions")
+
+    existing = {key[1]: {c["name"] for c in cols} for key, cols in inspector.get_multi_columns().items()}
+    for table, make_column in LEGACY_COLUMNS:
+        column = make_column()
+        if column.name in existing.get(table, set()):
+            continue
+        if column.foreign_keys:
+            # SQLite can't ALTER in a constraint: batch mode copies the table there
+            with op.batch_alter_table(table) as batch:
+                batch.add_column(column)
+        else:
+            op.add_column(table, column)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    _upgrade_legacy(sa.inspect(conn))
+
+    # Startup used to run create_all, so these may exist already
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("endpoint", sa.String(), nullable=False),
+        sa.Column("response", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("key", "username", "endpoint", name="uq_idempotency_key"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"], if_not_exists=True)
+    op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"], if_not_exists=True)
+    op.create_index(
+        "ix_workout_sessions_user_start_id", "workout_sessions", ["user_id", "start_time", "id"], if_not_exists=True
+    )
+
+    if conn.dialect.name == "postgresql":
+        # sets is large: build without blocking writes, after committing the DDL above
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_sets_user_exercise_week", "sets", ["user_id", "exercise_id", "week"],
+                postgresql_concurrently=True, if_not_exists=True
+            )
+    else:
+        op.create_index("ix_sets_user_exercise_week", "sets", ["user_id", "exercise_id", "week"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The legacy columns stay: they predate Alembic and the initial revision assumes them
+    op.drop_index("ix_sets_user_exercise_week", table_name="sets")
+    op.drop_index("ix_workout_sessions_user_start_id", table_name="workout_sessions")
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys")
+    op.drop_index("ix_idempotency_keys_id", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
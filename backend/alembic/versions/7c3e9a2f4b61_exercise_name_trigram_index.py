@@ -0,0 +1,35 @@
+"""Trigram index on exercise names
+
+pg_trgm GIN index backing /api/exercises/search on Postgres. SQLite has no
+trigram index type; there the search uses an in-process n-gram index instead
+(backend/search.py), so this revision is a no-op.
+
+Revision ID: 7c3e9a2f4b61
+Revises: 5b2f8c1d9e4a
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e9a2f4b61'
+down_revision: Union[str, Sequence[str], None] = '5b2f8c1d9e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Frozen copy of search.ensure_trigram_index as of this revision
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_exercises_name_trgm ON exercises USING gin (name gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_exercises_name_trgm")
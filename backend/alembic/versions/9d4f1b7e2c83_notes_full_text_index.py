@@ -0,0 +1,58 @@
+"""Full-text index on setup notes and session notes
+
+Postgres: GIN indexes over to_tsvector() of exercises.setup_notes and
+workout_sessions.notes. SQLite: an FTS5 table (notes_fts) filled from the
+existing rows and kept in sync by DataManager (backend/search.py).
+
+Revision ID: 9d4f1b7e2c83
+Revises: 7c3e9a2f4b61
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f1b7e2c83'
+down_revision: Union[str, Sequence[str], None] = '7c3e9a2f4b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Frozen copy of search.ensure_notes_index as of this revision
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_exercises_setup_notes_fts ON exercises "
+            "USING gin (to_tsvector('english', coalesce(setup_notes, '')))"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_workout_sessions_notes_fts ON workout_sessions "
+            "USING gin (to_tsvector('english', coalesce(notes, '')))"
+        )
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts "
+        "USING fts5(body, kind UNINDEXED, ref_id UNINDEXED, tokenize='porter unicode61')"
+    )
+    op.execute("DELETE FROM notes_fts")
+    op.execute(
+        "INSERT INTO notes_fts (rowid, body, kind, ref_id) "
+        "SELECT id * 2, setup_notes, 'exercise', id FROM exercises WHERE setup_notes IS NOT NULL AND setup_notes != ''"
+    )
+    op.execute(
+        "INSERT INTO notes_fts (rowid, body, kind, ref_id) "
+        "SELECT id * 2 + 1, notes, 'session', id FROM workout_sessions WHERE notes IS NOT NULL AND notes != ''"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_exercises_setup_notes_fts")
+        op.execute("DROP INDEX IF EXISTS ix_workout_sessions_notes_fts")
+    else:
+        op.execute("DROP TABLE IF EXISTS notes_fts")
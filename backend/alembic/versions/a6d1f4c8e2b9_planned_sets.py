@@ -0,0 +1,53 @@
+"""Planned sets
+
+Adds the planned_sets table (progressive-overload targets written by the
+plan_targets job) and its (user_id, week, exercise_id) index.
+
+Revision ID: a6d1f4c8e2b9
+Revises: f3a9d6c2b1e7
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d1f4c8e2b9'
+down_revision: Union[str, Sequence[str], None] = 'f3a9d6c2b1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Startup used to run create_all, so these may exist already
+    op.create_table(
+        "planned_sets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("exercise_id", sa.Integer(), sa.ForeignKey("exercises.id"), nullable=False),
+        sa.Column("week", sa.Integer(), nullable=False),
+        sa.Column("set_number", sa.Integer(), nullable=False),
+        sa.Column("weight", sa.Float(), nullable=False),
+        sa.Column("reps", sa.Integer(), nullable=False),
+        sa.Column("rule", sa.String(), nullable=False),
+        sa.Column("basis_week", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_planned_sets_id", "planned_sets", ["id"], if_not_exists=True)
+    # GET /api/plan/{workout}: a user's targets for one week
+    op.create_index(
+        "ix_planned_sets_user_week_exercise", "planned_sets", ["user_id", "week", "exercise_id"], if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Derived data only: recomputed by the next plan_targets run after an upgrade
+    op.drop_index("ix_planned_sets_user_week_exercise", table_name="planned_sets")
+    op.drop_index("ix_planned_sets_id", table_name="planned_sets")
+    op.drop_table("planned_sets")
@@ -0,0 +1,105 @@
+"""Canonical movements
+
+Adds the movements table and exercises.movement_id (indexed FK), then links
+every existing exercise to a movement with one batch name-normalization
+pass (a frozen copy of backend/movements.link_movements).
+
+Revision ID: b1e6d3a8f5c2
+Revises: 9d4f1b7e2c83
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1e6d3a8f5c2'
+down_revision: Union[str, Sequence[str], None] = '9d4f1b7e2c83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _movement_key(name):
+    """Frozen copy of dedup.normalize_name as of this revision (movements.key)"""
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^a-z0-9]+", " ", name.lower())
+    name = re.sub(r"([a-z])\1+", r"\1", name)
+    return " ".join(name.split())
+
+
+def _link_movements(conn):
+    """Frozen copy of movements.link_movements as of this revision."""
+    unlinked = conn.execute(sa.text("SELECT id, name FROM exercises WHERE movement_id IS NULL ORDER BY id")).all()
+    if not unlinked:
+        return 0
+
+    existing = {key: mid for key, mid in conn.execute(sa.text("SELECT key, id FROM movements"))}
+    new_names = {}
+    for ex in unlinked:
+        key = _movement_key(ex.name)
+        if key and key not in existing:
+            new_names.setdefault(key, ex.name.strip())
+    if new_names:
+        conn.execute(
+            sa.text("INSERT INTO movements (key, name) VALUES (:key, :name)"),
+            [{"key": k, "name": n} for k, n in new_names.items()]
+        )
+        existing = {key: mid for key, mid in conn.execute(sa.text("SELECT key, id FROM movements"))}
+
+    pairs = [
+        {"exercise_id": ex.id, "movement_id": existing[_movement_key(ex.name)]}
+        for ex in unlinked if _movement_key(ex.name)
+    ]
+    conn.execute(sa.text("DROP TABLE IF EXISTS movement_link_map"))
+    conn.execute(sa.text("CREATE TEMPORARY TABLE movement_link_map (exercise_id INTEGER PRIMARY KEY, movement_id INTEGER NOT NULL)"))
+    if pairs:
+        conn.execute(sa.text("INSERT INTO movement_link_map (exercise_id, movement_id) VALUES (:exercise_id, :movement_id)"), pairs)
+        conn.execute(sa.text(
+            "UPDATE exercises SET movement_id = "
+            "(SELECT movement_id FROM movement_link_map m WHERE m.exercise_id = exercises.id) "
+            "WHERE id IN (SELECT exercise_id FROM movement_link_map)"
+        ))
+    conn.execute(sa.text("DROP TABLE IF EXISTS movement_link_map"))
+    return len(pairs)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # Startup used to run create_all, so these may exist already
+    op.create_table(
+        "movements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_movements_id", "movements", ["id"], if_not_exists=True)
+    op.create_index("ix_movements_key", "movements", ["key"], unique=True, if_not_exists=True)
+
+    if "movement_id" not in {c["name"] for c in sa.inspect(conn).get_columns("exercises")}:
+        # SQLite can't ALTER in a constraint: batch mode copies the table there
+        with op.batch_alter_table("exercises") as batch:
+            batch.add_column(sa.Column("movement_id", sa.Integer(), nullable=True))
+            batch.create_foreign_key("fk_exercises_movement_id", "movements", ["movement_id"], ["id"])
+    op.create_index("ix_exercises_movement_id", "exercises", ["movement_id"], if_not_exists=True)
+
+    print(f"Linked {_link_movements(conn)} exercises to movements")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("exercises") as batch:
+        batch.drop_index("ix_exercises_movement_id")
+        batch.drop_constraint("fk_exercises_movement_id", type_="foreignkey")
+        batch.drop_column("movement_id")
+    op.drop_index("ix_movements_key", table_name="movements")
+    op.drop_index("ix_movements_id", table_name="movements")
+    op.drop_table("movements")
@@ -0,0 +1,61 @@
+"""Background jobs
+
+Adds the jobs table (durable background job queue, backend/jobs.py) and
+workout_sessions.streak_weeks (filled in by the session_summary job).
+
+Revision ID: c4a7e2d9b813
+Revises: b1e6d3a8f5c2
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2d9b813'
+down_revision: Union[str, Sequence[str], None] = 'b1e6d3a8f5c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Startup used to run create_all, so these may exist already
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("payload", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="pending"),
+        sa.Column("result", sa.String(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("run_after", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_jobs_id", "jobs", ["id"], if_not_exists=True)
+    # Worker poll/claim: next runnable job
+    op.create_index("ix_jobs_status_run_after", "jobs", ["status", "run_after"], if_not_exists=True)
+
+    if not _has_column("workout_sessions", "streak_weeks"):
+        op.add_column("workout_sessions", sa.Column("streak_weeks", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("workout_sessions", "streak_weeks")
+    op.drop_index("ix_jobs_status_run_after", table_name="jobs")
+    op.drop_index("ix_jobs_id", table_name="jobs")
+    op.drop_table("jobs")
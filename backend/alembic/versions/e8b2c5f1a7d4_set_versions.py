@@ -0,0 +1,40 @@
+"""Set versions
+
+Adds sets.version for optimistic concurrency on set updates (update_set's
+conditional UPDATE). Existing rows start at version 1, like new ones. A
+constant default on a NOT NULL column is a metadata-only change on
+Postgres 11+, so the large sets table is not rewritten.
+
+Revision ID: e8b2c5f1a7d4
+Revises: c4a7e2d9b813
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2c5f1a7d4'
+down_revision: Union[str, Sequence[str], None] = 'c4a7e2d9b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A database created by Base.metadata.create_all already has it
+    if not _has_column("sets", "version"):
+        op.add_column("sets", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("sets", "version")
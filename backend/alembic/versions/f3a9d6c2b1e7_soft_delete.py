@@ -0,0 +1,89 @@
+"""Soft delete
+
+Adds deleted_at to workouts, exercises and sets, with partial indexes for
+the live-row lookups (WHERE deleted_at IS NULL) and for the compaction scans
+(WHERE deleted_at IS NOT NULL). ix_sets_live_user_exercise_week replaces the
+full ix_sets_user_exercise_week. On Postgres the sets indexes are built and
+dropped CONCURRENTLY, outside the DDL transaction.
+
+Revision ID: f3a9d6c2b1e7
+Revises: e8b2c5f1a7d4
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d6c2b1e7'
+down_revision: Union[str, Sequence[str], None] = 'e8b2c5f1a7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LIVE = sa.text("deleted_at IS NULL")
+DELETED = sa.text("deleted_at IS NOT NULL")
+
+
+def _partial(where):
+    return {"postgresql_where": where, "sqlite_where": where}
+
+
+def _has_column(table, column):
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A database created by Base.metadata.create_all already has the columns and indexes
+    for table in ("workouts", "exercises", "sets"):
+        if not _has_column(table, "deleted_at"):
+            op.add_column(table, sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+    op.create_index("ix_workouts_deleted_at", "workouts", ["deleted_at"], if_not_exists=True, **_partial(DELETED))
+    op.create_index(
+        "ix_exercises_live_workout_split", "exercises", ["workout_id", "split"], if_not_exists=True, **_partial(LIVE)
+    )
+    op.create_index("ix_exercises_deleted_at", "exercises", ["deleted_at"], if_not_exists=True, **_partial(DELETED))
+
+    if op.get_bind().dialect.name == "postgresql":
+        # sets is large: build without blocking writes, after committing the DDL above
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_sets_live_user_exercise_week", "sets", ["user_id", "exercise_id", "week"],
+                postgresql_concurrently=True, if_not_exists=True, postgresql_where=LIVE
+            )
+            op.create_index(
+                "ix_sets_deleted_at", "sets", ["deleted_at"],
+                postgresql_concurrently=True, if_not_exists=True, postgresql_where=DELETED
+            )
+            op.drop_index("ix_sets_user_exercise_week", table_name="sets", postgresql_concurrently=True, if_exists=True)
+    else:
+        op.create_index(
+            "ix_sets_live_user_exercise_week", "sets", ["user_id", "exercise_id", "week"],
+            if_not_exists=True, **_partial(LIVE)
+        )
+        op.create_index("ix_sets_deleted_at", "sets", ["deleted_at"], if_not_exists=True, **_partial(DELETED))
+        op.drop_index("ix_sets_user_exercise_week", table_name="sets", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Soft-deleted rows would come back to life: purge them first
+    op.execute("DELETE FROM sets WHERE deleted_at IS NOT NULL "
+               "OR exercise_id IN (SELECT id FROM exercises WHERE deleted_at IS NOT NULL)")
+    op.execute("DELETE FROM exercises WHERE deleted_at IS NOT NULL")
+    op.execute("UPDATE workout_sessions SET workout_id = NULL "
+               "WHERE workout_id IN (SELECT id FROM workouts WHERE deleted_at IS NOT NULL)")
+    op.execute("DELETE FROM workouts WHERE deleted_at IS NOT NULL")
+
+    op.create_index("ix_sets_user_exercise_week", "sets", ["user_id", "exercise_id", "week"])
+    op.drop_index("ix_sets_deleted_at", table_name="sets")
+    op.drop_index("ix_sets_live_user_exercise_week", table_name="sets")
+    op.drop_index("ix_exercises_deleted_at", table_name="exercises")
+    op.drop_index("ix_exercises_live_workout_split", table_name="exercises")
+    op.drop_index("ix_workouts_deleted_at", table_name="workouts")
+    for table in ("sets", "exercises", "workouts"):
+        op.drop_column(table, "deleted_at")
@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# Entries built from a replica read expire after this long: the replica may
+# still lag a write whose generation bump has already happened, and such an
+# entry would otherwise be served until the next bump.
+REPLICA_CACHE_TTL = float(os.getenv("CACHE_REPLICA_TTL", "5"))
+
+
+class CacheBackend:
+    """
+    Minimal key/value cache used by DataManager read paths.
+
+    Entries are never invalidated one by one. Instead, cache keys embed
+    generation numbers (per user, per workout, ...) and a write just bumps the
+    generation, which orphans every entry built on the old one. Orphans age out
+    through TTL/LRU eviction. This works the same across workers as long as they
+    share the backend.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- backend primitives ---
+    def _get(self, key: str):
+        raise NotImplementedError
+
+    def _set(self, key: str, value, ttl: float = None):
+        raise NotImplementedError
+
+    def _incr(self, key: str, initial: int) -> int:
+        """Increment an integer key, creating it as `initial` if missing."""
+        raise NotImplementedError
+
+    # --- public API ---
+    def get(self, key: str):
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: float = None):
+        self._set(key, value, ttl)
+
+    def generation(self, name: str) -> int:
+        gen = self._get(f"gen:{name}")
+        if gen is None:
+            # Start from the clock rather than 0: if a generation key was evicted,
+            # entries built on its old values must not become valid again
+            gen = self._incr(f"gen:{name}", time.time_ns())
+        return int(gen)
+
+    def bump(self, name: str) -> int:
+        return self._incr(f"gen:{name}", time.time_ns())
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+class MemoryLRUCache(CacheBackend):
+    """Per-process LRU. Fine for a single uvicorn worker or local development."""
+    name = "memory"
+
+    def __init__(self, max_entries: int = 2048):
+        super().__init__()
+        self.max_entries = max_entries
+        self._data = OrderedDict() # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _incr(self, key, initial):
+        with self._lock:
+            entry = self._data.get(key)
+            value = entry[0] + 1 if entry else initial
+            self._data[key] = (value, None)
+            self._data.move_to_end(key)
+            return value
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache in a shared SQLite file, so several workers on one host see the same
+    entries and generation bumps. Values are stored as JSON.
+    """
+    name = "sqlite"
+
+    # Check the size limit every N writes instead of on every write
+    EVICT_CHECK_EVERY = 100
+
+    def __init__(self, path: str = "./gym_buddy_cache.db", max_entries: int = 10000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] and row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def _set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now + ttl if ttl else None, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_CHECK_EVERY == 0:
+                self._evict(now)
+
+    def _incr(self, key, initial):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                value = int(json.loads(row[0])) + 1 if row else initial
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, NULL, ?)",
+                    (key, json.dumps(value), now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return value
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+
+class RedisCache(CacheBackend):
+    """
+    Redis (or any Redis-protocol server) shared by every worker and serverless
+    instance. Pass `client` to use a stand-in such as fakeredis.FakeRedis().
+    Size limits/eviction are Redis' own (maxmemory-policy); evictions reports
+    the server's evicted_keys counter.
+    """
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", client=None, prefix: str = "gym_buddy:"):
+        super().__init__()
+        if client is None:
+            if redis is None:
+                raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def _set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=int(ttl) if ttl else None)
+
+    def _incr(self, key, initial):
+        self.client.set(self.prefix + key, initial - 1, nx=True)
+        return int(self.client.incr(self.prefix + key))
+
+    def stats(self):
+        stats = super().stats()
+        try:
+            stats["evictions"] = int(self.client.info("stats").get("evicted_keys", 0))
+        except Exception:
+            pass
+        return stats
+
+
+def cache_from_env():
+    """
+    CACHE_BACKEND=memory|sqlite|redis enables read caching (default: off).
+    Use sqlite or redis whenever more than one worker/instance serves traffic.
+    """
+    backend = os.getenv("CACHE_BACKEND", "none").lower()
+    max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "0")) or None
+    if backend == "memory":
+        return MemoryLRUCache(max_entries or 2048)
+    if backend == "sqlite":
+        return SQLiteCache(os.getenv("CACHE_URL", "./gym_buddy_cache.db"), max_entries or 10000)
+    if backend == "redis":
+        return RedisCache(os.getenv("CACHE_URL", "redis://localhost:6379/0"))
+    return None
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import threading
+
+from .database import SessionLocal, RequestSession
+from .models_db import User, Workout, Exercise
+
+
+class WorkoutCatalog:
+    """
+    In-process copy of the workouts table and the admin ids, so /api/workouts can
+    build each user's visible list in memory instead of querying on every launch.
+
+    It also holds the default (admin/global) exercises of the global workouts,
+    served to every client by /api/catalog, and an etag of that content. The etag
+    changes whenever an admin edits the defaults, so it doubles as the version
+    in the catalog's CDN URL.
+
+    Every write that changes what get_workouts or the global catalog returns
+    (create/delete workout, admin changes, default exercise edits) calls
+    invalidate(), which bumps the version. The catalog is
+    reloaded from the DB lazily, on the first read after a bump. With a shared
+    cache backend the version also lives there, so a bump in one worker
+    reloads the catalog in all of them.
+    """
+
+    def __init__(self, cache=None):
+        self._lock = threading.Lock()
+        self.cache = cache
+        self.version = 0
+        self._loaded_version = None
+        self._workouts = [] # [(id, name, created_by_user_id)]
+        self._admin_ids = set()
+        self._user_ids = {} # username -> id
+        self._defaults = {} # workout id -> [default exercise dicts]
+        self._global = (None, []) # (etag, global catalog), swapped as one
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+        if self.cache:
+            self.cache.bump("catalog")
+
+    def _current_version(self):
+        if self.cache:
+            return (self.version, self.cache.generation("catalog"))
+        return self.version
+
+    def _ensure_loaded(self):
+        version = self._current_version()
+        with self._lock:
+            if self._loaded_version == version:
+                return
+            # Always reload from the primary: a lagging replica would be cached until the next bump
+            db = SessionLocal()
+            try:
+                workouts = db.query(Workout.id, Workout.name, Workout.created_by_user_id).all()
+                users = db.query(User.id, User.username, User.is_admin).all()
+                exercises = db.query(
+                    Exercise.workout_id, Exercise.name, Exercise.split, Exercise.default_sets,
+                    Exercise.setup_notes, Exercise.user_id
+                ).order_by(Exercise.id).all()
+            finally:
+                db.close()
+            self._workouts = [tuple(w) for w in workouts]
+            self._admin_ids = {u.id for u in users if u.is_admin == 1}
+            self._user_ids = {u.username: u.id for u in users}
+            self._defaults = {}
+            for e in exercises:
+                if self._is_default_owner(e.user_id):
+                    self._defaults.setdefault(e.workout_id, []).append({
+                        "name": e.name, "split": e.split, "default_sets": e.default_sets, "setup_notes": e.setup_notes
+                    })
+            catalog = self._global_catalog()
+            self._global = (hashlib.sha1(json.dumps(catalog, sort_keys=True).encode()).hexdigest()[:16], catalog)
+            self._loaded_version = version
+
+    def _is_default_owner(self, user_id):
+        # Fallback: if no admins are flagged, treat user ID 1 as the system admin
+        return user_id is None or user_id in (self._admin_ids or {1})
+
+    def is_default_owner(self, user_id):
+        """Whether rows owned by user_id are part of the global catalog (admin or system)"""
+        self._ensure_loaded()
+        return self._is_default_owner(user_id)
+
+    def _global_catalog(self):
+        return [
+            {"name": name, "exercises": self._defaults.get(workout_id, [])}
+            for workout_id, name, created_by in self._workouts
+            if self._is_default_owner(created_by)
+        ]
+
+    def global_catalog(self):
+        """(etag, global workouts with their default exercises) - identical for every user"""
+        self._ensure_loaded()
+        return self._global
+
+    def user_id(self, db, username: str, resolve_user_id):
+        """Resolve a username to an id; unknown users go through resolve_user_id(db, username)."""
+        self._ensure_loaded()
+        user_id = self._user_ids.get(username)
+        if user_id is None:
+            user_id = resolve_user_id(db, username)
+            # New users are never admins, so the catalog itself is still valid.
+            # Inside a request the user may only be flushed: remember it once committed.
+            if isinstance(db, RequestSession):
+                db.on_commit(self._user_ids.__setitem__, username, user_id)
+            else:
+                self._user_ids[username] = user_id
+        return user_id
+
+    def forget_user(self, username: str):
+        """
+        Drop a cached id the caller found stale. Without a shared cache, delete_user
+        in another worker doesn't reach this catalog; the id is resolved again next time.
+        """
+        self._user_ids.pop(username, None)
+
+    def visible_workouts(self, db, username: str = None, resolve_user_id=None):
+        """Same result as the old get_workouts queries, derived from the cached catalog."""
+        self._ensure_loaded()
+        workouts = self._workouts
+
+        if username:
+            user_id = self.user_id(db, username, resolve_user_id)
+            # Fallback: if no admins are flagged, treat user ID 1 as the system admin
+            filter_admin_ids = self._admin_ids or {1}
+            workouts = [
+                w for w in workouts
+                if w[2] is None or w[2] == user_id or w[2] in filter_admin_ids
+            ]
+
+        return [
+            {
+                "name": name,
+                "is_global": (created_by is None or created_by in self._admin_ids),
+                "created_by": created_by
+            }
+            for _, name, created_by in workouts
+        ]
@@ -1,20 +1,122 @@
-from .database import SessionLocal
-from .models_db import User, Workout, Exercise, SetLog as DBSetLog, WorkoutSession
-from .models import Exercise as APIExercise, SetLog as APISetLog, UserSchema
+from .database import SessionLocal, RequestSession, session_router, serialized_write
+from .models_db import User, Workout, Exercise, Movement, SetLog as DBSetLog, WorkoutSession, PlannedSet
+from .movements import ensure_movement
+from .catalog import WorkoutCatalog
+from .search import ExerciseSearchIndex, index_notes, unindex_notes, search_notes
+from .jobs import JobQueue
+from .singleflight import request_coalescer
+from .write_behind import WriteBehindBuffer
+from .cache import cache_from_env, REPLICA_CACHE_TTL
+from .progression import PLAN_RULE, plan_sets
 from fuzzywuzzy import process
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func, desc, extract
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from sqlalchemy import func, desc, extract, and_, or_, select, update, delete, insert, exists
 from datetime import datetime, timedelta
+from contextlib import nullcontext
+import base64
+import json
+import os
+
+# Deleted workouts/exercises/sets stay restorable this long, then the
+# "compact_deleted" job purges them, COMPACTION_BATCH_SIZE rows per transaction
+SOFT_DELETE_RETENTION = timedelta(days=float(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30")))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+# Users per plan_targets batch: one sets read and one planned_sets replace each
+PLAN_BATCH_USERS = int(os.getenv("PLAN_BATCH_USERS", "200"))
+# Between two runs of the every-user plan_targets job
+PLAN_INTERVAL = timedelta(days=7)
+
+def _set_dict(s):
+    return {"id": s.id, "set_number": s.set_number, "weight": s.weight, "reps": s.reps, "version": s.version}
+
+def _sets_summary(sets):
+    return ", ".join([f"{s.weight}x{s.reps}" for s in sets]) if sets else None
 
 class DataManager:
     def __init__(self):
-        pass
+        # None unless CACHE_BACKEND is set
+        self.cache = cache_from_env()
+        self.catalog = WorkoutCatalog(self.cache)
+        self.exercise_index = ExerciseSearchIndex(self.cache)
+        # Durable background jobs (post-session summaries)
+        self.jobs = JobQueue.from_env()
+        self.jobs.register("session_summary", self.summarize_session)
+        self.jobs.register("compact_deleted", self.compact_deleted)
+        self.jobs.register("plan_targets", self.plan_targets)
+        self.jobs.register("plan_targets_weekly", self.plan_targets, every=PLAN_INTERVAL)
+        # None unless SET_WRITE_BEHIND is enabled
+        self.write_buffer = WriteBehindBuffer.from_env()
+        if self.write_buffer and self.cache:
+            # Cached reads include pending sets without ids; refresh them once flushed
+            self.write_buffer.on_flush = lambda user_ids: [self.cache.bump(f"user:{uid}") for uid in user_ids]
 
-    def get_db(self):
-        return SessionLocal()
+    def get_db(self, db=None):
+        """A new session, or the request's unit of work (RequestSession) if the caller passed one"""
+        return db if db is not None else SessionLocal()
 
-    def get_user_info(self, username: str):
-        db = self.get_db()
+    def get_read_db(self, username: str = None, db=None):
+        """Session for read-only handlers: the replica if configured, unless the user just wrote"""
+        return db if db is not None else session_router.reader(username)
+
+    def _read_user_id(self, db, username: str):
+        """Look the user up on a read session; creating a missing user has to go to the primary"""
+        user_id = db.execute(select(User.id).where(User.username == username)).scalar()
+        if user_id is None and isinstance(db, RequestSession):
+            # A request's unit of work is on the primary already
+            return self.ensure_user(db, username).id
+        if user_id is None:
+            primary = self.get_db()
+            try:
+                user_id = self.ensure_user(primary, username).id
+            finally:
+                primary.close()
+            session_router.mark_write(username)
+        return user_id
+
+    def _write_lock(self):
+        """Lock that keeps DB sets + pending write-behind sets consistent (no-op when disabled)"""
+        return self.write_buffer.consistent() if self.write_buffer else nullcontext()
+
+    def _cache_read(self, db, cache_key, value):
+        """Cache a read result; replica reads only for REPLICA_CACHE_TTL (they may be stale)"""
+        self.cache.set(cache_key, value, ttl=REPLICA_CACHE_TTL if session_router.is_replica(db) else None)
+
+    def _on_commit(self, db, fn, *args):
+        """Run a post-commit side effect now, or when the request's unit of work commits"""
+        if isinstance(db, RequestSession):
+            db.on_commit(fn, *args)
+        else:
+            fn(*args)
+
+    def _after_write(self, username: str = None, user_id: int = None, workout_type: str = None, db=None):
+        """Read-your-writes stickiness and cache invalidation after a committed write"""
+        if isinstance(db, RequestSession) and db.in_request:
+            db.on_commit(self._after_write, username, user_id, workout_type)
+            return
+        session_router.mark_write(username)
+        request_coalescer.mark_write(username)
+        if self.cache:
+            if user_id:
+                self.cache.bump(f"user:{user_id}")
+            if workout_type:
+                self.cache.bump(f"workout:{workout_type}")
+
+    def invalidate_all(self):
+        """For bulk changes made outside DataManager (migrations, data fixes, dedup)"""
+        self.catalog.invalidate()
+        self.exercise_index.invalidate()
+        session_router.mark_write(None)
+        request_coalescer.mark_write(None)
+        if self.cache:
+            self.cache.bump("global")
+
+    def flush_pending_sets(self):
+        """Write out buffered sets before anything that reads or renumbers sets in the DB"""
+        if self.write_buffer:
+            self.write_buffer.flush()
+
+    def get_user_info(self, username: str, db=None):
+        db = self.get_db(db)
         try:
             user = self.ensure_user(db, username)
             return {"id": user.id, "username": user.username, "is_admin": bool(user.is_admin)}
@@ -28,63 +130,72 @@ class DataManager:
             db.add(user)
             db.commit()
             db.refresh(user)
+            if self.cache:
+                self._on_commit(db, self.cache.bump, "users")
         return user
 
     def get_users(self):
-        db = self.get_db()
+        cache_key = None
+        if self.cache:
+            cache_key = f"users:{self.cache.generation('users')}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Core select: plain rows straight into response dicts, no ORM hydration
+        db = self.get_read_db()
         try:
-            users = db.query(User).all()
-            return [UserSchema(id=u.id, username=u.username, created_at=u.created_at) for u in users]
+            rows = db.execute(select(User.id, User.username, User.created_at)).all()
+            users = [{"id": r.id, "username": r.username, "created_at": r.created_at} for r in rows]
+            if cache_key:
+                self._cache_read(db, cache_key, users)
+            return users
         finally:
             db.close()
 
     def get_workouts(self, username: str = None):
-        db = self.get_db()
+        # Served from the in-process catalog; the session only connects if the
+        # catalog was invalidated or the user is new
+        db = self.get_read_db(username)
         try:
-            query = db.query(Workout)
-            if username:
-                user = self.ensure_user(db, username)
-                # Show workouts created by this user OR by Admins (Global)
-                # Or workouts with no creator (legacy/global)
-                
-                # Subquery to find admins? Or just join?
-                # Simpler: Filter where created_by_user_id is None (System) 
-                # OR created_by_user_id == user.id 
-                # OR created_by_user_id IN (select id from users where is_admin=1)
-                
-                admin_ids = db.query(User.id).filter(User.is_admin == 1).all()
-                admin_ids = [a[0] for a in admin_ids]
-                
-                # Fallback: if no admins are flagged, treat user ID 1 as the system admin
-                if not admin_ids:
-                    admin_ids = [1]
-                
-                query = query.filter(
-                    (Workout.created_by_user_id == None) | 
-                    (Workout.created_by_user_id == user.id) |
-                    (Workout.created_by_user_id.in_(admin_ids))
-                )
-            
-            workouts = query.all()
-            
-            # Get admin IDs for determining global status
-            admin_id_rows = db.query(User.id).filter(User.is_admin == 1).all()
-            admin_ids = [a[0] for a in admin_id_rows]
-            
-            # Return dict with metadata
-            return [
-                {
-                    "name": w.name, 
-                    "is_global": (w.created_by_user_id is None or w.created_by_user_id in admin_ids),
-                    "created_by": w.created_by_user_id
-                } 
-                for w in workouts
-            ]
+            return self.catalog.visible_workouts(db, username, self._read_user_id)
         finally:
             db.close()
 
-    def delete_user(self, username: str):
-        db = self.get_db()
+    def get_catalog(self):
+        """(version, global workouts with their default exercises): the same for every user"""
+        return self.catalog.global_catalog()
+
+    def search_exercises(self, query: str, limit: int = 10):
+        """Fuzzy autocomplete over every exercise name in the catalog (all users)"""
+        limit = max(1, min(limit, 50))
+        db = self.get_read_db()
+        try:
+            return True, self.exercise_index.search(db, query, limit)
+        except Exception as e:
+            return False, str(e)
+        finally:
+            db.close()
+
+    def search_notes(self, username: str, query: str, limit: int = 20, offset: int = 0):
+        """Full-text search over setup notes (global + own exercises) and own session notes"""
+        limit = max(1, min(limit, 100))
+        offset = max(0, offset)
+        db = self.get_read_db(username)
+        try:
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            results = search_notes(db, user_id, query, limit, offset)
+            next_offset = offset + limit if len(results) > limit else None
+            return True, {"results": results[:limit], "next_offset": next_offset}
+        except Exception as e:
+            return False, str(e)
+        finally:
+            db.close()
+
+    @serialized_write
+    def delete_user(self, username: str, db=None):
+        self.flush_pending_sets()
+        db = self.get_db(db)
         try:
             user = db.query(User).filter(User.username == username).first()
             if not user:
@@ -95,8 +206,13 @@ class DataManager:
             # Easier to manually delete sets first.
             
             db.query(DBSetLog).filter(DBSetLog.user_id == user.id).delete()
+            db.query(PlannedSet).filter(PlannedSet.user_id == user.id).delete()
             db.delete(user)
             db.commit()
+            if self.cache:
+                self._on_commit(db, self.cache.bump, "users")
+            self._after_write(username, user_id=user.id, db=db)
+            self._on_commit(db, self.catalog.invalidate)
             return True, f"User {username} deleted"
         except Exception as e:
             db.rollback()
@@ -104,117 +220,334 @@ class DataManager:
         finally:
             db.close()
 
-    def get_workout_data(self, workout_type: str, week: int, username: str, split: str = "A") -> list[APIExercise]:
-        db = self.get_db()
+    def _load_split_sets(self, db, workout_type: str, user_id: int, split: str, first_week: int, last_week: int):
+        """
+        Exercise rows of a split plus the user's sets for weeks first_week..last_week,
+        fetched with one range query and grouped as {week: {exercise_id: [rows]}}.
+        """
+        workout_id = db.execute(select(Workout.id).where(Workout.name == workout_type)).scalar()
+        if not workout_id:
+            return [], {}
+        
+        exercises = db.execute(
+            select(Exercise.id, Exercise.name, Exercise.movement_id, Exercise.setup_notes).where(
+                Exercise.workout_id == workout_id,
+                (Exercise.split == split) | (Exercise.split == None)
+            )
+        ).all()
+        if not exercises:
+            return [], {}
+        
+        exercise_ids = [ex.id for ex in exercises]
+        with self._write_lock():
+            set_rows = db.execute(
+                select(
+                    DBSetLog.id, DBSetLog.exercise_id, DBSetLog.week, DBSetLog.set_number, DBSetLog.weight, DBSetLog.reps,
+                    func.coalesce(DBSetLog.version, 1).label("version")
+                ).where(
+                    DBSetLog.user_id == user_id,
+                    DBSetLog.exercise_id.in_(exercise_ids),
+                    DBSetLog.week.between(first_week, last_week)
+                ).order_by(DBSetLog.set_number)
+            ).all()
+            if self.write_buffer:
+                # Acknowledged but not yet flushed; their set numbers follow the DB ones
+                set_rows += self.write_buffer.pending_sets(user_id, exercise_ids, range(first_week, last_week + 1))
+        
+        sets_by_week = {}
+        for s in set_rows:
+            sets_by_week.setdefault(s.week, {}).setdefault(s.exercise_id, []).append(s)
+        return exercises, sets_by_week
+
+    def _last_performed(self, db, user_id: int, exercise_ids, before_week: int):
+        """
+        {exercise_id: (week, [set rows])} for the most recent week before before_week
+        in which the user logged each exercise - skipped weeks don't hide history.
+        One query: DENSE_RANK over week per exercise, served by ix_sets_live_user_exercise_week.
+        """
+        if not exercise_ids or before_week <= 1:
+            return {}
+        rank = func.dense_rank().over(partition_by=DBSetLog.exercise_id, order_by=DBSetLog.week.desc()).label("rank")
+        ranked = select(
+            DBSetLog.id, DBSetLog.exercise_id, DBSetLog.week, DBSetLog.set_number, DBSetLog.weight, DBSetLog.reps,
+            func.coalesce(DBSetLog.version, 1).label("version"), rank
+        ).where(
+            DBSetLog.user_id == user_id,
+            DBSetLog.exercise_id.in_(exercise_ids),
+            DBSetLog.week < before_week
+        ).subquery()
+        with self._write_lock():
+            rows = db.execute(
+                select(
+                    ranked.c.id, ranked.c.exercise_id, ranked.c.week, ranked.c.set_number, ranked.c.weight, ranked.c.reps,
+                    ranked.c.version
+                )
+                .where(ranked.c.rank == 1)
+                .order_by(ranked.c.set_number)
+            ).all()
+            if self.write_buffer:
+                rows += self.write_buffer.pending_sets(user_id, exercise_ids, range(1, before_week))
+
+        last = {}
+        for r in rows:
+            week, sets = last.get(r.exercise_id, (0, []))
+            if r.week > week:
+                last[r.exercise_id] = (r.week, [r])
+            elif r.week == week:
+                sets.append(r)
+        return last
+
+    def get_workout_data(self, workout_type: str, week: int, username: str, split: str = "A", db=None) -> list[dict]:
+        """
+        Exercises of a split with this week's sets and the last week each was performed.
+        Hot read path: uses Core select() rows instead of hydrating ORM entities,
+        one query for this week's sets and one window query for the last performance.
+        """
+        db = self.get_read_db(username, db)
         try:
-            workout = db.query(Workout).filter(Workout.name == workout_type).first()
-            if not workout:
-                return []
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
             
-            user = self.ensure_user(db, username)
+            cache_key = None
+            if self.cache:
+                # Any set write by the user or exercise edit in the workout changes the generations
+                cache_key = (
+                    f"workout_data:{workout_type}:{split}:{week}:{user_id}:{self.cache.generation('global')}:"
+                    f"{self.cache.generation(f'user:{user_id}')}:{self.cache.generation(f'workout:{workout_type}')}"
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            exercises_db = db.query(Exercise).filter(
-                Exercise.workout_id == workout.id,
-                (Exercise.split == split) | (Exercise.split == None)
-            ).all()
+            exercises, sets_by_week = self._load_split_sets(db, workout_type, user_id, split, week, week)
+            current_sets = sets_by_week.get(week, {})
+            last = self._last_performed(db, user_id, [ex.id for ex in exercises], week)
             
             result = []
-            for ex in exercises_db:
-                sets_db = db.query(DBSetLog).filter(
-                    DBSetLog.user_id == user.id,
-                    DBSetLog.exercise_id == ex.id,
-                    DBSetLog.week == week
-                ).order_by(DBSetLog.set_number).all()
-                
-                current_sets = [
-                    APISetLog(id=s.id, set_number=s.set_number, weight=s.weight, reps=s.reps)
-                    for s in sets_db
-                ]
-                
-                prev_summary = None
-                if week > 1:
-                    prev_sets = db.query(DBSetLog).filter(
-                        DBSetLog.user_id == user.id,
-                        DBSetLog.exercise_id == ex.id,
-                        DBSetLog.week == week - 1
-                    ).order_by(DBSetLog.set_number).all()
-                    
-                    if prev_sets:
-                        prev_summary = ", ".join([f"{s.weight}x{s.reps}" for s in prev_sets])
-                
-                result.append(APIExercise(
-                    id=ex.id,
-                    name=ex.name,
-                    sets=current_sets,
-                    prev_week_summary=prev_summary,
-                    setup_notes=ex.setup_notes
-                ))
-                
+            for ex in exercises:
+                last_week, last_sets = last.get(ex.id, (None, []))
+                result.append({
+                    "id": ex.id,
+                    "name": ex.name,
+                    "movement_id": ex.movement_id,
+                    "sets": [_set_dict(s) for s in current_sets.get(ex.id, [])],
+                    "prev_week_summary": _sets_summary(last_sets),
+                    "last_performed_week": last_week,
+                    "last_performed_sets": [_set_dict(s) for s in last_sets],
+                    "setup_notes": ex.setup_notes
+                })
+            
+            if cache_key:
+                self._cache_read(db, cache_key, result)
             return result
         finally:
             db.close()
 
-    def log_set(self, workout_type: str, exercise_name: str, weight: float, reps: int, week: int, username: str):
-        db = self.get_db()
+    def get_workout_weeks(self, workout_type: str, start_week: int, end_week: int, username: str, split: str = "A") -> list[dict]:
+        """
+        Exercises of a split with their sets for every week in start_week..end_week
+        (plus a summary of the last earlier week performed), from one range query.
+        """
+        db = self.get_read_db(username)
+        try:
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            exercises, sets_by_week = self._load_split_sets(db, workout_type, user_id, split, start_week, end_week)
+            last = self._last_performed(db, user_id, [ex.id for ex in exercises], start_week)
+
+            result = []
+            for ex in exercises:
+                weeks = []
+                last_sets = last.get(ex.id, (None, []))[1]
+                for week in range(start_week, end_week + 1):
+                    sets = sets_by_week.get(week, {}).get(ex.id, [])
+                    weeks.append({
+                        "week": week,
+                        "sets": [_set_dict(s) for s in sets],
+                        "prev_week_summary": _sets_summary(last_sets)
+                    })
+                    if sets:
+                        last_sets = sets
+                result.append({
+                    "id": ex.id,
+                    "name": ex.name,
+                    "movement_id": ex.movement_id,
+                    "setup_notes": ex.setup_notes,
+                    "weeks": weeks
+                })
+            return result
+        finally:
+            db.close()
+
+    def _resolve_exercise(self, db, workout, exercise_name: str):
+        """Best fuzzy match for exercise_name among the workout's exercises, or None"""
+        exercises = db.query(Exercise).filter(Exercise.workout_id == workout.id).all()
+        if not exercises:
+            return None
+        best_match, score = process.extractOne(exercise_name, [e.name for e in exercises])
+        if score < 70:
+            return None
+        return next(e for e in exercises if e.name == best_match)
+
+    @serialized_write
+    def log_set(self, workout_type: str, exercise_name: str, weight: float, reps: int, week: int, username: str, db=None):
+        db = self.get_db(db)
         try:
             user = self.ensure_user(db, username)
             workout = db.query(Workout).filter(Workout.name == workout_type).first()
             if not workout:
                  return False, "Workout type not found"
             
-            exercises = db.query(Exercise).filter(Exercise.workout_id == workout.id).all()
-            exercise_names = [e.name for e in exercises]
-            
-            best_match, score = process.extractOne(exercise_name, exercise_names)
-            if score < 70:
+            exercise = self._resolve_exercise(db, workout, exercise_name)
+            if not exercise:
                 return False, f"Exercise '{exercise_name}' not found."
+            best_match = exercise.name
             
-            exercise = next(e for e in exercises if e.name == best_match)
+            with self._write_lock():
+                count = db.query(DBSetLog).filter(
+                    DBSetLog.user_id == user.id,
+                    DBSetLog.exercise_id == exercise.id,
+                    DBSetLog.week == week
+                ).count()
+                
+                if self.write_buffer:
+                    count += self.write_buffer.pending_count(user.id, exercise.id, week)
+                
+                next_set_num = count + 1
+                
+                row = dict(
+                    user_id=user.id,
+                    exercise_id=exercise.id,
+                    week=week,
+                    set_number=next_set_num,
+                    weight=weight,
+                    reps=reps
+                )
+                if self.write_buffer:
+                    # Journaled and acknowledged now, committed with the next batch
+                    self.write_buffer.append(row)
+                else:
+                    db.add(DBSetLog(**row))
+                    db.commit()
+            self._after_write(username, user_id=user.id, db=db)
             
-            count = db.query(DBSetLog).filter(
-                DBSetLog.user_id == user.id,
-                DBSetLog.exercise_id == exercise.id,
-                DBSetLog.week == week
-            ).count()
+            return True, f"Logged {weight}x{reps} for {best_match}"
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
+        finally:
+            db.close()
+
+    @serialized_write
+    def log_sets(self, workout_type: str, exercise_name: str, sets: list[dict], week: int, username: str, db=None):
+        """
+        Log several sets ([{"weight", "reps"}, ...]) of one exercise: the exercise is
+        resolved once and all sets are written in one transaction (or one journal write).
+        """
+        if not sets:
+            return False, "No sets to log"
+        db = self.get_db(db)
+        try:
+            user = self.ensure_user(db, username)
+            workout = db.query(Workout).filter(Workout.name == workout_type).first()
+            if not workout:
+                return False, "Workout type not found"
             
-            next_set_num = count + 1
+            exercise = self._resolve_exercise(db, workout, exercise_name)
+            if not exercise:
+                return False, f"Exercise '{exercise_name}' not found."
             
-            log = DBSetLog(
-                user_id=user.id,
-                exercise_id=exercise.id,
-                week=week,
-                set_number=next_set_num,
-                weight=weight,
-                reps=reps
-            )
-            db.add(log)
-            db.commit()
+            with self._write_lock():
+                count = db.query(DBSetLog).filter(
+                    DBSetLog.user_id == user.id,
+                    DBSetLog.exercise_id == exercise.id,
+                    DBSetLog.week == week
+                ).count()
+                
+                if self.write_buffer:
+                    count += self.write_buffer.pending_count(user.id, exercise.id, week)
+                
+                rows = [
+                    dict(
+                        user_id=user.id,
+                        exercise_id=exercise.id,
+                        week=week,
+                        set_number=count + i,
+                        weight=s["weight"],
+                        reps=s["reps"]
+                    )
+                    for i, s in enumerate(sets, start=1)
+                ]
+                if self.write_buffer:
+                    self.write_buffer.append_many(rows)
+                else:
+                    db.add_all([DBSetLog(**row) for row in rows])
+                    db.commit()
+            self._after_write(username, user_id=user.id, db=db)
             
-            return True, f"Logged {weight}x{reps} for {best_match}"
+            summary = ", ".join(f"{s['weight']}x{s['reps']}" for s in sets)
+            return True, f"Logged {len(sets)} sets for {exercise.name}: {summary}"
         except Exception as e:
             db.rollback()
             return False, str(e)
         finally:
             db.close()
 
-    def update_set(self, set_id: int, weight: float, reps: int, username: str):
-        db = self.get_db()
+    @serialized_write
+    def update_set(self, set_id: int, weight: float, reps: int, username: str, version: int = None, db=None):
+        """
+        One conditional UPDATE ... WHERE id, user_id (and version, if the client sent
+        the one it edited), instead of load + mutate + commit. A version mismatch means
+        another device changed the set first: nothing is written.
+        Returns (status, message, version, current set) with status "updated",
+        "conflict" (version/set are the current row) or "not_found".
+        """
+        db = self.get_db(db)
+        current_version = func.coalesce(DBSetLog.version, 1)
+        
+        def conditional_update(user_id):
+            # The id comes from the catalog: only write if it is still this user's
+            owned = exists().where(User.id == user_id, User.username == username)
+            query = update(DBSetLog).where(
+                DBSetLog.id == set_id, DBSetLog.user_id == user_id, DBSetLog.deleted_at.is_(None), owned
+            )
+            if version is not None:
+                query = query.where(current_version == version)
+            new_version = db.execute(
+                query.values(weight=weight, reps=reps, version=current_version + 1).returning(DBSetLog.version)
+            ).scalar()
+            return new_version, owned
+        
         try:
-            # We don't really need username if ID is unique, but safer check
-            user = self.ensure_user(db, username)
-            log = db.query(DBSetLog).filter(DBSetLog.id == set_id, DBSetLog.user_id == user.id).first()
-            if not log:
-                return False, "Set not found or unauthorized"
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            new_version, owned = conditional_update(user_id)
+            if new_version is None and not db.execute(select(owned)).scalar():
+                # Stale id: the user was deleted (and maybe re-created) by another worker
+                self.catalog.forget_user(username)
+                user_id = self.catalog.user_id(db, username, self._read_user_id)
+                new_version, _ = conditional_update(user_id)
+            
+            if new_version is None:
+                # Only on failure: tell a conflict apart from a missing set
+                row = db.execute(
+                    select(DBSetLog.id, DBSetLog.set_number, DBSetLog.weight, DBSetLog.reps, current_version.label("version"))
+                    .where(DBSetLog.id == set_id, DBSetLog.user_id == user_id)
+                ).first()
+                if not row:
+                    return "not_found", "Set not found or unauthorized", None, None
+                return "conflict", "Set was changed on another device", row.version, _set_dict(row)
             
-            log.weight = weight
-            log.reps = reps
             db.commit()
-            return True, "Set updated"
+            self._after_write(username, user_id=user_id, db=db)
+            return "updated", "Set updated", new_version, None
+        except Exception as e:
+            db.rollback()
+            return "error", str(e), None, None
         finally:
             db.close()
 
-    def delete_set(self, set_id: int, username: str):
-        db = self.get_db()
+    @serialized_write
+    def delete_set(self, set_id: int, username: str, db=None):
+        self.flush_pending_sets()
+        db = self.get_db(db)
         try:
             user = self.ensure_user(db, username)
             log = db.query(DBSetLog).filter(DBSetLog.id == set_id, DBSetLog.user_id == user.id).first()
@@ -224,8 +557,9 @@ class DataManager:
             exercise_id = log.exercise_id
             week = log.week
             
-            db.delete(log)
-            db.commit() # Delete first to remove from index
+            # Soft delete (restorable until compaction); flushed so the reorder below skips it
+            log.deleted_at = datetime.utcnow()
+            db.flush()
             
             # Reorder
             remaining = db.query(DBSetLog).filter(
@@ -237,16 +571,22 @@ class DataManager:
             for idx, s in enumerate(remaining):
                 s.set_number = idx + 1
             
+            self._schedule_compaction(db, log.deleted_at)
             db.commit()
+            self._after_write(username, user_id=user.id, db=db)
             return True, "Set deleted"
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
         finally:
             db.close()
 
-    def create_workout(self, name: str, username: str = None):
-        db = self.get_db()
+    @serialized_write
+    def create_workout(self, name: str, username: str = None, db=None):
+        db = self.get_db(db)
         try:
-            existing = db.query(Workout).filter(Workout.name == name).first()
-            if existing:
+            existing = db.query(Workout).filter(Workout.name == name).execution_options(include_deleted=True).first()
+            if existing and existing.deleted_at is None:
                 return False, f"Workout '{name}' already exists"
             
             creator_id = None
@@ -254,9 +594,15 @@ class DataManager:
                 user = self.ensure_user(db, username)
                 creator_id = user.id
 
-            workout = Workout(name=name, created_by_user_id=creator_id)
-            db.add(workout)
+            if existing:
+                # Names are unique: take over the deleted workout's row (its exercises stay deleted)
+                existing.deleted_at = None
+                existing.created_by_user_id = creator_id
+            else:
+                db.add(Workout(name=name, created_by_user_id=creator_id))
             db.commit()
+            self._after_write(username, workout_type=name, db=db)
+            self._on_commit(db, self.catalog.invalidate)
             return True, f"Workout '{name}' created"
         except Exception as e:
             db.rollback()
@@ -264,8 +610,9 @@ class DataManager:
         finally:
             db.close()
 
-    def add_exercise(self, workout_type: str, name: str, default_sets: int = 3, username: str = None, split: str = "A", setup_notes: str = None):
-        db = self.get_db()
+    @serialized_write
+    def add_exercise(self, workout_type: str, name: str, default_sets: int = 3, username: str = None, split: str = "A", setup_notes: str = None, db=None):
+        db = self.get_db(db)
         try:
             workout = db.query(Workout).filter(Workout.name == workout_type).first()
             if not workout:
@@ -289,11 +636,19 @@ class DataManager:
                 name=name, 
                 default_sets=default_sets,
                 user_id=user.id if user else None,
+                movement_id=ensure_movement(db, name),
                 split=split,
                 setup_notes=setup_notes
             )
             db.add(exercise)
+            if setup_notes:
+                db.flush()
+                index_notes(db, "exercise", exercise.id, setup_notes)
             db.commit()
+            self._after_write(username, workout_type=workout_type, db=db)
+            self._on_commit(db, self.exercise_index.add, name)
+            if self.catalog.is_default_owner(exercise.user_id):
+                self._on_commit(db, self.catalog.invalidate)
             return True, f"Added '{name}' to {workout_type}"
         except Exception as e:
             db.rollback()
@@ -301,9 +656,10 @@ class DataManager:
         finally:
             db.close()
 
-    def update_exercise_notes(self, workout_type: str, exercise_name: str, setup_notes: str, username: str = None, split: str = "A"):
+    @serialized_write
+    def update_exercise_notes(self, workout_type: str, exercise_name: str, setup_notes: str, username: str = None, split: str = "A", db=None):
         """Update setup notes for an exercise"""
-        db = self.get_db()
+        db = self.get_db(db)
         try:
             workout = db.query(Workout).filter(Workout.name == workout_type).first()
             if not workout:
@@ -319,7 +675,11 @@ class DataManager:
                 return False, f"Exercise '{exercise_name}' not found"
             
             exercise.setup_notes = setup_notes
+            index_notes(db, "exercise", exercise.id, setup_notes)
             db.commit()
+            self._after_write(username, workout_type=workout_type, db=db)
+            if self.catalog.is_default_owner(exercise.user_id):
+                self._on_commit(db, self.catalog.invalidate)
             return True, "Notes updated successfully"
         except Exception as e:
             db.rollback()
@@ -327,9 +687,30 @@ class DataManager:
         finally:
             db.close()
 
-    def delete_exercise(self, workout_type: str, exercise_name: str, username: str = None):
-        """Delete an exercise from a workout"""
-        db = self.get_db()
+    def _owned_exercises(self, db, query, username: str = None):
+        """Scope an Exercise query to what username may delete/restore"""
+        if username == 'admin':
+            # Admin deletes global defaults
+            return query.filter(Exercise.user_id == None)
+        if username:
+            user = self.ensure_user(db, username)
+            return query.filter(Exercise.user_id == user.id)
+        # Legacy/fallback
+        return query
+
+    def _schedule_compaction(self, db, deleted_at: datetime):
+        """Enqueue the purge of rows deleted at deleted_at; deletes within the same hour share one job"""
+        due = (deleted_at + SOFT_DELETE_RETENTION).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        self.jobs.enqueue(db, "compact_deleted", {}, run_after=due, coalesce=True)
+
+    @serialized_write
+    def delete_exercise(self, workout_type: str, exercise_name: str, username: str = None, db=None):
+        """
+        Delete an exercise from a workout. Soft delete: the exercise is hidden (its
+        sets with it) and can be restored until compaction purges it and its sets,
+        so deleting an exercise with a long history is a single-row update.
+        """
+        db = self.get_db(db)
         try:
             workout = db.query(Workout).filter(Workout.name == workout_type).first()
             if not workout:
@@ -339,27 +720,20 @@ class DataManager:
                 Exercise.workout_id == workout.id,
                 Exercise.name == exercise_name
             )
-            
-            # Handle user scoping
-            if username == 'admin':
-                # Admin deletes global defaults
-                exercise = query.filter(Exercise.user_id == None).first()
-            elif username:
-                user = self.ensure_user(db, username)
-                exercise = query.filter(Exercise.user_id == user.id).first()
-            else:
-                # Legacy/fallback
-                exercise = query.first()
+            exercise = self._owned_exercises(db, query, username).first()
             
             if not exercise:
                 return False, f"Exercise '{exercise_name}' not found or you don't have permission"
             
-            # Delete all sets associated with this exercise (use DBSetLog not Set)
-            db.query(DBSetLog).filter(DBSetLog.exercise_id == exercise.id).delete()
-            
-            # Delete the exercise
-            db.delete(exercise)
+            is_default = self.catalog.is_default_owner(exercise.user_id)
+            unindex_notes(db, "exercise", [exercise.id])
+            exercise.deleted_at = datetime.utcnow()
+            self._schedule_compaction(db, exercise.deleted_at)
             db.commit()
+            self._after_write(username, workout_type=workout_type, db=db)
+            self._on_commit(db, self.exercise_index.invalidate)
+            if is_default:
+                self._on_commit(db, self.catalog.invalidate)
             return True, f"Exercise '{exercise_name}' deleted successfully"
         except Exception as e:
             db.rollback()
@@ -367,27 +741,29 @@ class DataManager:
         finally:
             db.close()
 
-    def delete_workout(self, workout_type: str):
-        """Delete an entire workout and all associated exercises/sets"""
-        db = self.get_db()
+    @serialized_write
+    def delete_workout(self, workout_type: str, db=None):
+        """
+        Delete an entire workout and all associated exercises/sets. Soft delete: the
+        workout and its exercises get the same deleted_at, which is how restore finds
+        the exercises that went with it; compaction purges everything later.
+        """
+        db = self.get_db(db)
         try:
             workout = db.query(Workout).filter(Workout.name == workout_type).first()
             if not workout:
                 return False, "Workout type not found"
             
-            # Get all exercises for this workout
-            exercises = db.query(Exercise).filter(Exercise.workout_id == workout.id).all()
-            
-            # Delete all sets for all exercises (use DBSetLog not Set)
-            for exercise in exercises:
-                db.query(DBSetLog).filter(DBSetLog.exercise_id == exercise.id).delete()
-            
-            # Delete all exercises
-            db.query(Exercise).filter(Exercise.workout_id == workout.id).delete()
-            
-            # Delete the workout
-            db.delete(workout)
+            now = datetime.utcnow()
+            exercise_ids = db.execute(select(Exercise.id).where(Exercise.workout_id == workout.id)).scalars().all()
+            unindex_notes(db, "exercise", exercise_ids)
+            db.execute(update(Exercise).where(Exercise.id.in_(exercise_ids)).values(deleted_at=now))
+            workout.deleted_at = now
+            self._schedule_compaction(db, now)
             db.commit()
+            self._after_write(workout_type=workout_type, db=db)
+            self._on_commit(db, self.catalog.invalidate)
+            self._on_commit(db, self.exercise_index.invalidate)
             return True, f"Workout '{workout_type}' deleted successfully"
         except Exception as e:
             db.rollback()
@@ -395,8 +771,164 @@ class DataManager:
         finally:
             db.close()
 
-    def start_session(self, username: str, workout_type: str, split: str = "A"):
+    @serialized_write
+    def restore(self, kind: str, username: str = None, workout_type: str = None, exercise_name: str = None, set_id: int = None, db=None):
+        """
+        Undo a soft delete before compaction purges it: kind "workout" (with the
+        exercises deleted along with it), "exercise" (with its sets) or "set".
+        """
+        if kind == "set":
+            # Renumbers the exercise's sets
+            self.flush_pending_sets()
+        db = self.get_db(db)
+        try:
+            if kind == "workout":
+                return self._restore_workout(db, workout_type, username)
+            if kind == "exercise":
+                return self._restore_exercise(db, workout_type, exercise_name, username)
+            if kind == "set":
+                return self._restore_set(db, set_id, username)
+            return False, f"Unknown kind '{kind}'"
+        except Exception as e:
+            db.rollback()
+            return False, str(e)
+        finally:
+            db.close()
+
+    def _restore_workout(self, db, workout_type: str, username: str = None):
+        workout = db.query(Workout).filter(
+            Workout.name == workout_type, Workout.deleted_at != None
+        ).execution_options(include_deleted=True).first()
+        if not workout:
+            return False, f"No deleted workout '{workout_type}'"
+        
+        exercises = db.query(Exercise).filter(
+            Exercise.workout_id == workout.id, Exercise.deleted_at == workout.deleted_at
+        ).execution_options(include_deleted=True).all()
+        for exercise in exercises:
+            exercise.deleted_at = None
+            index_notes(db, "exercise", exercise.id, exercise.setup_notes)
+        workout.deleted_at = None
+        db.commit()
+        self._after_write(username, workout_type=workout_type, db=db)
+        self._on_commit(db, self.catalog.invalidate)
+        self._on_commit(db, self.exercise_index.invalidate)
+        return True, f"Workout '{workout_type}' restored with {len(exercises)} exercises"
+
+    def _restore_exercise(self, db, workout_type: str, exercise_name: str, username: str = None):
+        workout = db.query(Workout).filter(Workout.name == workout_type).first()
+        if not workout:
+            return False, "Workout type not found"
+        
+        query = db.query(Exercise).filter(
+            Exercise.workout_id == workout.id,
+            Exercise.name == exercise_name,
+            Exercise.deleted_at != None
+        ).execution_options(include_deleted=True)
+        exercise = self._owned_exercises(db, query, username).order_by(desc(Exercise.deleted_at)).first()
+        if not exercise:
+            return False, f"No deleted exercise '{exercise_name}' in {workout_type} you can restore"
+        
+        clash = db.query(Exercise.id).filter(
+            Exercise.workout_id == workout.id,
+            Exercise.name == exercise_name,
+            Exercise.split == exercise.split
+        ).first()
+        if clash:
+            return False, f"Exercise '{exercise_name}' already exists in {workout_type}"
+        
+        exercise.deleted_at = None
+        index_notes(db, "exercise", exercise.id, exercise.setup_notes)
+        db.commit()
+        self._after_write(username, workout_type=workout_type, db=db)
+        self._on_commit(db, self.exercise_index.add, exercise_name)
+        if self.catalog.is_default_owner(exercise.user_id):
+            self._on_commit(db, self.catalog.invalidate)
+        return True, f"Exercise '{exercise_name}' restored"
+
+    def _restore_set(self, db, set_id: int, username: str):
+        user = self.ensure_user(db, username)
+        log = db.query(DBSetLog).filter(
+            DBSetLog.id == set_id, DBSetLog.user_id == user.id, DBSetLog.deleted_at != None
+        ).execution_options(include_deleted=True).first()
+        if not log:
+            return False, "Deleted set not found or unauthorized"
+        if not db.query(Exercise.id).filter(Exercise.id == log.exercise_id).first():
+            return False, "The set's exercise is deleted; restore the exercise first"
+        
+        # Back at its old position (or last, if fewer sets are left); later sets move down one
+        same_week = and_(
+            DBSetLog.user_id == user.id,
+            DBSetLog.exercise_id == log.exercise_id,
+            DBSetLog.week == log.week,
+            DBSetLog.deleted_at.is_(None)
+        )
+        count = db.execute(select(func.count(DBSetLog.id)).where(same_week)).scalar()
+        position = min(log.set_number, count + 1)
+        db.execute(
+            update(DBSetLog).where(same_week, DBSetLog.set_number >= position)
+            .values(set_number=DBSetLog.set_number + 1)
+        )
+        log.set_number = position
+        log.deleted_at = None
+        db.commit()
+        self._after_write(username, user_id=user.id, db=db)
+        return True, "Set restored"
+
+    def compact_deleted(self, payload: dict = None):
+        """
+        Job handler: physically purge rows soft-deleted longer than SOFT_DELETE_RETENTION
+        ago, children first, in batches of COMPACTION_BATCH_SIZE, each its own short
+        transaction so no write waits long behind a big purge.
+        """
+        cutoff = datetime.utcnow() - SOFT_DELETE_RETENTION
+        purged = {}
+        for step in ("sets", "exercise_sets", "exercises", "workouts"):
+            purged[step] = 0
+            while True:
+                count = self._purge_batch(step, cutoff)
+                purged[step] += count
+                if count < COMPACTION_BATCH_SIZE:
+                    break
+        return purged
+
+    @serialized_write
+    def _purge_batch(self, step: str, cutoff: datetime) -> int:
+        """One compaction batch; returns the number of rows deleted"""
         db = self.get_db()
+        try:
+            expired_exercises = select(Exercise.id).where(Exercise.deleted_at < cutoff)
+            if step == "sets":
+                model, ids = DBSetLog, select(DBSetLog.id).where(DBSetLog.deleted_at < cutoff)
+            elif step == "exercise_sets":
+                # Sets are hidden along with their exercise; they go with it
+                model, ids = DBSetLog, select(DBSetLog.id).where(DBSetLog.exercise_id.in_(expired_exercises))
+            elif step == "exercises":
+                model, ids = Exercise, expired_exercises.where(~exists().where(DBSetLog.exercise_id == Exercise.id))
+            else:
+                model, ids = Workout, select(Workout.id).where(
+                    Workout.deleted_at < cutoff, ~exists().where(Exercise.workout_id == Workout.id)
+                )
+            # The partial ix_*_deleted_at indexes serve these lookups
+            ids = db.execute(ids.limit(COMPACTION_BATCH_SIZE).execution_options(include_deleted=True)).scalars().all()
+            if not ids:
+                return 0
+            
+            if step == "exercises":
+                unindex_notes(db, "exercise", ids)
+                db.execute(delete(PlannedSet).where(PlannedSet.exercise_id.in_(ids)))
+            if step == "workouts":
+                # Session history keeps its rows, shown as "Unknown" like sessions of a missing workout
+                db.execute(update(WorkoutSession).where(WorkoutSession.workout_id.in_(ids)).values(workout_id=None))
+            db.execute(delete(model).where(model.id.in_(ids)))
+            db.commit()
+            return len(ids)
+        finally:
+            db.close()
+
+    @serialized_write
+    def start_session(self, username: str, workout_type: str, split: str = "A", db=None):
+        db = self.get_db(db)
         try:
             user = self.ensure_user(db, username)
             workout = db.query(Workout).filter(Workout.name == workout_type).first()
@@ -410,6 +942,7 @@ class DataManager:
             )
             db.add(session)
             db.commit()
+            self._after_write(username, user_id=user.id, db=db)
             db.refresh(session)
             return True, session.id
         except Exception as e:
@@ -418,21 +951,52 @@ class DataManager:
         finally:
             db.close()
 
-    def end_session(self, session_id: int, username: str, notes: str = None):
-        db = self.get_db()
+    @serialized_write
+    def end_session(self, session_id: int, username: str, notes: str = None, db=None):
+        """
+        Closes the session and returns right away with the duration. Volume, PRs and
+        the streak are computed by a "session_summary" background job (see summarize_session).
+        Returns (success, message, duration_minutes, job_id).
+        """
+        self.flush_pending_sets()
+        db = self.get_db(db)
         try:
             user = self.ensure_user(db, username)
             session = db.query(WorkoutSession).filter(WorkoutSession.id == session_id, WorkoutSession.user_id == user.id).first()
             
             if not session:
-                return False, "Session not found", None, None, []
+                return False, "Session not found", None, None
                 
             session.end_time = datetime.utcnow()
             session.notes = notes
+            index_notes(db, "session", session.id, notes)
             
             # Calculate duration
             duration_minutes = int((session.end_time - session.start_time).total_seconds() / 60)
             
+            # Enqueued in the same transaction: committed together or not at all
+            job_id = self.jobs.enqueue(db, "session_summary", {"session_id": session.id}, owner=username)
+            db.commit()
+            self._after_write(username, user_id=user.id, db=db)
+            self._on_commit(db, self.jobs.wake)
+            return True, "Session ended", duration_minutes, job_id
+            
+        except Exception as e:
+            db.rollback()
+            return False, str(e), None, None
+        finally:
+            db.close()
+
+    @serialized_write
+    def summarize_session(self, payload: dict):
+        """Job handler: volume, PRs and streak of an ended session, stored on the session row."""
+        db = self.get_db()
+        try:
+            session = db.query(WorkoutSession).filter(WorkoutSession.id == payload["session_id"]).first()
+            if not session:
+                raise ValueError(f"Session {payload['session_id']} not found")
+            user_id = session.user_id
+            
             # Calculate volume & Check PRs
             # 1. Get all sets created during this session window by this user for the workout 
             # (Approximation since we didn't link sets to session yet, using time window + user + workout)
@@ -440,8 +1004,11 @@ class DataManager:
             # Ideally frontend passes sets or we link them. 
             # For now, let's look for sets logged AFTER start_time by this user
             
-            sets_in_window = db.query(DBSetLog).filter(
-                DBSetLog.user_id == user.id,
+            # Exercise name/movement of every set from the same query, not one per PR exercise.
+            # Sets of a soft-deleted exercise are left out (its relationship would load as None).
+            sets_in_window = db.query(DBSetLog).join(DBSetLog.exercise).options(contains_eager(DBSetLog.exercise)).filter(
+                Exercise.deleted_at.is_(None),
+                DBSetLog.user_id == user_id,
                 DBSetLog.timestamp >= session.start_time,
                 DBSetLog.timestamp <= session.end_time
             ).all()
@@ -470,10 +1037,15 @@ class DataManager:
             
             # Check against legacy history (sets BEFORE session start)
             for ex_id, data in exercise_maxes.items():
-                # Find max weight ever lifted before this session
+                # Find max weight ever lifted before this session, in any workout/split with the same movement
+                movement_id = data['obj'].exercise.movement_id
+                if movement_id:
+                    same_movement = DBSetLog.exercise_id.in_(select(Exercise.id).where(Exercise.movement_id == movement_id))
+                else:
+                    same_movement = DBSetLog.exercise_id == ex_id
                 history = db.query(func.max(DBSetLog.weight)).filter(
-                    DBSetLog.user_id == user.id,
-                    DBSetLog.exercise_id == ex_id,
+                    DBSetLog.user_id == user_id,
+                    same_movement,
                     DBSetLog.timestamp < session.start_time
                 ).scalar()
                 
@@ -488,20 +1060,171 @@ class DataManager:
             pr_exercise_names = [p.split(":")[0].replace("New PR on ", "") for p in prs]
             session.pr_details = ", ".join(pr_exercise_names)
             session.pr_count = len(prs)
+            session.streak_weeks = self._weekly_streak(db, user_id, session.start_time)
+            # Next session's targets build on this one; don't wait for the weekly run.
+            # A job of its own, so planning can't stretch this one past its lease.
+            self.jobs.enqueue(db, "plan_targets", {"user_ids": [user_id]})
             
             db.commit()
-            return True, "Session ended", duration_minutes, total_volume, prs
+            self._after_write(user_id=user_id)
+            self.jobs.wake()
+            return {
+                "session_id": session.id,
+                "total_volume": total_volume,
+                "prs": prs,
+                "pr_count": len(prs),
+                "streak_weeks": session.streak_weeks
+            }
+        finally:
+            db.close()
+
+    @serialized_write
+    def schedule_plans(self, run_after: datetime = None):
+        """Make sure a weekly plan_targets run is queued (at startup; each run queues the next one when claimed)"""
+        db = self.get_db()
+        try:
+            self.jobs.enqueue(db, "plan_targets_weekly", {}, run_after=run_after, coalesce=True)
+            db.commit()
+        finally:
+            db.close()
+
+    def plan_targets(self, payload: dict = None):
+        """
+        Job handler: recompute every user's planned_sets (or payload["user_ids"]'),
+        PLAN_BATCH_USERS users at a time. Handles both "plan_targets" (after a
+        session) and the recurring "plan_targets_weekly".
+        """
+        payload = payload or {}
+        self.flush_pending_sets()
+        user_ids = payload.get("user_ids")
+        if user_ids is None:
+            db = self.get_db()
+            try:
+                user_ids = db.execute(select(User.id).order_by(User.id)).scalars().all()
+            finally:
+                db.close()
+        
+        planned = 0
+        for i in range(0, len(user_ids), PLAN_BATCH_USERS):
+            planned += self._plan_batch(user_ids[i:i + PLAN_BATCH_USERS])
+        return {"users": len(user_ids), "planned_sets": planned, "rule": PLAN_RULE}
+
+    @serialized_write
+    def _plan_batch(self, user_ids) -> int:
+        """
+        Targets for a batch of users from one read (the last session of each of
+        their exercises, via ix_sets_live_user_exercise_week) and one bulk replace.
+        Each exercise is planned for the next week it hasn't been done in yet: the
+        user's current (latest) week, or the one after if it's done already.
+        """
+        db = self.get_db()
+        try:
+            latest = (
+                select(DBSetLog.user_id, DBSetLog.exercise_id, func.max(DBSetLog.week).label("week"))
+                .join(Exercise, Exercise.id == DBSetLog.exercise_id)
+                .where(DBSetLog.user_id.in_(user_ids))
+                .group_by(DBSetLog.user_id, DBSetLog.exercise_id)
+                .subquery()
+            )
+            rows = db.execute(
+                select(DBSetLog.user_id, DBSetLog.exercise_id, DBSetLog.week, DBSetLog.weight, DBSetLog.reps)
+                .join(latest, and_(
+                    DBSetLog.user_id == latest.c.user_id,
+                    DBSetLog.exercise_id == latest.c.exercise_id,
+                    DBSetLog.week == latest.c.week
+                ))
+                .order_by(DBSetLog.user_id, DBSetLog.exercise_id, DBSetLog.set_number)
+            ).all()
+            
+            last = {} # (user_id, exercise_id) -> (week, [(weight, reps)])
+            current_week = {} # user_id -> latest week with any set
+            for r in rows:
+                last.setdefault((r.user_id, r.exercise_id), (r.week, []))[1].append((r.weight, r.reps))
+                current_week[r.user_id] = max(current_week.get(r.user_id, r.week), r.week)
             
+            now = datetime.utcnow()
+            planned = []
+            for (user_id, exercise_id), (week, sets) in last.items():
+                target_week = week + 1 if week >= current_week[user_id] else current_week[user_id]
+                planned.extend(
+                    dict(
+                        user_id=user_id, exercise_id=exercise_id, week=target_week, set_number=n,
+                        weight=weight, reps=reps, rule=PLAN_RULE, basis_week=week, created_at=now
+                    )
+                    for n, (weight, reps) in enumerate(plan_sets(sets), start=1)
+                )
+            
+            db.execute(delete(PlannedSet).where(PlannedSet.user_id.in_(user_ids)))
+            if planned:
+                db.execute(insert(PlannedSet), planned)
+            db.commit()
+            return len(planned)
+        finally:
+            db.close()
+
+    def get_plan(self, workout_type: str, week: int, username: str, split: str = "A"):
+        """Precomputed targets of a split's exercises for week: one indexed read, nothing is recomputed"""
+        db = self.get_read_db(username)
+        try:
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            rows = db.execute(
+                select(
+                    Exercise.id, Exercise.name, PlannedSet.set_number, PlannedSet.weight, PlannedSet.reps,
+                    PlannedSet.rule, PlannedSet.basis_week
+                )
+                .join(Exercise, Exercise.id == PlannedSet.exercise_id)
+                .join(Workout, Workout.id == Exercise.workout_id)
+                .where(
+                    PlannedSet.user_id == user_id,
+                    PlannedSet.week == week,
+                    Workout.name == workout_type,
+                    (Exercise.split == split) | (Exercise.split == None)
+                )
+                .order_by(Exercise.id, PlannedSet.set_number)
+            ).all()
+            
+            exercises = {}
+            for r in rows:
+                exercise = exercises.setdefault(r.id, {
+                    "exercise_id": r.id, "name": r.name, "rule": r.rule, "basis_week": r.basis_week, "sets": []
+                })
+                exercise["sets"].append({"set_number": r.set_number, "weight": r.weight, "reps": r.reps})
+            return True, list(exercises.values())
         except Exception as e:
-            db.rollback()
-            return False, str(e), None, None, None
+            return False, str(e)
         finally:
             db.close()
 
+    def _weekly_streak(self, db, user_id: int, as_of: datetime) -> int:
+        """Consecutive calendar weeks (Mon-Sun) with at least one finished session, ending with as_of's week"""
+        week_start = (as_of - timedelta(days=as_of.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        starts = db.execute(
+            select(WorkoutSession.start_time).where(
+                WorkoutSession.user_id == user_id,
+                WorkoutSession.end_time != None,
+                WorkoutSession.start_time < week_start + timedelta(days=7)
+            )
+        ).scalars()
+        weeks = {(start - timedelta(days=start.weekday())).date() for start in starts if start}
+        streak = 0
+        week = week_start.date()
+        while week in weeks:
+            streak += 1
+            week -= timedelta(days=7)
+        return streak
+
     def get_user_stats(self, username: str):
-        db = self.get_db()
+        db = self.get_read_db(username)
         try:
-            user = self.ensure_user(db, username)
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            
+            cache_key = None
+            if self.cache:
+                # Short TTL as well: "this week" moves on even without writes
+                cache_key = f"user_stats:{user_id}:{self.cache.generation('global')}:{self.cache.generation(f'user:{user_id}')}"
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return True, cached
             
             # 1. This Week's Stats
             today = datetime.utcnow()
@@ -509,7 +1232,7 @@ class DataManager:
             start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
             
             sessions_this_week = db.query(WorkoutSession).filter(
-                WorkoutSession.user_id == user.id,
+                WorkoutSession.user_id == user_id,
                 WorkoutSession.start_time >= start_of_week
             ).all()
             
@@ -518,30 +1241,143 @@ class DataManager:
                 
             # 2. Recent Activity
             recent_sessions = db.query(WorkoutSession).options(joinedload(WorkoutSession.workout)).filter(
-                WorkoutSession.user_id == user.id
+                WorkoutSession.user_id == user_id
             ).order_by(desc(WorkoutSession.start_time)).limit(5).all()
             
-            activity = []
-            for s in recent_sessions:
-                workout_name = s.workout.name if s.workout else "Unknown"
-                if s.split:
-                    workout_name += f" ({s.split})"
-                    
-                activity.append({
-                    "date": s.start_time.isoformat(), 
-                    "workout": workout_name,
-                    "duration": int((s.end_time - s.start_time).total_seconds() / 60) if s.end_time and s.start_time else 0,
-                    "volume": s.total_volume,
-                    "pr_count": s.pr_count or 0,
-                    "pr_details": s.pr_details if s.pr_count and s.pr_details else None
-                })
+            activity = [self._session_activity(s) for s in recent_sessions]
+            
+            # 3. Streak as of the last summarized session; lapsed if that's older than last week
+            latest = next((s for s in recent_sessions if s.streak_weeks is not None), None)
+            streak_weeks = latest.streak_weeks if latest and latest.start_time >= start_of_week - timedelta(days=7) else 0
                 
-            return True, {
+            stats = {
                 "workouts_this_week": workouts_this_week,
                 "prs_this_week": prs_this_week,
+                "streak_weeks": streak_weeks,
                 "recent_activity": activity
             }
+            if cache_key:
+                self.cache.set(cache_key, stats, ttl=60)
+            return True, stats
+            
+        except Exception as e:
+            return False, str(e)
+        finally:
+            db.close()
+
+    def get_movements(self, username: str):
+        """Movements the user has logged, across all workouts/splits, with their best weight"""
+        db = self.get_read_db(username)
+        try:
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            rows = db.execute(
+                select(
+                    Movement.id, Movement.name,
+                    func.max(DBSetLog.weight).label("best_weight"),
+                    func.count(func.distinct(DBSetLog.week)).label("weeks")
+                )
+                .join(Exercise, Exercise.movement_id == Movement.id)
+                .join(DBSetLog, DBSetLog.exercise_id == Exercise.id)
+                .where(DBSetLog.user_id == user_id)
+                .group_by(Movement.id, Movement.name)
+                .order_by(Movement.name)
+            ).all()
+            return True, [{"id": r.id, "name": r.name, "best_weight": r.best_weight, "weeks": r.weeks} for r in rows]
+        except Exception as e:
+            return False, str(e)
+        finally:
+            db.close()
+
+    def get_movement_progress(self, username: str, movement_id: int):
+        """Per-week best weight / volume of one movement, aggregated over every workout and split"""
+        db = self.get_read_db(username)
+        try:
+            user_id = self.catalog.user_id(db, username, self._read_user_id)
+            name = db.execute(select(Movement.name).where(Movement.id == movement_id)).scalar()
+            if name is None:
+                return False, "Movement not found"
+            rows = db.execute(
+                select(
+                    DBSetLog.week,
+                    func.max(DBSetLog.weight).label("best_weight"),
+                    func.sum(DBSetLog.weight * DBSetLog.reps).label("volume"),
+                    func.count(DBSetLog.id).label("sets")
+                )
+                .join(Exercise, Exercise.id == DBSetLog.exercise_id)
+                .where(DBSetLog.user_id == user_id, Exercise.movement_id == movement_id)
+                .group_by(DBSetLog.week)
+                .order_by(DBSetLog.week)
+            ).all()
+            return True, {
+                "movement_id": movement_id,
+                "name": name,
+                "weeks": [{"week": r.week, "best_weight": r.best_weight, "volume": r.volume, "sets": r.sets} for r in rows]
+            }
+        except Exception as e:
+            return False, str(e)
+        finally:
+            db.close()
+
+    def _session_activity(self, s):
+        """Dashboard/history representation of a WorkoutSession (workout must be loaded)"""
+        workout_name = s.workout.name if s.workout else "Unknown"
+        if s.split:
+            workout_name += f" ({s.split})"
+            
+        return {
+            "date": s.start_time.isoformat(), 
+            "workout": workout_name,
+            "duration": int((s.end_time - s.start_time).total_seconds() / 60) if s.end_time and s.start_time else 0,
+            "volume": s.total_volume,
+            "pr_count": s.pr_count or 0,
+            "pr_details": s.pr_details if s.pr_count and s.pr_details else None
+        }
+
+    def _encode_session_cursor(self, session):
+        raw = json.dumps([session.start_time.isoformat(), session.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def _decode_session_cursor(self, cursor: str):
+        start_time, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(start_time), int(session_id)
+
+    def get_session_history(self, username: str, cursor: str = None, limit: int = 20):
+        """
+        Page through a user's sessions, newest first.
+        Keyset pagination on (start_time, id) so every page is an index range scan
+        on ix_workout_sessions_user_start_id, no matter how deep the cursor is.
+        """
+        db = self.get_db()
+        try:
+            user = self.ensure_user(db, username)
+            limit = max(1, min(limit, 100))
+            
+            query = db.query(WorkoutSession).options(joinedload(WorkoutSession.workout)).filter(
+                WorkoutSession.user_id == user.id,
+                WorkoutSession.start_time != None
+            )
+            
+            if cursor:
+                try:
+                    last_start, last_id = self._decode_session_cursor(cursor)
+                except (ValueError, TypeError):
+                    return False, "Invalid cursor"
+                query = query.filter(or_(
+                    WorkoutSession.start_time < last_start,
+                    and_(WorkoutSession.start_time == last_start, WorkoutSession.id < last_id)
+                ))
+            
+            # Fetch one extra row to know whether another page exists
+            rows = query.order_by(desc(WorkoutSession.start_time), desc(WorkoutSession.id)).limit(limit + 1).all()
+            page = rows[:limit]
+            
+            sessions = [
+                {**self._session_activity(s), "id": s.id, "notes": s.notes}
+                for s in page
+            ]
+            next_cursor = self._encode_session_cursor(page[-1]) if len(rows) > limit else None
             
+            return True, {"sessions": sessions, "next_cursor": next_cursor}
         except Exception as e:
             return False, str(e)
         finally:
@@ -1,8 +1,14 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from concurrent.futures import Future
+from contextlib import contextmanager
 from dotenv import load_dotenv
+import functools
 import os
+import queue
+import threading
+import time
 
 load_dotenv()
 
@@ -13,21 +19,307 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./gym_buddy.db")
 if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
     SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# Configure connection args
-connect_args = {}
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+# Optional read replica for GET handlers. Locally this can be a second SQLite file
+# (e.g. a periodic copy of gym_buddy.db) or a second Postgres instance.
+SQLALCHEMY_READ_URL = os.getenv("DATABASE_READ_URL")
+if SQLALCHEMY_READ_URL and SQLALCHEMY_READ_URL.startswith("postgres://"):
+    SQLALCHEMY_READ_URL = SQLALCHEMY_READ_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args=connect_args
-)
+# After a user writes, their reads stay on the primary for this long (read-your-writes)
+READ_STICKY_SECONDS = float(os.getenv("DATABASE_READ_STICKY_SECONDS", "5"))
+
+# Strict loading (SQL_STRICT_LOADING=1, for development and tests): relationships
+# are declared lazy="raise", so touching one that the query didn't eager-load
+# (selectinload/joinedload) raises instead of quietly issuing a SELECT per row.
+SQL_STRICT_LOADING = os.getenv("SQL_STRICT_LOADING", "0").lower() in ("1", "true", "yes")
+RELATIONSHIP_LAZY = "raise" if SQL_STRICT_LOADING else "select"
+
+# SQLite production profile (on by default, SQLITE_TUNING=0 to disable):
+# WAL so readers never block on the writer, NORMAL sync (fsync per checkpoint
+# instead of per commit - safe with WAL), a busy timeout instead of instant
+# "database is locked", plus a bigger page cache and mmap for reads.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1").lower() in ("1", "true", "yes")
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")), # negative = KiB
+    "temp_store": "MEMORY",
+}
+
+def _connect_args(url):
+    # Configure connection args
+    if "sqlite" in url:
+        return {"check_same_thread": False}
+    return {}
+
+def _make_engine(url):
+    new_engine = create_engine(url, connect_args=_connect_args(url))
+    if "sqlite" in url and SQLITE_TUNING:
+        @event.listens_for(new_engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+    return new_engine
+
+engine = _make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = engine
+if SQLALCHEMY_READ_URL:
+    read_engine = _make_engine(SQLALCHEMY_READ_URL)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+class RoutingSessionFactory:
+    """
+    Hands out sessions on the replica for reads and on the primary for writes.
+    A user who wrote within the last READ_STICKY_SECONDS reads from the primary,
+    so they never see their own write missing because of replication lag.
+    Writes with no user (e.g. editing global workouts) make everyone sticky.
+    """
+    def __init__(self, sticky_seconds: float = READ_STICKY_SECONDS):
+        self.sticky_seconds = sticky_seconds
+        self._last_write = {} # username (or "*") -> monotonic time of last write
+
+    @property
+    def has_replica(self):
+        return read_engine is not engine
+
+    def mark_write(self, username: str = None):
+        if not self.has_replica:
+            return
+        now = time.monotonic()
+        self._last_write[username or "*"] = now
+        if len(self._last_write) > 1000:
+            self._last_write = {k: t for k, t in self._last_write.items() if now - t < self.sticky_seconds}
+
+    def _is_sticky(self, username):
+        now = time.monotonic()
+        return any(
+            now - self._last_write.get(key, float("-inf")) < self.sticky_seconds
+            for key in (username, "*")
+        )
+
+    def writer(self):
+        return SessionLocal()
+
+    def reader(self, username: str = None):
+        if not self.has_replica or self._is_sticky(username):
+            return SessionLocal()
+        return ReadSessionLocal()
+
+    def is_replica(self, db) -> bool:
+        """Whether db reads from the replica (and may lag writes already committed)"""
+        return self.has_replica and db.get_bind() is read_engine
+
+session_router = RoutingSessionFactory()
+
+class SerializedWriter:
+    """
+    Single-writer queue: write calls are executed one at a time on a dedicated
+    thread, so concurrent requests never fight over SQLite's write lock, while
+    reads (WAL) keep running concurrently on their own threads.
+
+    A request's unit of work (RequestSession) keeps SQLite's write lock from its
+    first write until it commits, so once the writer has run a call for one, it
+    serves only that request's calls until its finish()/abort(): another write
+    would otherwise wait on the lock while the commit waits behind it.
+    """
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._owner = None # RequestSession the writer is serving, if any
+        self._owned = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_for(None, fn, *args, **kwargs)
+
+    def submit_for(self, owner, fn, *args, **kwargs):
+        """Run fn on the writer for owner (a RequestSession in a request, or None)"""
+        # A write method calling another write method is already on the writer
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        self._ensure_started()
+        future = Future()
+        target = self._owned if owner is not None and owner is self._owner else self._queue
+        target.put((owner, future, fn, args, kwargs))
+        return future.result()
+
+    def serves(self, owner) -> bool:
+        return owner is not None and owner is self._owner
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def _call(self, owner, future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            result, error = None, e
+        else:
+            error = None
+        # Switch before resolving the future: the owner's next call must see it
+        self._owner = owner if owner is not None and owner.in_request else None
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _run(self):
+        while True:
+            self._call(*self._queue.get())
+            while self._owner is not None:
+                self._call(*self._owned.get())
+
+# Only needed for SQLite; Postgres handles concurrent writers itself
+sqlite_writer = SerializedWriter() if "sqlite" in SQLALCHEMY_DATABASE_URL and SQLITE_TUNING else None
+
+class RequestSession(Session):
+    """
+    Unit of work for one HTTP request (see get_request_db). DataManager methods
+    handed this session share its connection and transaction: while the request
+    is running their commit() only flushes and their close() is a no-op. The
+    request commits once at the end and only then runs the after-commit hooks
+    (cache invalidation, read-your-writes stickiness, job wakeups).
+    A rollback discards everything the request wrote so far.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_request = False
+        self.transactions = 0
+        self.connections = set()
+        self._after_commit = []
+
+    def commit(self):
+        if self.in_request:
+            self.flush()
+        else:
+            super().commit()
+
+    def rollback(self):
+        self._after_commit.clear()
+        super().rollback()
+
+    def close(self):
+        if not self.in_request:
+            super().close()
+
+    def on_commit(self, fn, *args, **kwargs):
+        if self.in_request:
+            self._after_commit.append((fn, args, kwargs))
+        else:
+            fn(*args, **kwargs)
+
+    def finish(self):
+        self._on_writer(self._commit)
+        hooks, self._after_commit = self._after_commit, []
+        for fn, args, kwargs in hooks:
+            fn(*args, **kwargs)
+
+    def abort(self):
+        self._on_writer(self._rollback)
+
+    def _commit(self):
+        self.in_request = False
+        super().commit()
+
+    def _rollback(self):
+        self.in_request = False
+        self.rollback()
+
+    def _on_writer(self, fn):
+        # Writes went through the writer, which now waits for this commit/rollback
+        if sqlite_writer is not None and sqlite_writer.serves(self):
+            sqlite_writer.submit_for(self, fn)
+        else:
+            fn()
+
+@event.listens_for(RequestSession, "after_begin")
+def _count_request_transaction(session, transaction, connection):
+    if transaction.nested:
+        return # savepoints run inside the request's transaction
+    session.transactions += 1
+    session.connections.add(id(connection.connection.dbapi_connection))
+
+RequestSessionLocal = sessionmaker(class_=RequestSession, autocommit=False, autoflush=False, bind=engine)
+
+class RequestDBStats:
+    """Connections/transactions used per request, to prove the unit of work holds"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.max_connections = 0
+        self.max_transactions = 0
+        self.over_one = 0 # requests that used more than one connection or transaction
+
+    def record(self, session: RequestSession):
+        connections = len(session.connections)
+        with self._lock:
+            self.requests += 1
+            self.max_connections = max(self.max_connections, connections)
+            self.max_transactions = max(self.max_transactions, session.transactions)
+            if connections > 1 or session.transactions > 1:
+                self.over_one += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "max_connections": self.max_connections,
+                "max_transactions": self.max_transactions,
+                "over_one": self.over_one,
+            }
+
+request_db_stats = RequestDBStats()
+
+def serialized_write(fn):
+    """
+    Run a DataManager write method through the SQLite single-writer queue (no-op otherwise).
+    Calls inside a request's unit of work (db=RequestSession) keep the writer for
+    that request until it commits (see SerializedWriter).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if sqlite_writer is None:
+            return fn(*args, **kwargs)
+        db = kwargs.get("db")
+        owner = db if isinstance(db, RequestSession) and db.in_request else None
+        return sqlite_writer.submit_for(owner, fn, *args, **kwargs)
+    return wrapper
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+def get_db(session_factory=SessionLocal):
+    db = session_factory()
     try:
         yield db
     finally:
         db.close()
+
+def get_request_db():
+    """
+    FastAPI dependency: one session (one connection, one transaction) for the whole
+    request, committed when the handler returns. Declare it with
+    Depends(get_request_db, scope="function") so the commit happens before the
+    response is sent, and pass it on as db= to DataManager methods.
+    Sync, like the handlers using it: on SQLite the commit waits for the writer
+    thread, which must not block the event loop.
+    """
+    with contextmanager(get_db)(RequestSessionLocal) as db:
+        db.in_request = True
+        try:
+            yield db
+        except BaseException:
+            db.abort()
+            raise
+        else:
+            db.finish()
+        finally:
+            request_db_stats.record(db)
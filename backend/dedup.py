@@ -0,0 +1,226 @@
+"""
+Duplicate workout / exercise consolidation.
+
+build_merge_plan() loads every workout and exercise name once, clusters
+near-duplicates (normalized names first, then fuzzy similarity between the
+remaining clusters) and returns a reviewable plan. apply_merge_plan() re-points
+exercises, sets and workout_sessions with a handful of set-based statements
+driven by a temporary id-mapping table, all in one transaction, so the cost
+does not grow with the number of duplicate rows.
+
+Usage: see dedup_data.py (dry run by default).
+"""
+import re
+import unicodedata
+
+from sqlalchemy import text
+
+try:
+    from fuzzywuzzy import fuzz
+except ImportError:
+    fuzz = None
+
+# Words that don't distinguish one workout from another ("Jeff Pull Workout" == "Pull")
+WORKOUT_STOPWORDS = {"workout", "workouts", "day", "routine", "session", "my", "the"}
+
+# Block fuzzy comparisons to names sharing a token prefix of this length
+BLOCK_PREFIX = 3
+
+
+def normalize_name(name: str, stopwords=(), drop_tokens=()) -> str:
+    """Lowercase, strip emoji/punctuation/accents, collapse repeated letters ("Pulll" -> "pul")."""
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    name = re.sub(r"[^a-z0-9]+", " ", name.lower())
+    name = re.sub(r"([a-z])\1+", r"\1", name)
+    tokens = [t for t in name.split() if t not in stopwords]
+    # drop_tokens (owner usernames) are only noise next to something else
+    return " ".join([t for t in tokens if t not in drop_tokens] or tokens)
+
+
+def _distinguishers(key: str):
+    """Digits and one/two-letter tokens ("Push A" / "Push B", "Legs 1" / "Legs 2") must match exactly."""
+    return frozenset(t for t in key.split() if t.isdigit() or len(t) <= 2)
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def cluster_names(items, key_fn, fuzzy_threshold=90):
+    """
+    items: [(id, name, ...)]. Returns clusters (lists of items) with more than one member.
+    Exact normalized keys are grouped first; then distinct keys are compared with
+    fuzz.ratio, but only within blocks sharing a token prefix, so this stays close
+    to linear for thousands of names.
+    """
+    by_key = {}
+    for item in items:
+        by_key.setdefault(key_fn(item), []).append(item)
+
+    uf = _UnionFind()
+    keys = [k for k in by_key if k]
+    for k in keys:
+        uf.find(k)
+
+    if fuzzy_threshold and fuzz:
+        blocks = {}
+        for k in keys:
+            for token in set(k.split()):
+                blocks.setdefault(token[:BLOCK_PREFIX], set()).add(k)
+        compared = set()
+        for block in blocks.values():
+            block = sorted(block)
+            for i, a in enumerate(block):
+                for b in block[i + 1:]:
+                    if (a, b) in compared:
+                        continue
+                    compared.add((a, b))
+                    if _distinguishers(a) != _distinguishers(b):
+                        continue
+                    if fuzz.ratio(a, b) >= fuzzy_threshold:
+                        uf.union(a, b)
+
+    groups = {}
+    for k in keys:
+        groups.setdefault(uf.find(k), []).extend(by_key[k])
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def build_merge_plan(conn, fuzzy_threshold=90, preferred_workouts=()):
+    """
+    Dry run: returns {"workouts": [...], "exercises": [...]}, each entry
+    {"keep": {...}, "merge": [{...}, ...]}. Nothing is written.
+    Pass fuzzy_threshold=None to only merge names that normalize identically.
+    Workouts named in preferred_workouts (e.g. the defaults) always win their cluster.
+    """
+    usernames = {normalize_name(u) for (u,) in conn.execute(text("SELECT username FROM users"))}
+    admin_ids = {uid for (uid,) in conn.execute(text("SELECT id FROM users WHERE is_admin = 1"))}
+
+    workouts = conn.execute(text(
+        "SELECT w.id, w.name, w.created_by_user_id, COUNT(e.id) AS exercise_count "
+        "FROM workouts w LEFT JOIN exercises e ON e.workout_id = w.id AND e.deleted_at IS NULL "
+        "WHERE w.deleted_at IS NULL "
+        "GROUP BY w.id, w.name, w.created_by_user_id"
+    )).all()
+
+    workout_clusters = cluster_names(
+        workouts,
+        lambda w: normalize_name(w.name, WORKOUT_STOPWORDS, usernames),
+        fuzzy_threshold
+    )
+
+    plan = {"workouts": [], "exercises": []}
+    workout_target = {} # dup workout id -> kept workout id
+    for cluster in workout_clusters:
+        # Keep the preferred name, then the global/default one, then the one with most exercises, then the oldest
+        cluster.sort(key=lambda w: (
+            w.name not in preferred_workouts,
+            not (w.created_by_user_id is None or w.created_by_user_id in admin_ids),
+            -w.exercise_count,
+            w.id
+        ))
+        keep, dups = cluster[0], cluster[1:]
+        plan["workouts"].append({
+            "keep": {"id": keep.id, "name": keep.name},
+            "merge": [{"id": d.id, "name": d.name} for d in dups]
+        })
+        for d in dups:
+            workout_target[d.id] = keep.id
+
+    exercises = conn.execute(text(
+        "SELECT e.id, e.name, e.workout_id, e.split, e.user_id, COUNT(s.id) AS set_count "
+        "FROM exercises e LEFT JOIN sets s ON s.exercise_id = e.id AND s.deleted_at IS NULL "
+        "WHERE e.deleted_at IS NULL "
+        "GROUP BY e.id, e.name, e.workout_id, e.split, e.user_id"
+    )).all()
+
+    # Exercises are duplicates only within the same (post-merge) workout, split and
+    # owner: one user's exercise (and its sets) never moves into another user's
+    scopes = {}
+    for e in exercises:
+        scope = (workout_target.get(e.workout_id, e.workout_id), e.split or "A", e.user_id)
+        scopes.setdefault(scope, []).append(e)
+
+    for (workout_id, split, user_id), scoped in scopes.items():
+        for cluster in cluster_names(scoped, lambda e: normalize_name(e.name), fuzzy_threshold):
+            cluster.sort(key=lambda e: (-e.set_count, e.id))
+            keep, dups = cluster[0], cluster[1:]
+            plan["exercises"].append({
+                "keep": {"id": keep.id, "name": keep.name, "workout_id": workout_id, "split": split, "user_id": user_id},
+                "merge": [{"id": d.id, "name": d.name, "sets": d.set_count} for d in dups]
+            })
+    return plan
+
+
+def _load_map(conn, table, pairs):
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    conn.execute(text(f"CREATE TEMPORARY TABLE {table} (dup_id INTEGER PRIMARY KEY, keep_id INTEGER NOT NULL)"))
+    if pairs:
+        conn.execute(
+            text(f"INSERT INTO {table} (dup_id, keep_id) VALUES (:dup_id, :keep_id)"),
+            [{"dup_id": d, "keep_id": k} for d, k in pairs]
+        )
+
+
+def apply_merge_plan(conn, plan):
+    """
+    Apply a plan from build_merge_plan inside the caller's transaction.
+    Every step is one statement over all clusters (driven by temp mapping tables).
+    """
+    workout_pairs = [(d["id"], c["keep"]["id"]) for c in plan["workouts"] for d in c["merge"]]
+    exercise_pairs = [(d["id"], c["keep"]["id"]) for c in plan["exercises"] for d in c["merge"]]
+
+    _load_map(conn, "dedup_workout_map", workout_pairs)
+    _load_map(conn, "dedup_exercise_map", exercise_pairs)
+
+    # 1. Workouts: move exercises and sessions, then drop the duplicates
+    for table in ("exercises", "workout_sessions"):
+        conn.execute(text(
+            f"UPDATE {table} SET workout_id = "
+            f"(SELECT keep_id FROM dedup_workout_map m WHERE m.dup_id = {table}.workout_id) "
+            f"WHERE workout_id IN (SELECT dup_id FROM dedup_workout_map)"
+        ))
+    conn.execute(text("DELETE FROM workouts WHERE id IN (SELECT dup_id FROM dedup_workout_map)"))
+
+    # 2. Exercises: move sets, keep setup notes if the kept row has none, drop the duplicates
+    conn.execute(text(
+        "UPDATE sets SET exercise_id = "
+        "(SELECT keep_id FROM dedup_exercise_map m WHERE m.dup_id = sets.exercise_id) "
+        "WHERE exercise_id IN (SELECT dup_id FROM dedup_exercise_map)"
+    ))
+    conn.execute(text(
+        "UPDATE exercises SET setup_notes = "
+        "(SELECT MAX(d.setup_notes) FROM exercises d JOIN dedup_exercise_map m ON m.dup_id = d.id "
+        " WHERE m.keep_id = exercises.id) "
+        "WHERE setup_notes IS NULL AND id IN (SELECT keep_id FROM dedup_exercise_map)"
+    ))
+    # Targets of the duplicates are recomputed for the kept exercise by the next plan_targets run
+    conn.execute(text("DELETE FROM planned_sets WHERE exercise_id IN (SELECT dup_id FROM dedup_exercise_map)"))
+    conn.execute(text("DELETE FROM exercises WHERE id IN (SELECT dup_id FROM dedup_exercise_map)"))
+
+    # 3. Merged histories can collide on set_number within a week: renumber the live sets by log order
+    if exercise_pairs:
+        conn.execute(text(
+            "UPDATE sets SET set_number = ("
+            " SELECT r.rn FROM ("
+            "  SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id, exercise_id, week ORDER BY timestamp, id) AS rn"
+            "  FROM sets WHERE exercise_id IN (SELECT keep_id FROM dedup_exercise_map) AND deleted_at IS NULL"
+            " ) r WHERE r.id = sets.id"
+            ") WHERE exercise_id IN (SELECT keep_id FROM dedup_exercise_map) AND deleted_at IS NULL"
+        ))
+
+    conn.execute(text("DROP TABLE IF EXISTS dedup_workout_map"))
+    conn.execute(text("DROP TABLE IF EXISTS dedup_exercise_map"))
+    return {"workouts_merged": len(workout_pairs), "exercises_merged": len(exercise_pairs)}
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+from fastapi import Request, Response
+
+# Shared (CDN) caching of global catalog responses. Browsers always revalidate
+# (max-age=0, a cheap 304 through the ETag); the CDN serves its copy for
+# s-maxage seconds and after that keeps serving it for stale-while-revalidate
+# seconds while it refetches in the background.
+CDN_S_MAXAGE = int(os.getenv("CDN_S_MAXAGE", "300"))
+CDN_STALE_WHILE_REVALIDATE = int(os.getenv("CDN_STALE_WHILE_REVALIDATE", "86400"))
+# The catalog version is what tells clients (and so the CDN) about admin edits
+CDN_VERSION_S_MAXAGE = int(os.getenv("CDN_VERSION_S_MAXAGE", "10"))
+
+CATALOG_CACHE_CONTROL = f"public, max-age=0, s-maxage={CDN_S_MAXAGE}, stale-while-revalidate={CDN_STALE_WHILE_REVALIDATE}"
+VERSION_CACHE_CONTROL = f"public, max-age=0, s-maxage={CDN_VERSION_S_MAXAGE}, stale-while-revalidate=60"
+# /api/catalog?v=<current version>: what that URL returns never changes
+VERSIONED_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Default for everything else: per-user data, never kept by shared caches
+USER_CACHE_CONTROL = "private, no-cache"
+
+
+def payload_etag(payload) -> str:
+    """Short content hash of a JSON-able payload"""
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def cached(request: Request, response: Response, etag: str, cache_control: str = CATALOG_CACHE_CONTROL):
+    """
+    Set the shared-cache headers on response. Returns a 304 Response to send
+    instead of the body if the client (or the CDN revalidating) already has etag.
+    """
+    quoted = f'"{etag}"'
+    headers = {"ETag": quoted, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if quoted in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+class DefaultCacheControl:
+    """
+    ASGI middleware: GET /api/ responses that didn't choose their own caching get
+    USER_CACHE_CONTROL, so a CDN or proxy never stores one user's data. The user is
+    a query parameter, so it is already part of every cache key; Vary: Origin
+    comes from the CORS middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith("/api/"):
+            return await self.app(scope, receive, send)
+
+        async def send_with_default(message):
+            if message["type"] == "http.response.start":
+                headers = message.setdefault("headers", [])
+                if not any(name.lower() == b"cache-control" for name, _ in headers):
+                    headers.append((b"cache-control", USER_CACHE_CONTROL.encode()))
+            await send(message)
+
+        await self.app(scope, receive, send_with_default)
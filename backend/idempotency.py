@@ -0,0 +1,124 @@
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from .database import SessionLocal, serialized_write
+from .models_db import IdempotencyKey
+
+# How long a stored response is replayed for. Client retries happen within
+# seconds, so a day is plenty and keeps the table small.
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+# Expired rows are purged at most this often (per process)
+PURGE_INTERVAL = timedelta(minutes=10)
+
+# response of a reserved key whose request hasn't finished yet
+PENDING = ""
+
+
+class IdempotencyConflict(Exception):
+    """The same Idempotency-Key is still being processed by another request (HTTP 409)"""
+
+
+class IdempotencyStore:
+    """
+    Records the response of a write endpoint under the client's Idempotency-Key
+    so a retried request gets the original result back instead of running the
+    DataManager logic (and creating another set/session) a second time.
+    Keys are scoped per user and endpoint.
+
+    The key is reserved (a row with a PENDING response) before the endpoint logic
+    runs, so of two concurrent attempts only one gets to run it: the other hits
+    the unique constraint and replays the stored response, or gets
+    IdempotencyConflict while the first is still in flight.
+    """
+
+    def __init__(self, ttl: timedelta = IDEMPOTENCY_TTL):
+        self.ttl = ttl
+        self._last_purge = None
+
+    def _filter(self, db, key: str, username: str, endpoint: str):
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.username == username,
+            IdempotencyKey.endpoint == endpoint
+        )
+
+    @serialized_write
+    def reserve(self, key: str | None, username: str, endpoint: str, db=None):
+        """
+        Claim key before running the endpoint. Returns None when the caller should
+        run it, or the stored response dict to replay. Raises IdempotencyConflict
+        when another attempt holds the key and hasn't stored its response yet.
+        db: the request's unit of work, if any (the claim then commits with the write).
+        """
+        if not key:
+            return None
+        db = db if db is not None else SessionLocal()
+        try:
+            try:
+                # Savepoint: losing the race must not roll back the request's own work
+                with db.begin_nested():
+                    self._purge_expired(db)
+                    # An expired key may be reused
+                    self._filter(db, key, username, endpoint).filter(
+                        IdempotencyKey.created_at < datetime.utcnow() - self.ttl
+                    ).delete(synchronize_session=False)
+                    db.add(IdempotencyKey(key=key, username=username, endpoint=endpoint, response=PENDING))
+                db.commit()
+                return None
+            except IntegrityError:
+                pass
+            row = self._filter(db, key, username, endpoint).first()
+            if row is None or row.response == PENDING:
+                raise IdempotencyConflict(f"A request with Idempotency-Key {key} is already in progress")
+            return json.loads(row.response)
+        finally:
+            db.close()
+
+    @serialized_write
+    def save(self, key: str | None, username: str, endpoint: str, response: dict, db=None):
+        """Store the response for a key claimed with reserve(). Only successful responses
+        should be saved; call release() after a failure so it can be retried.
+        With the request's unit of work as db, the response commits together with
+        the write it describes."""
+        if not key:
+            return
+        db = db if db is not None else SessionLocal()
+        try:
+            self._filter(db, key, username, endpoint).update(
+                {IdempotencyKey.response: json.dumps(response, default=str)}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Idempotency store warning (non-fatal): {e}")
+        finally:
+            db.close()
+
+    @serialized_write
+    def release(self, key: str | None, username: str, endpoint: str, db=None):
+        """Drop a reservation whose attempt failed, so a retry with the same key runs again."""
+        if not key:
+            return
+        db = db if db is not None else SessionLocal()
+        try:
+            self._filter(db, key, username, endpoint).filter(
+                IdempotencyKey.response == PENDING
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Idempotency store warning (non-fatal): {e}")
+        finally:
+            db.close()
+
+    def _purge_expired(self, db):
+        now = datetime.utcnow()
+        if self._last_purge and now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < now - self.ttl
+        ).delete(synchronize_session=False)
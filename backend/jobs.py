@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+from .database import SessionLocal, serialized_write
+from .models_db import Job
+
+
+class JobQueue:
+    """
+    Durable in-process background jobs.
+
+    Jobs are rows in the jobs table, enqueued in the same transaction as the
+    write that needs them (so they can't get lost or run for a rolled back write).
+    Two things run a job, whichever gets there first - a job is claimed with a
+    conditional UPDATE, so it runs once:
+      - FastAPI BackgroundTasks, right after the response is sent (fast path)
+      - the worker thread (JOB_WORKER=1, default), which also picks up jobs left
+        behind by crashes/restarts and retries failed ones with backoff
+
+    A job that has been "running" longer than the lease is assumed dead and re-run.
+    Without the worker (JOB_WORKER=0, e.g. serverless, where background threads
+    don't survive) nothing else would pick up a retry or a dead job, so
+    GET /api/jobs/{id} runs a runnable job it is polled for itself (see run_due).
+    """
+
+    def __init__(self, poll_seconds: float = 2.0, lease_seconds: int = 300, max_attempts: int = 3, worker: bool = True):
+        self.poll_seconds = poll_seconds
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.worker = worker
+        self.handlers = {} # kind -> fn(payload dict) -> result dict
+        self.intervals = {} # kind -> timedelta, for recurring jobs
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            poll_seconds=float(os.getenv("JOB_POLL_SECONDS", "2")),
+            lease_seconds=int(os.getenv("JOB_LEASE_SECONDS", "300")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+            worker=os.getenv("JOB_WORKER", "1").lower() in ("1", "true", "yes"),
+        )
+
+    def register(self, kind: str, handler, every: timedelta = None):
+        """
+        every makes the kind recurring: claiming a job queues the next run `every`
+        later in the same transaction, so the chain survives a failed or killed run.
+        """
+        self.handlers[kind] = handler
+        if every:
+            self.intervals[kind] = every
+
+    def enqueue(self, db, kind: str, payload: dict, owner: str = None, run_after: datetime = None, coalesce: bool = False) -> int:
+        """
+        Add a job inside db's transaction; it becomes visible when the caller commits.
+        run_after delays it. coalesce=True is for sweeps that cover everything due by
+        the time they run: a pending job of the same kind and payload that runs at or
+        after run_after already does this one's work, so it is returned instead.
+        """
+        run_after = run_after or datetime.utcnow()
+        payload = json.dumps(payload, sort_keys=True)
+        if coalesce:
+            existing = db.execute(
+                select(Job.id).where(
+                    Job.kind == kind, Job.payload == payload, Job.status == "pending", Job.run_after >= run_after
+                ).limit(1)
+            ).scalar()
+            if existing:
+                return existing
+        job = Job(kind=kind, owner=owner, payload=payload, run_after=run_after)
+        db.add(job)
+        db.flush()
+        return job.id
+
+    def wake(self):
+        self._wakeup.set()
+
+    # --- Running -----------------------------------------------------------
+
+    @serialized_write
+    def _claim(self, job_id: int = None):
+        """Atomically mark one runnable job as running. Returns (id, kind, payload) or None."""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            runnable = or_(
+                and_(Job.status == "pending", Job.run_after <= now),
+                and_(Job.status == "running", Job.started_at < now - self.lease)
+            )
+            query = select(Job.id, Job.kind, Job.payload, Job.attempts).where(runnable)
+            query = query.where(Job.id == job_id) if job_id else query.order_by(Job.run_after, Job.id).limit(1)
+            row = db.execute(query).first()
+            if not row:
+                return None
+            claimed = db.execute(
+                update(Job).where(Job.id == row.id, runnable)
+                .values(status="running", started_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            if claimed and row.attempts == 0 and row.kind in self.intervals:
+                # Retries and lease takeovers of this run don't queue another one
+                self.enqueue(db, row.kind, json.loads(row.payload), run_after=now + self.intervals[row.kind], coalesce=True)
+            db.commit()
+            return row if claimed else None
+        finally:
+            db.close()
+
+    @serialized_write
+    def _finish(self, job_id: int, result=None, error: str = None):
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            now = datetime.utcnow()
+            if error is None:
+                job.status, job.result, job.error = "done", json.dumps(result, default=str), None
+            elif job.attempts < self.max_attempts:
+                # Retry with exponential backoff
+                job.status, job.error = "pending", error
+                job.run_after = now + timedelta(seconds=5 * 2 ** (job.attempts - 1))
+            else:
+                job.status, job.error = "failed", error
+            job.finished_at = now
+            db.commit()
+        finally:
+            db.close()
+
+    def run(self, job_id: int = None) -> bool:
+        """Claim and run one job (a specific one, or the next runnable). False if nothing was run."""
+        claimed = self._claim(job_id)
+        if not claimed:
+            return False
+        handler = self.handlers.get(claimed.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{claimed.kind}'")
+            result = handler(json.loads(claimed.payload))
+        except Exception as e:
+            print(f"Job {claimed.id} ({claimed.kind}) failed: {e}")
+            traceback.print_exc()
+            self._finish(claimed.id, error=str(e))
+        else:
+            self._finish(claimed.id, result=result)
+        return True
+
+    def run_due(self, job_id: int) -> bool:
+        """
+        Run job_id if it is runnable (due, or its lease expired) and no worker
+        thread would. For pollers; blocks for the job's duration, so call it
+        from a threadpool, not the event loop.
+        """
+        return not self.worker and self.run(job_id)
+
+    def get(self, job_id: int):
+        """Job status/result as a dict, or None"""
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            if not job:
+                return None
+            return {
+                "id": job.id,
+                "kind": job.kind,
+                "owner": job.owner,
+                "status": job.status,
+                "result": json.loads(job.result) if job.result else None,
+                "error": job.error,
+                "attempts": job.attempts,
+            }
+        finally:
+            db.close()
+
+    # --- Worker thread -----------------------------------------------------
+
+    def start(self):
+        if not self.worker or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="job-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                while not self._stopped.is_set() and self.run():
+                    pass
+            except Exception as e:
+                # Keep the worker alive (e.g. the jobs table doesn't exist yet)
+                print(f"Job worker error: {e}")
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
@@ -1,29 +1,51 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, BackgroundTasks, Depends, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from .models import (
-    LogRequest, LogResponse, WorkoutData, UserLogRequest, 
-    UpdateSetRequest, DeleteSetRequest, GenericResponse,
+    LogRequest, LogResponse, WorkoutData, WorkoutWeeksData, UserLogRequest, 
+    UpdateSetRequest, UpdateSetResponse, DeleteSetRequest, RestoreRequest, GenericResponse,
     UserListResponse, CreateWorkoutRequest, AddExerciseRequest,
     UserListResponse, CreateWorkoutRequest, AddExerciseRequest,
     WorkoutListResponse, StartSessionResponse, StartSessionRequest,
     EndSessionResponse, EndSessionRequest, DashboardStatsResponse,
-    UpdateExerciseNotesRequest
+    UpdateExerciseNotesRequest, SessionHistoryResponse, ExerciseSearchResponse,
+    NoteSearchResponse, MovementListResponse, MovementProgressResponse, JobResponse,
+    CatalogResponse, CatalogVersionResponse, PlanResponse
 )
 from .data_manager import DataManager
 from .nlp import NLPProcessor
-from .database import Base, engine
+from .idempotency import IdempotencyStore, IdempotencyConflict
+from .database import engine, get_request_db, request_db_stats
+from .schema import migrate
+from .search import rebuild_notes_index
+from .dedup import build_merge_plan, apply_merge_plan
+from .movements import link_movements
+from .singleflight import request_coalescer
+from .http_cache import (
+    cached, payload_etag, DefaultCacheControl,
+    CATALOG_CACHE_CONTROL, VERSION_CACHE_CONTROL, VERSIONED_CACHE_CONTROL
+)
 
-from sqlalchemy import text, inspect as sa_inspect
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 app = FastAPI()
 
+DEFAULT_WORKOUTS = ("Push", "Pull", "Legs")
+
 # Create database tables on startup
 @app.on_event("startup")
 async def startup_event():
     """Initialize database tables and run migrations."""
-    # Create any missing tables
-    Base.metadata.create_all(bind=engine)
+    # New database: create + stamp head; existing one: alembic upgrade head
+    migrate(engine)
+    data_manager.jobs.start()
+    # Weekly progressive-overload targets (planned_sets)
+    try:
+        data_manager.schedule_plans()
+    except Exception as e:
+        print(f"Plan scheduling warning (non-fatal): {e}")
     
     # Run column migrations for existing tables
     # _run_migrations()
@@ -32,149 +54,71 @@ async def startup_event():
     # _fix_production_data()
     pass
 
-def _fix_production_data():
-    """Merge specific custom workouts into global defaults and ensure defaults exist."""
+@app.on_event("shutdown")
+def shutdown_event():
+    # Don't leave write-behind sets only in the journal
+    if data_manager.write_buffer:
+        data_manager.write_buffer.close()
+    data_manager.jobs.stop()
+
+def _fix_production_data(apply_merge: bool = False):
+    """
+    Ensure default workouts exist and plan merging duplicate workouts/exercises into them.
+    The merge is only applied with apply_merge; the plan is returned either way.
+    """
+    plan = None
     try:
-        with engine.connect() as conn:
-            # --- 1. Fix PULL Workout (Revert emoji rename if exists) ---
-            
-            # Check if "Pull" exists
-            result = conn.execute(text("SELECT id FROM workouts WHERE name = 'Pull'"))
-            pull_id = result.scalar()
-            
-            # Check if "Pull 🧗" exists (from previous migration)
-            result = conn.execute(text("SELECT id FROM workouts WHERE name = 'Pull 🧗'"))
-            emoji_pull_id = result.scalar()
-            
-            target_pull_id = None
-            
-            if pull_id and emoji_pull_id:
-                # Both exist? Merge emoji one into normal one
-                print("Merging 'Pull 🧗' into 'Pull'...")
-                conn.execute(text("UPDATE exercises SET workout_id = :tid WHERE workout_id = :did"), {"tid": pull_id, "did": emoji_pull_id})
-                conn.execute(text("UPDATE workout_sessions SET workout_id = :tid WHERE workout_id = :did"), {"tid": pull_id, "did": emoji_pull_id})
-                conn.execute(text("DELETE FROM workouts WHERE id = :did"), {"did": emoji_pull_id})
-                target_pull_id = pull_id
-            elif emoji_pull_id and not pull_id:
-                # Only emoji exists -> Rename it back to "Pull"
-                conn.execute(text("UPDATE workouts SET name = 'Pull' WHERE id = :id"), {"id": emoji_pull_id})
-                target_pull_id = emoji_pull_id
-                print("✓ Renamed 'Pull 🧗' back to 'Pull'")
-            elif pull_id:
-                target_pull_id = pull_id
+        with engine.begin() as conn:
+            admin_id = conn.execute(text("SELECT id FROM users WHERE is_admin=1")).scalar() or 1 # Fallback to 1
+            for name in DEFAULT_WORKOUTS:
+                if not conn.execute(text("SELECT id FROM workouts WHERE name = :name"), {"name": name}).scalar():
+                    conn.execute(text("INSERT INTO workouts (name, created_by_user_id) VALUES (:name, :uid)"), {"name": name, "uid": admin_id})
+                    print(f"✓ Created '{name}' workout")
+
+            # Merge variants like "Pull 🧗", "Pulll", "Jeff Pull Workout" into the defaults.
+            # Only names that normalize identically are merged here; review fuzzy
+            # matches with dedup_data.py before applying them.
+            plan = build_merge_plan(conn, fuzzy_threshold=None, preferred_workouts=DEFAULT_WORKOUTS)
+            if apply_merge:
+                result = apply_merge_plan(conn, plan)
             else:
-                # Neither exists -> Create "Pull"
-                admin_res = conn.execute(text("SELECT id FROM users WHERE is_admin=1"))
-                admin_id = admin_res.scalar() or 1 # Fallback to 1
-                conn.execute(text("INSERT INTO workouts (name, created_by_user_id) VALUES ('Pull', :uid)"), {"uid": admin_id})
-                target_pull_id = conn.execute(text("SELECT id FROM workouts WHERE name = 'Pull'")).scalar()
-                print("✓ Created 'Pull' workout")
-
-            # --- 2. Merge Custom Pull Workouts ---
-            # Merge variants like "Pulll", "Jeff Pull Workout", etc. into the main "Pull"
-            patterns = [
-                'Jeff Pull%', 
-                'Sarath Pull%', 
-                'Pulll%',          # Catch "Pulll" typo
-                '%Pull%Workout%'   # Catch generic "Pull Workout" naming
-            ]
-            
-            for pattern in patterns:
-                rows = conn.execute(text("SELECT id, name FROM workouts WHERE name ILIKE :p AND id != :tid"), 
-                                  {"p": pattern, "tid": target_pull_id}).fetchall()
-                for row in rows:
-                    dup_id = row[0]
-                    dup_name = row[1]
-                    
-                    # Double check we don't merge "Push" or legitimate other things if pattern is too loose
-                    # But patterns above seem safe enough for now
-                    if dup_name == 'Pull': continue 
-                    
-                    print(f"Merging '{dup_name}' into 'Pull'...")
-                    conn.execute(text("UPDATE exercises SET workout_id = :tid WHERE workout_id = :did"), {"tid": target_pull_id, "did": dup_id})
-                    conn.execute(text("UPDATE workout_sessions SET workout_id = :tid WHERE workout_id = :did"), {"tid": target_pull_id, "did": dup_id})
-                    conn.execute(text("DELETE FROM workouts WHERE id = :did"), {"did": dup_id})
-
-            # --- 3. Ensure LEGS Workout Exists ---
-            result = conn.execute(text("SELECT id FROM workouts WHERE name = 'Legs'"))
-            legs_id = result.scalar()
-            
-            if not legs_id:
-                admin_res = conn.execute(text("SELECT id FROM users WHERE is_admin=1"))
-                admin_id = admin_res.scalar() or 1
-                conn.execute(text("INSERT INTO workouts (name, created_by_user_id) VALUES ('Legs', :uid)"), {"uid": admin_id})
-                print("✓ Created 'Legs' workout")
-            
-            conn.commit()
-            print("✓ Production data fix complete")
+                result = {"dry_run": True, "workout_clusters": len(plan["workouts"]), "exercise_clusters": len(plan["exercises"])}
+
+        print(f"✓ Production data fix complete: {result}")
             
     except Exception as e:
         print(f"Data fix warning (non-fatal): {e}")
+    return plan
 
 @app.get("/api/run-migrations")
-async def trigger_migrations():
-    """Manually trigger migrations and data fixes. Call this after deployment."""
+def trigger_migrations(apply_merge: bool = False):
+    """
+    Manually trigger migrations and data fixes. Call this after deployment.
+    Duplicate merging is a dry run that returns the plan; re-run with
+    ?apply_merge=true once it has been reviewed.
+    """
     _run_migrations()
-    _fix_production_data()
-    return {"status": "ok", "message": "Migrations and data fixes complete"}
+    plan = _fix_production_data(apply_merge)
+    # Data fixes rename/merge workouts behind DataManager's back
+    with engine.begin() as conn:
+        rebuild_notes_index(conn)
+    data_manager.invalidate_all()
+    message = "Migrations and data fixes complete" if apply_merge else "Migrations complete; duplicate merge not applied (dry run)"
+    return {"status": "ok", "message": message, "merge_plan": plan}
 
 def _run_migrations():
-    """Add missing columns to existing tables (idempotent)."""
+    """Run the pending Alembic revisions (idempotent), then link new exercises to movements."""
     try:
-        inspector = sa_inspect(engine)
-        
-        def col_exists(table, column):
-            try:
-                return column in [c['name'] for c in inspector.get_columns(table)]
-            except Exception:
-                return False
-        
-        with engine.connect() as conn:
-            # users table
-            if not col_exists("users", "is_admin"):
-                conn.execute(text("ALTER TABLE users ADD COLUMN is_admin INTEGER DEFAULT 0"))
-                conn.commit()
-            if not col_exists("users", "created_at"):
-                conn.execute(text("ALTER TABLE users ADD COLUMN created_at TIMESTAMP DEFAULT NOW()"))
-                conn.commit()
-            
-            # workouts table
-            if not col_exists("workouts", "created_by_user_id"):
-                conn.execute(text("ALTER TABLE workouts ADD COLUMN created_by_user_id INTEGER REFERENCES users(id)"))
-                conn.commit()
-            
-            # exercises table
-            if not col_exists("exercises", "user_id"):
-                conn.execute(text("ALTER TABLE exercises ADD COLUMN user_id INTEGER REFERENCES users(id)"))
-                conn.commit()
-            if not col_exists("exercises", "split"):
-                conn.execute(text("ALTER TABLE exercises ADD COLUMN split VARCHAR DEFAULT 'A'"))
-                conn.commit()
-            if not col_exists("exercises", "setup_notes"):
-                conn.execute(text("ALTER TABLE exercises ADD COLUMN setup_notes TEXT"))
-                conn.commit()
-            
-            # sets table
-            if not col_exists("sets", "timestamp"):
-                conn.execute(text("ALTER TABLE sets ADD COLUMN timestamp TIMESTAMP DEFAULT NOW()"))
-                conn.commit()
-            
-            # workout_sessions table columns
-            if "workout_sessions" in inspector.get_table_names():
-                if not col_exists("workout_sessions", "split"):
-                    conn.execute(text("ALTER TABLE workout_sessions ADD COLUMN split VARCHAR DEFAULT 'A'"))
-                    conn.commit()
-                if not col_exists("workout_sessions", "pr_count"):
-                    conn.execute(text("ALTER TABLE workout_sessions ADD COLUMN pr_count INTEGER DEFAULT 0"))
-                    conn.commit()
-                if not col_exists("workout_sessions", "pr_details"):
-                    conn.execute(text("ALTER TABLE workout_sessions ADD COLUMN pr_details TEXT"))
-                    conn.commit()
-        
-        print("✓ Database migrations complete")
+        revision = migrate(engine)
+        with engine.begin() as conn:
+            linked = link_movements(conn)
+        if linked:
+            print(f"✓ Linked {linked} exercises to movements")
+        print(f"✓ Database migrations complete (from revision {revision})")
     except Exception as e:
         print(f"Migration warning (non-fatal): {e}")
 
+app.add_middleware(DefaultCacheControl)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -185,6 +129,17 @@ app.add_middleware(
 
 data_manager = DataManager()
 nlp_processor = NLPProcessor()
+idempotency_store = IdempotencyStore()
+
+@app.exception_handler(IdempotencyConflict)
+async def idempotency_conflict(request: Request, exc: IdempotencyConflict):
+    # The first attempt is still running: the client retries later and gets its result
+    return JSONResponse(status_code=409, content={"success": False, "message": str(exc)})
+
+# One connection + one transaction per request, committed before the response is sent.
+# Handlers taking it are plain def: they run on the threadpool, where waiting for
+# the SQLite writer thread doesn't block the event loop.
+RequestDB = Depends(get_request_db, scope="function")
 
 class ParseRequest(BaseModel):
     text: str
@@ -200,73 +155,183 @@ class ParseResponse(BaseModel):
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters of the read cache (this worker's view)"""
+    if not data_manager.cache:
+        return {"enabled": False}
+    return {"enabled": True, **data_manager.cache.stats()}
+
+@app.get("/api/coalescing/stats")
+async def coalescing_stats():
+    """How many identical concurrent reads shared one computation (this worker's view)"""
+    return request_coalescer.stats()
+
+@app.get("/api/db/request-stats")
+async def db_request_stats():
+    """Connections/transactions per unit-of-work request (this worker's view); over_one should stay 0"""
+    return request_db_stats.stats()
+
 @app.get("/api/users", response_model=UserListResponse)
 async def get_users():
     users = data_manager.get_users()
     return UserListResponse(users=users)
 
 @app.get("/api/workouts", response_model=WorkoutListResponse)
-async def get_workouts(user: str = None):
+async def get_workouts(request: Request, response: Response, user: str = None):
     workouts = data_manager.get_workouts(user)
+    if not user:
+        # The unfiltered list is the same for everyone: let the CDN serve it
+        not_modified = cached(request, response, payload_etag(workouts))
+        if not_modified:
+            return not_modified
     return WorkoutListResponse(workouts=workouts)
 
+@app.get("/api/catalog", response_model=CatalogResponse)
+async def get_catalog(request: Request, response: Response, v: str = None):
+    """
+    Global workouts and their default exercises. Fetch /api/catalog/version first and
+    request ?v=<version>: that URL is cached for good, and an admin edit bumps the version.
+    """
+    version, workouts = data_manager.get_catalog()
+    # A stale ?v= still gets the current catalog, just not cached for good under that URL
+    cache_control = VERSIONED_CACHE_CONTROL if v == version else CATALOG_CACHE_CONTROL
+    not_modified = cached(request, response, version, cache_control)
+    if not_modified:
+        return not_modified
+    return CatalogResponse(version=version, workouts=workouts)
+
+@app.get("/api/catalog/version", response_model=CatalogVersionResponse)
+async def get_catalog_version(request: Request, response: Response):
+    version, _ = data_manager.get_catalog()
+    not_modified = cached(request, response, version, VERSION_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    return CatalogVersionResponse(version=version)
+
+@app.get("/api/exercises/search", response_model=ExerciseSearchResponse)
+async def search_exercises(request: Request, response: Response, q: str, limit: int = 10):
+    success, results = data_manager.search_exercises(q, limit)
+    if not success:
+        return ExerciseSearchResponse(success=False, message=str(results))
+    # Searches the whole catalog, not per user
+    not_modified = cached(request, response, payload_etag(results))
+    if not_modified:
+        return not_modified
+    return ExerciseSearchResponse(success=True, results=results)
+
+@app.get("/api/notes/search", response_model=NoteSearchResponse)
+async def search_notes(user: str, q: str, limit: int = 20, offset: int = 0):
+    success, data = data_manager.search_notes(user, q, limit, offset)
+    if not success:
+        return NoteSearchResponse(success=False, message=str(data))
+    return NoteSearchResponse(success=True, **data)
+
 @app.delete("/api/user/{username}", response_model=GenericResponse)
-async def delete_user(username: str):
-    success, message = data_manager.delete_user(username)
+def delete_user(username: str, db: Session = RequestDB):
+    success, message = data_manager.delete_user(username, db=db)
     if not success:
         return GenericResponse(success=False, message=message)
     return GenericResponse(success=True, message=message)
 
 @app.get("/api/workout/{workout_type}")
 async def get_workout(workout_type: str, user: str, week: int = 1, split: str = "A"):
-    exercises = data_manager.get_workout_data(workout_type, week, user, split)
+    exercises = await request_coalescer.do(
+        ("workout", workout_type, user, week, split), user,
+        data_manager.get_workout_data, workout_type, week, user, split
+    )
     return WorkoutData(
         workout_type=workout_type,
         exercises=exercises,
         active_week=week
     )
 
+# Longest range one request may load (a training block is usually 4-12 weeks)
+MAX_WEEK_RANGE = 52
+
+@app.get("/api/workout/{workout_type}/weeks", response_model=WorkoutWeeksData)
+async def get_workout_weeks(workout_type: str, user: str, weeks: str, split: str = "A"):
+    """weeks=start..end (e.g. 1..8): every week of the block in one round trip"""
+    try:
+        start_text, _, end_text = weeks.partition("..")
+        start_week, end_week = int(start_text), int(end_text or start_text)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="weeks must look like start..end, e.g. 1..8")
+    if start_week < 1 or end_week < start_week or end_week - start_week >= MAX_WEEK_RANGE:
+        raise HTTPException(status_code=400, detail=f"weeks must be an ascending range of at most {MAX_WEEK_RANGE} weeks")
+    
+    exercises = data_manager.get_workout_weeks(workout_type, start_week, end_week, user, split)
+    return WorkoutWeeksData(
+        workout_type=workout_type,
+        start_week=start_week,
+        end_week=end_week,
+        exercises=exercises
+    )
+
 @app.post("/api/log", response_model=LogResponse)
-async def log_set(request: UserLogRequest):
+def log_set(request: UserLogRequest, idempotency_key: str | None = Header(None), db: Session = RequestDB):
+    # A retried request with the same Idempotency-Key replays the original result
+    replay = idempotency_store.reserve(idempotency_key, request.user, "log", db=db)
+    if replay:
+        return LogResponse(**replay)
+
     success, message = data_manager.log_set(
         request.workout_type,
         request.exercise_name,
         request.weight,
         request.reps,
         request.week,
-        request.user
+        request.user,
+        db=db
     )
     
     if not success:
+        idempotency_store.release(idempotency_key, request.user, "log", db=db)
         return LogResponse(success=False, message=message)
         
-    return LogResponse(
+    response = LogResponse(
         success=True, 
         message=message
     )
+    idempotency_store.save(idempotency_key, request.user, "log", response.model_dump(), db=db)
+    return response
+
+@app.get("/api/plan/{workout_type}", response_model=PlanResponse)
+async def get_plan(workout_type: str, week: int, user: str, split: str = "A"):
+    """Suggested weight/reps per exercise for week, precomputed by the weekly plan_targets job"""
+    success, result = data_manager.get_plan(workout_type, week, user, split)
+    if not success:
+        return PlanResponse(success=False, message=result)
+    return PlanResponse(success=True, week=week, exercises=result)
 
-@app.put("/api/set/update", response_model=GenericResponse)
-async def update_set(request: UpdateSetRequest):
-    success, message = data_manager.update_set(
+@app.put("/api/set/update", response_model=UpdateSetResponse)
+def update_set(request: UpdateSetRequest, response: Response, db: Session = RequestDB):
+    status, message, version, current = data_manager.update_set(
         request.set_id,
         request.weight,
         request.reps,
-        request.user
+        request.user,
+        version=request.version,
+        db=db
     )
-    return GenericResponse(success=success, message=message)
+    if status == "conflict":
+        # Edited on another device since this client loaded it: re-read and retry/merge
+        response.status_code = 409
+    return UpdateSetResponse(success=status == "updated", message=message, version=version, set=current)
 
 @app.delete("/api/set/delete", response_model=GenericResponse)
-async def delete_set(request: DeleteSetRequest):
+def delete_set(request: DeleteSetRequest, db: Session = RequestDB):
     success, message = data_manager.delete_set(
         request.set_id,
-        request.user
+        request.user,
+        db=db
     )
     return GenericResponse(success=success, message=message)
 
 @app.post("/api/parse", response_model=ParseResponse)
-async def parse_command(request: ParseRequest):
-    exercises = data_manager.get_workout_data(request.workout_type, 1, request.user)
-    exercise_names = [e.name for e in exercises]
+def parse_command(request: ParseRequest, db: Session = RequestDB):
+    exercises = data_manager.get_workout_data(request.workout_type, 1, request.user, db=db)
+    exercise_names = [e["name"] for e in exercises]
     
     result, error = nlp_processor.parse_command(request.text, exercise_names)
     
@@ -275,65 +340,158 @@ async def parse_command(request: ParseRequest):
         
     return ParseResponse(success=True, data=result)
 
+class ParseAndLogRequest(ParseRequest):
+    week: int
+
+@app.post("/api/parse-and-log", response_model=ParseResponse)
+def parse_and_log(request: ParseAndLogRequest, idempotency_key: str | None = Header(None), db: Session = RequestDB):
+    """Parse a (possibly multi-set) command like "squat 100x5, 105x5" and log every set at once"""
+    replay = idempotency_store.reserve(idempotency_key, request.user, "parse-and-log", db=db)
+    if replay:
+        return ParseResponse(**replay)
+
+    exercises = data_manager.get_workout_data(request.workout_type, request.week, request.user, db=db)
+    exercise_names = [e["name"] for e in exercises]
+    
+    result, error = nlp_processor.parse_command(request.text, exercise_names)
+    if error:
+        idempotency_store.release(idempotency_key, request.user, "parse-and-log", db=db)
+        return ParseResponse(success=False, message=error)
+    
+    success, message = data_manager.log_sets(
+        request.workout_type, result["exercise"], result["sets"], request.week, request.user, db=db
+    )
+    if not success:
+        idempotency_store.release(idempotency_key, request.user, "parse-and-log", db=db)
+        return ParseResponse(success=False, data=result, message=message)
+    response = ParseResponse(success=True, data=result, message=message)
+    idempotency_store.save(idempotency_key, request.user, "parse-and-log", response.model_dump(), db=db)
+    return response
+
 @app.post("/api/workout", response_model=GenericResponse)
-async def create_workout(request: CreateWorkoutRequest):
+def create_workout(request: CreateWorkoutRequest, db: Session = RequestDB):
     # Pass the user (username) to the create_workout function
-    success, message = data_manager.create_workout(request.name, request.user)
+    success, message = data_manager.create_workout(request.name, request.user, db=db)
     return GenericResponse(success=success, message=message)
 
 @app.post("/api/exercise", response_model=GenericResponse)
-async def add_exercise(request: AddExerciseRequest):
+def add_exercise(request: AddExerciseRequest, db: Session = RequestDB):
     # Determine split from request if available, default to "A" (Split 1)
     split = getattr(request, 'split', 'A') 
     setup_notes = getattr(request, 'setup_notes', None)
-    success, message = data_manager.add_exercise(request.workout_type, request.name, request.default_sets, request.user, split, setup_notes)
+    success, message = data_manager.add_exercise(request.workout_type, request.name, request.default_sets, request.user, split, setup_notes, db=db)
     return GenericResponse(success=success, message=message)
 
 @app.put("/api/exercise/notes", response_model=GenericResponse)
-async def update_exercise_notes(request: UpdateExerciseNotesRequest):
+def update_exercise_notes(request: UpdateExerciseNotesRequest, db: Session = RequestDB):
     split = getattr(request, 'split', 'A')
     success, message = data_manager.update_exercise_notes(
         request.workout_type, 
         request.exercise_name, 
         request.setup_notes, 
         request.user, 
-        split
+        split,
+        db=db
     )
     return GenericResponse(success=success, message=message)
 
 @app.delete("/api/exercise", response_model=GenericResponse)
-async def delete_exercise(workout_type: str, exercise_name: str, user: str = None):
-    success, message = data_manager.delete_exercise(workout_type, exercise_name, user)
+def delete_exercise(workout_type: str, exercise_name: str, user: str = None, db: Session = RequestDB):
+    success, message = data_manager.delete_exercise(workout_type, exercise_name, user, db=db)
     return GenericResponse(success=success, message=message)
 
 @app.delete("/api/workout/{workout_type}", response_model=GenericResponse)
-async def delete_workout(workout_type: str):
-    success, message = data_manager.delete_workout(workout_type)
+def delete_workout(workout_type: str, db: Session = RequestDB):
+    success, message = data_manager.delete_workout(workout_type, db=db)
+    return GenericResponse(success=success, message=message)
+
+@app.post("/api/restore", response_model=GenericResponse)
+def restore_deleted(request: RestoreRequest, db: Session = RequestDB):
+    """Undo a workout/exercise/set delete, until compaction purges it (SOFT_DELETE_RETENTION_DAYS)"""
+    success, message = data_manager.restore(
+        request.kind,
+        request.user,
+        workout_type=request.workout_type,
+        exercise_name=request.exercise_name,
+        set_id=request.set_id,
+        db=db
+    )
     return GenericResponse(success=success, message=message)
 
 @app.post("/api/session/start", response_model=StartSessionResponse)
-async def start_session(request: StartSessionRequest):
-    success, session_id = data_manager.start_session(request.user, request.workout_type, request.split)
+def start_session(request: StartSessionRequest, idempotency_key: str | None = Header(None), db: Session = RequestDB):
+    replay = idempotency_store.reserve(idempotency_key, request.user, "session/start", db=db)
+    if replay:
+        return StartSessionResponse(**replay)
+
+    success, session_id = data_manager.start_session(request.user, request.workout_type, request.split, db=db)
     if not success:
+        idempotency_store.release(idempotency_key, request.user, "session/start", db=db)
         return StartSessionResponse(success=False, message=str(session_id))
-    return StartSessionResponse(success=True, session_id=session_id)
+    response = StartSessionResponse(success=True, session_id=session_id)
+    idempotency_store.save(idempotency_key, request.user, "session/start", response.model_dump(), db=db)
+    return response
 
 @app.post("/api/session/end", response_model=EndSessionResponse)
-async def end_session(request: EndSessionRequest):
-    success, message, duration, volume, prs = data_manager.end_session(request.session_id, request.user, request.notes)
+def end_session(request: EndSessionRequest, background_tasks: BackgroundTasks, idempotency_key: str | None = Header(None), db: Session = RequestDB):
+    replay = idempotency_store.reserve(idempotency_key, request.user, "session/end", db=db)
+    if replay:
+        return EndSessionResponse(**replay)
+
+    success, message, duration, job_id = data_manager.end_session(request.session_id, request.user, request.notes, db=db)
     if not success:
+        idempotency_store.release(idempotency_key, request.user, "session/end", db=db)
         return EndSessionResponse(success=False, message=message)
-    return EndSessionResponse(
+    # Summary runs right after the response; the job worker is the fallback
+    background_tasks.add_task(data_manager.jobs.run, job_id)
+    response = EndSessionResponse(
         success=True, 
         message=message,
         duration_minutes=duration,
-        total_volume=volume,
-        prs=prs
+        job_id=job_id
     )
+    idempotency_store.save(idempotency_key, request.user, "session/end", response.model_dump(), db=db)
+    return response
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: int, user: str):
+    """
+    Poll a background job; the worker thread (or the end-session background task) runs it.
+    Plain def: with JOB_WORKER=0 the poll runs a retry/dead job itself, in the threadpool.
+    """
+    job = data_manager.jobs.get(job_id)
+    if not job or job["owner"] != user:
+        return JobResponse(success=False, message="Job not found")
+    if job["status"] in ("pending", "running") and data_manager.jobs.run_due(job_id):
+        job = data_manager.jobs.get(job_id)
+    job.pop("owner")
+    job.pop("attempts")
+    return JobResponse(success=True, **job)
 
 @app.get("/api/dashboard/stats", response_model=DashboardStatsResponse)
 async def get_dashboard_stats(user: str):
-    success, data = data_manager.get_user_stats(user)
+    success, data = await request_coalescer.do(("dashboard", user), user, data_manager.get_user_stats, user)
     if not success:
         return DashboardStatsResponse(success=False, message=str(data))
     return DashboardStatsResponse(success=True, data=data)
+
+@app.get("/api/movements", response_model=MovementListResponse)
+async def get_movements(user: str):
+    success, data = data_manager.get_movements(user)
+    if not success:
+        return MovementListResponse(success=False, message=str(data))
+    return MovementListResponse(success=True, movements=data)
+
+@app.get("/api/movements/{movement_id}/progress", response_model=MovementProgressResponse)
+async def get_movement_progress(movement_id: int, user: str):
+    success, data = data_manager.get_movement_progress(user, movement_id)
+    if not success:
+        return MovementProgressResponse(success=False, message=str(data))
+    return MovementProgressResponse(success=True, **data)
+
+@app.get("/api/sessions", response_model=SessionHistoryResponse)
+async def get_session_history(user: str, cursor: str = None, limit: int = 20):
+    success, data = data_manager.get_session_history(user, cursor, limit)
+    if not success:
+        return SessionHistoryResponse(success=False, message=str(data))
+    return SessionHistoryResponse(success=True, **data)
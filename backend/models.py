@@ -1,18 +1,22 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class SetLog(BaseModel):
-    id: Optional[int] = None
+    id: Optional[int] = None # None while the set waits in the write-behind buffer; re-read it to edit/delete
     set_number: int
     weight: float
     reps: int
+    version: Optional[int] = None # send back with /api/set/update; None until a buffered set is flushed
 
 class Exercise(BaseModel):
     id: int
     name: str
+    movement_id: Optional[int] = None
     sets: List[SetLog] = []
-    prev_week_summary: Optional[str] = None
+    prev_week_summary: Optional[str] = None # summary of the last performed week (not necessarily week - 1)
+    last_performed_week: Optional[int] = None
+    last_performed_sets: List[SetLog] = []
     setup_notes: Optional[str] = None
 
 class WorkoutData(BaseModel):
@@ -20,6 +24,24 @@ class WorkoutData(BaseModel):
     exercises: List[Exercise]
     active_week: int
 
+class ExerciseWeek(BaseModel):
+    week: int
+    sets: List[SetLog] = []
+    prev_week_summary: Optional[str] = None
+
+class ExerciseWeeks(BaseModel):
+    id: int
+    name: str
+    movement_id: Optional[int] = None
+    setup_notes: Optional[str] = None
+    weeks: List[ExerciseWeek] = []
+
+class WorkoutWeeksData(BaseModel):
+    workout_type: str
+    start_week: int
+    end_week: int
+    exercises: List[ExerciseWeeks]
+
 class LogRequest(BaseModel):
     workout_type: str
     exercise_name: str
@@ -40,11 +62,25 @@ class UpdateSetRequest(BaseModel):
     weight: float
     reps: int
     user: str
+    version: int | None = None # version the client edited; None = last write wins
+
+class UpdateSetResponse(BaseModel):
+    success: bool
+    message: str | None = None
+    version: int | None = None # new version, or the current one on a conflict
+    set: SetLog | None = None # current row on a conflict (409), to show/merge
 
 class DeleteSetRequest(BaseModel):
     set_id: int
     user: str
 
+class RestoreRequest(BaseModel):
+    kind: Literal["workout", "exercise", "set"]
+    user: str | None = None
+    workout_type: str | None = None # kind "workout" / "exercise"
+    exercise_name: str | None = None # kind "exercise"
+    set_id: int | None = None # kind "set"
+
 class GenericResponse(BaseModel):
     success: bool
     message: str
@@ -88,9 +124,20 @@ class EndSessionResponse(BaseModel):
     success: bool
     message: str | None = None
     duration_minutes: int | None = None
+    # Computed in the background: poll GET /api/jobs/{job_id} for volume / PRs / streak
+    job_id: int | None = None
     total_volume: float | None = None
     prs: list[str] | None = None
 
+class JobResponse(BaseModel):
+    success: bool
+    id: int | None = None
+    kind: str | None = None
+    status: str | None = None # pending / running / done / failed
+    result: dict | None = None
+    error: str | None = None
+    message: str | None = None
+
 
 
 class ActivityItem(BaseModel):
@@ -101,9 +148,19 @@ class ActivityItem(BaseModel):
     pr_count: int
     pr_details: str | None = None
 
+class SessionHistoryItem(ActivityItem):
+    id: int
+    notes: str | None = None
+
+class SessionHistoryResponse(BaseModel):
+    success: bool
+    sessions: List[SessionHistoryItem] = []
+    next_cursor: str | None = None # Opaque; pass back as ?cursor= to get the next page
+    message: str | None = None
+
 class DashboardStatsResponse(BaseModel):
     success: bool
-    data: dict | None = None # { "workouts_this_week": int, "prs_this_week": int, "recent_activity": [] }
+    data: dict | None = None # { "workouts_this_week": int, "prs_this_week": int, "streak_weeks": int, "recent_activity": [] }
     message: str | None = None
 
 class WorkoutItem(BaseModel):
@@ -114,9 +171,92 @@ class WorkoutItem(BaseModel):
 class WorkoutListResponse(BaseModel):
     workouts: List[WorkoutItem]
 
+class CatalogExercise(BaseModel):
+    name: str
+    split: str | None = None
+    default_sets: int | None = None
+    setup_notes: str | None = None
+
+class CatalogWorkout(BaseModel):
+    name: str
+    exercises: List[CatalogExercise] = []
+
+class CatalogResponse(BaseModel):
+    version: str # changes whenever an admin edits the defaults; use as ?v= for CDN caching
+    workouts: List[CatalogWorkout] = []
+
+class CatalogVersionResponse(BaseModel):
+    version: str
+
 class UpdateExerciseNotesRequest(BaseModel):
     workout_type: str
     exercise_name: str
     setup_notes: str
     user: str | None = None
     split: str = "A"
+
+class ExerciseSearchResult(BaseModel):
+    name: str
+    score: int | None = None # fuzzy match score 0-100
+
+class ExerciseSearchResponse(BaseModel):
+    success: bool
+    results: List[ExerciseSearchResult] = []
+    message: str | None = None
+
+class NoteSearchResult(BaseModel):
+    kind: str # "exercise" (setup notes) or "session"
+    id: int
+    workout: str | None = None
+    exercise: str | None = None
+    date: str | None = None # session start time
+    snippet: str | None = None # matched terms wrapped in [ ]
+    score: float
+
+class NoteSearchResponse(BaseModel):
+    success: bool
+    results: List[NoteSearchResult] = []
+    next_offset: int | None = None # pass back as ?offset= for the next page
+    message: str | None = None
+
+class PlannedSetItem(BaseModel):
+    set_number: int
+    weight: float
+    reps: int
+
+class PlannedExercise(BaseModel):
+    exercise_id: int
+    name: str
+    rule: str # progression rule the targets came from
+    basis_week: int # last week performed, the targets build on it
+    sets: List[PlannedSetItem]
+
+class PlanResponse(BaseModel):
+    success: bool
+    week: int | None = None
+    exercises: List[PlannedExercise] = []
+    message: str | None = None
+
+class MovementItem(BaseModel):
+    id: int
+    name: str
+    best_weight: float | None = None
+    weeks: int = 0 # distinct weeks logged
+
+class MovementListResponse(BaseModel):
+    success: bool
+    movements: List[MovementItem] = []
+    message: str | None = None
+
+class MovementProgressPoint(BaseModel):
+    week: int
+    best_weight: float | None = None
+    volume: float | None = None
+    sets: int = 0
+
+class MovementProgressResponse(BaseModel):
+    success: bool
+    movement_id: int | None = None
+    name: str | None = None
+    weeks: List[MovementProgressPoint] = []
+    message: str | None = None
@@ -1,7 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, UniqueConstraint, Index, event, text
+from sqlalchemy.orm import Session, relationship, with_loader_criteria
 from datetime import datetime
-from .database import Base
+from .database import Base, RELATIONSHIP_LAZY
+
+# Soft delete: deleted_at is set by the delete paths and cleared by restore; the
+# rows are purged by the "compact_deleted" job once the retention window passes.
+# Partial indexes: reads only ever use the live rows, compaction only the deleted ones.
+LIVE = text("deleted_at IS NULL")
+DELETED = text("deleted_at IS NOT NULL")
 
 class User(Base):
     __tablename__ = "users"
@@ -11,37 +17,64 @@ class User(Base):
     is_admin = Column(Integer, default=0) # 0 = False, 1 = True (using Integer for SQLite/Postgres compat)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    sets = relationship("SetLog", back_populates="user")
-    sessions = relationship("WorkoutSession", back_populates="user")
-    created_workouts = relationship("Workout", back_populates="creator")
+    sets = relationship("SetLog", back_populates="user", lazy=RELATIONSHIP_LAZY)
+    sessions = relationship("WorkoutSession", back_populates="user", lazy=RELATIONSHIP_LAZY)
+    created_workouts = relationship("Workout", back_populates="creator", lazy=RELATIONSHIP_LAZY)
 
 class Workout(Base):
     __tablename__ = "workouts"
+    __table_args__ = (
+        Index("ix_workouts_deleted_at", "deleted_at", postgresql_where=DELETED, sqlite_where=DELETED),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True) # Push, Pull, Legs
     created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True) # Null = System/Default (or assume Admin)
+    deleted_at = Column(DateTime, nullable=True)
+
+    creator = relationship("User", back_populates="created_workouts", lazy=RELATIONSHIP_LAZY)
+    exercises = relationship("Exercise", back_populates="workout", lazy=RELATIONSHIP_LAZY)
+    sessions = relationship("WorkoutSession", back_populates="workout", lazy=RELATIONSHIP_LAZY)
+
+class Movement(Base):
+    """Canonical movement ("Bench press") shared by every Exercise row of it across workouts/splits/users"""
+    __tablename__ = "movements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, unique=True, index=True, nullable=False) # dedup.normalize_name(name)
+    name = Column(String, nullable=False) # display name (first one seen)
 
-    creator = relationship("User", back_populates="created_workouts")
-    exercises = relationship("Exercise", back_populates="workout")
-    sessions = relationship("WorkoutSession", back_populates="workout")
+    exercises = relationship("Exercise", back_populates="movement", lazy=RELATIONSHIP_LAZY)
 
 class Exercise(Base):
     __tablename__ = "exercises"
+    __table_args__ = (
+        # _load_split_sets: the live exercises of a workout's split
+        Index("ix_exercises_live_workout_split", "workout_id", "split", postgresql_where=LIVE, sqlite_where=LIVE),
+        Index("ix_exercises_deleted_at", "deleted_at", postgresql_where=DELETED, sqlite_where=DELETED),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     workout_id = Column(Integer, ForeignKey("workouts.id"))
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    movement_id = Column(Integer, ForeignKey("movements.id"), nullable=True, index=True)
     name = Column(String, index=True)
     default_sets = Column(Integer, default=3)
     split = Column(String, default="A") # "A" for Split 1, "B" for Split 2
     setup_notes = Column(String, nullable=True) # e.g., "Bench at 30°, Cable at notch 5"
+    deleted_at = Column(DateTime, nullable=True)
 
-    workout = relationship("Workout", back_populates="exercises")
-    sets = relationship("SetLog", back_populates="exercise")
+    workout = relationship("Workout", back_populates="exercises", lazy=RELATIONSHIP_LAZY)
+    movement = relationship("Movement", back_populates="exercises", lazy=RELATIONSHIP_LAZY)
+    sets = relationship("SetLog", back_populates="exercise", lazy=RELATIONSHIP_LAZY)
 
 class SetLog(Base):
     __tablename__ = "sets"
+    __table_args__ = (
+        # get_workout_data / log_set look live sets up by user + exercise + week
+        Index("ix_sets_live_user_exercise_week", "user_id", "exercise_id", "week", postgresql_where=LIVE, sqlite_where=LIVE),
+        Index("ix_sets_deleted_at", "deleted_at", postgresql_where=DELETED, sqlite_where=DELETED),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -51,13 +84,19 @@ class SetLog(Base):
     weight = Column(Float)
     reps = Column(Integer)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, default=1, server_default="1", nullable=False) # bumped by every update_set, for optimistic concurrency
+    deleted_at = Column(DateTime, nullable=True)
 
-    user = relationship("User", back_populates="sets")
-    exercise = relationship("Exercise", back_populates="sets")
+    user = relationship("User", back_populates="sets", lazy=RELATIONSHIP_LAZY)
+    exercise = relationship("Exercise", back_populates="sets", lazy=RELATIONSHIP_LAZY)
     # session = relationship("WorkoutSession", back_populates="sets") # Optional: direct link if needed
 
 class WorkoutSession(Base):
     __tablename__ = "workout_sessions"
+    __table_args__ = (
+        # Keyset pagination of a user's history: ORDER BY start_time DESC, id DESC
+        Index("ix_workout_sessions_user_start_id", "user_id", "start_time", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -68,8 +107,84 @@ class WorkoutSession(Base):
     total_volume = Column(Float, default=0.0)
     pr_count = Column(Integer, default=0)
     pr_details = Column(String, nullable=True) # JSON or comma-separated list of exercises
+    streak_weeks = Column(Integer, nullable=True) # consecutive weeks with a session, as of this one
     notes = Column(String, nullable=True)
 
-    user = relationship("User", back_populates="sessions")
-    workout = relationship("Workout", back_populates="sessions")
+    user = relationship("User", back_populates="sessions", lazy=RELATIONSHIP_LAZY)
+    workout = relationship("Workout", back_populates="sessions", lazy=RELATIONSHIP_LAZY)
+
+
+class PlannedSet(Base):
+    """Suggested weight/reps for the next session of an exercise (see progression.py), refreshed by the "plan_targets" job"""
+    __tablename__ = "planned_sets"
+    __table_args__ = (
+        # GET /api/plan/{workout}: a user's targets for one week
+        Index("ix_planned_sets_user_week_exercise", "user_id", "week", "exercise_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), nullable=False)
+    week = Column(Integer, nullable=False) # week the targets are for
+    set_number = Column(Integer, nullable=False)
+    weight = Column(Float, nullable=False)
+    reps = Column(Integer, nullable=False)
+    rule = Column(String, nullable=False) # progression.RULES key
+    basis_week = Column(Integer, nullable=False) # last week the exercise was performed, the targets build on it
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("key", "username", "endpoint", name="uq_idempotency_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String, nullable=False)
+    username = Column(String, nullable=False)
+    endpoint = Column(String, nullable=False) # e.g. "log", "session/start"
+    response = Column(String, nullable=False) # JSON-encoded response body
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
+
+class Job(Base):
+    """Durable background job (see backend/jobs.py)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Worker poll: next runnable job
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False) # e.g. "session_summary"
+    owner = Column(String, nullable=True) # username allowed to read the result
+    payload = Column(String, nullable=False) # JSON
+    status = Column(String, default="pending", nullable=False) # pending / running / done / failed
+    result = Column(String, nullable=True) # JSON, once done
+    error = Column(String, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+SOFT_DELETED = (Workout, Exercise, SetLog)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_soft_deleted(execute_state):
+    """
+    Every ORM SELECT (queries, select() of model columns, relationship and
+    subquery loads) only sees live rows. Restore and compaction opt out with
+    .execution_options(include_deleted=True). Raw text() SQL filters itself.
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(*[
+            with_loader_criteria(model, model.deleted_at.is_(None), include_aliases=True)
+            for model in SOFT_DELETED
+        ])
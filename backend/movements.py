@@ -0,0 +1,75 @@
+"""
+Canonical movements.
+
+"Bench press" exists as one Exercise row per workout, split and user. Every
+row points at a Movement (matched by dedup.normalize_name), so PRs and progress
+can be aggregated across workouts by an indexed integer key instead of by
+(fuzzy) name joins.
+"""
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+
+from .dedup import normalize_name
+from .models_db import Movement
+
+
+def movement_key(name: str) -> str:
+    return normalize_name(name)
+
+
+def ensure_movement(db, name: str) -> int | None:
+    """Id of the movement for an exercise name, created if new (inside db's transaction)."""
+    key = movement_key(name)
+    if not key:
+        return None
+    movement_id = db.execute(select(Movement.id).where(Movement.key == key)).scalar()
+    if movement_id:
+        return movement_id
+    try:
+        with db.begin_nested():
+            movement = Movement(key=key, name=name.strip())
+            db.add(movement)
+        return movement.id
+    except IntegrityError:
+        # Created concurrently by another worker
+        return db.execute(select(Movement.id).where(Movement.key == key)).scalar()
+
+
+def link_movements(conn):
+    """
+    Batch pass: create movements for, and link, every exercise without one.
+    Names are normalized in Python once; the links are applied with a single
+    UPDATE driven by a temporary mapping table (same approach as dedup).
+    """
+    unlinked = conn.execute(text("SELECT id, name FROM exercises WHERE movement_id IS NULL ORDER BY id")).all()
+    if not unlinked:
+        return 0
+
+    existing = {key: mid for key, mid in conn.execute(text("SELECT key, id FROM movements"))}
+    new_names = {}
+    for ex in unlinked:
+        key = movement_key(ex.name)
+        if key and key not in existing:
+            new_names.setdefault(key, ex.name.strip())
+    if new_names:
+        conn.execute(
+            text("INSERT INTO movements (key, name) VALUES (:key, :name)"),
+            [{"key": k, "name": n} for k, n in new_names.items()]
+        )
+        existing = {key: mid for key, mid in conn.execute(text("SELECT key, id FROM movements"))}
+
+    pairs = [
+        {"exercise_id": ex.id, "movement_id": existing[movement_key(ex.name)]}
+        for ex in unlinked if movement_key(ex.name)
+    ]
+    conn.execute(text("DROP TABLE IF EXISTS movement_link_map"))
+    conn.execute(text("CREATE TEMPORARY TABLE movement_link_map (exercise_id INTEGER PRIMARY KEY, movement_id INTEGER NOT NULL)"))
+    if pairs:
+        conn.execute(text("INSERT INTO movement_link_map (exercise_id, movement_id) VALUES (:exercise_id, :movement_id)"), pairs)
+        conn.execute(text(
+            "UPDATE exercises SET movement_id = "
+            "(SELECT movement_id FROM movement_link_map m WHERE m.exercise_id = exercises.id) "
+            "WHERE id IN (SELECT exercise_id FROM movement_link_map)"
+        ))
+    conn.execute(text("DROP TABLE IF EXISTS movement_link_map"))
+    return len(pairs)
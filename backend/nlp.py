@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 try:
     from fuzzywuzzy import process
@@ -6,89 +7,211 @@ except ImportError:
     process = None
     print("Warning: fuzzywuzzy not installed or failed to import. NLP features will be limited.")
 
+# Upper bound for "NxM" expansion, so "100x5x500" can't log 500 rows
+MAX_SETS_PER_COMMAND = 20
+
+# Distinct phrases / (name, exercise list) pairs remembered by the parse memo
+PARSE_CACHE_SIZE = 2048
+
+# Single-pass tokenizer: numbers, words and separators in one scan
+TOKEN_RE = re.compile(r"(?P<num>\d+(?:\.\d+)?)|(?P<word>[^\W\d_]+)|(?P<sep>[,;])|(?P<at>@)|(?P<x>[×*])")
+
+# Words that carry numeric meaning; everything else is part of the exercise name
+KEYWORDS = {
+    "kg": "U", "kgs": "U", "kilo": "U", "kilos": "U", "lb": "U", "lbs": "U", "pound": "U", "pounds": "U",
+    "rep": "R", "reps": "R", "repetitions": "R",
+    "x": "X",
+    "for": "F",
+    "at": "A", "with": "A",
+    "set": "S", "sets": "S",
+    "of": "O",
+    "then": ";",
+}
+
+# Grammar, matched against the token kinds of one segment (N = number, see KEYWORDS for the rest).
+# Each pattern's numbers, in order, are listed next to it.
+SCHEME_RE = re.compile(r"N(?:X|S[OX]?)NR?ANU?")  # 3x5 at 100, 3 sets of 5 reps @ 100kg -> count, reps, weight
+TRIPLE_RE = re.compile(r"NU?XNR?XNU?")           # 100x5x3 -> weight, reps, count; 3x5x100kg -> count, reps, weight
+SETS_OF_RE = re.compile(r"NS(?:[OX]NR?|NR)")     # 3 sets of 5, 3 sets x 5, 3 sets 5 reps (weight elsewhere, or none) -> count, reps
+PAIR_X_RE = re.compile(r"NU?XN")              # 100 x 5, 100kg x 5 -> weight, reps
+PAIR_FOR_RE = re.compile(r"NU?FN")            # 100 for 5 -> weight, reps
+
+
+def tokenize(text: str):
+    """
+    Returns (name, kinds, numbers): the non-numeric words (for exercise matching),
+    one kind character per numeric/keyword token, and the numbers in order.
+    """
+    name_words, kinds, numbers = [], [], []
+    for m in TOKEN_RE.finditer(text.lower()):
+        kind = m.lastgroup
+        if kind == "num":
+            kinds.append("N")
+            numbers.append(float(m.group()))
+        elif kind == "word":
+            word = m.group()
+            if word in KEYWORDS:
+                kinds.append(KEYWORDS[word])
+            else:
+                name_words.append(word)
+        elif kind == "sep":
+            kinds.append(";")
+        elif kind == "at":
+            kinds.append("A")
+        else:
+            kinds.append("X")
+    return " ".join(name_words), "".join(kinds), numbers
+
+
+def _numbers_in(kinds: str, numbers: list, match):
+    """Numbers covered by a grammar match over kinds"""
+    start = kinds.count("N", 0, match.start())
+    return numbers[start:start + match.group().count("N")]
+
+
+def _leftover(kinds: str, numbers: list, match, text: str):
+    """Error for a number the grammar match does not account for ("100x5 110"), else None"""
+    start = kinds.count("N", 0, match.start())
+    others = numbers[:start] + numbers[start + match.group().count("N"):]
+    if others:
+        return f"Could not tell what {others[0]:g} means in '{text.strip()}'"
+    return None
+
+
+def _expand(weight, reps, count):
+    if count < 1:
+        return None, f"Set count must be at least 1, got {count:g}"
+    if count > MAX_SETS_PER_COMMAND:
+        return None, f"Too many sets ({int(count)}) in one command"
+    return [(weight, int(reps))] * int(count), None
+
+
+def _parse_segment(kinds: str, numbers: list, text: str):
+    """One segment: a sets x reps scheme, a weight x reps x sets group, or a single set"""
+    m = SCHEME_RE.search(kinds)
+    if m:
+        count, reps, weight = _numbers_in(kinds, numbers, m)
+        error = _leftover(kinds, numbers, m, text)
+        return (None, error) if error else _expand(weight, reps, count)
+
+    m = TRIPLE_RE.search(kinds)
+    if m:
+        first, reps, last = _numbers_in(kinds, numbers, m)
+        # The unit marks the weight: "3 x 5 x 100kg" is sets first, "100kg x 5 x 3" (or unlabelled) weight first
+        if m.group().endswith("U") and m.group()[1] != "U":
+            count, weight = first, last
+        else:
+            weight, count = first, last
+        error = _leftover(kinds, numbers, m, text)
+        return (None, error) if error else _expand(weight, reps, count)
+
+    m = SETS_OF_RE.search(kinds)
+    if m:
+        # "3 sets of 5, 100kg": the one other number is the weight; none means bodyweight
+        count, reps = _numbers_in(kinds, numbers, m)
+        start = kinds.count("N", 0, m.start())
+        others = numbers[:start] + numbers[start + 2:]
+        if len(others) > 1:
+            return None, f"Could not tell the weight in '{text.strip()}'"
+        return _expand(others[0] if others else 0.0, reps, count)
+
+    # Explicit units: "100 kg 5 reps", "5 reps at 100", "100kg for 5"
+    weight = reps = None
+    for i, kind in enumerate(kinds[:-1]):
+        if kind == "N" and kinds[i + 1] == "U" and weight is None:
+            weight = numbers[kinds.count("N", 0, i)]
+        elif kind == "N" and kinds[i + 1] == "R" and reps is None:
+            reps = numbers[kinds.count("N", 0, i)]
+    if len(numbers) == 2:
+        # One number is labelled: the other one is the other quantity
+        if reps is not None and weight is None:
+            weight = numbers[1] if numbers[0] == reps else numbers[0]
+        elif weight is not None and reps is None:
+            reps = numbers[1] if numbers[0] == weight else numbers[0]
+    if weight and reps:
+        if len(numbers) > 2:
+            return None, f"Could not tell the weight and reps apart in '{text.strip()}'"
+        return [(weight, int(reps))], None
+
+    for pattern in (PAIR_X_RE, PAIR_FOR_RE):
+        m = pattern.search(kinds)
+        if m:
+            weight, reps = _numbers_in(kinds, numbers, m)
+            error = _leftover(kinds, numbers, m, text)
+            return (None, error) if error else ([(weight, int(reps))], None)
+
+    # Fallback: just 2 numbers, weight first ("100 5")
+    if len(numbers) == 2:
+        return [(numbers[0], int(numbers[1]))], None
+    if len(numbers) > 2:
+        return None, f"Could not tell the weight and reps apart in '{text.strip()}'"
+    if len(numbers) == 1:
+        return None, f"Could not extract both weight and reps from '{text.strip()}'"
+    return None, "No numbers found"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_phrase(text: str):
+    """Memoized: (name, ((weight, reps), ...), error) for a raw command"""
+    name, kinds, numbers = tokenize(text)
+
+    segments = []
+    offset = 0
+    for segment_kinds in kinds.split(";"):
+        count = segment_kinds.count("N")
+        if count:
+            segments.append((segment_kinds, numbers[offset:offset + count]))
+        offset += count
+
+    if not segments:
+        return name, (), "No numbers found"
+
+    sets = []
+    for segment_kinds, segment_numbers in segments:
+        segment_sets, error = _parse_segment(segment_kinds, segment_numbers, text)
+        if error:
+            return name, (), error
+        sets.extend(segment_sets)
+    if len(sets) > MAX_SETS_PER_COMMAND:
+        return name, (), f"Too many sets ({len(sets)}) in one command"
+    return name, tuple(sets), None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _match_exercise(name: str, exercises: tuple):
+    """Memoized fuzzy match of the name words against a workout's exercises"""
+    if not name or not exercises:
+        return None, 0
+    return process.extractOne(name, exercises)
+
+
 class NLPProcessor:
     def parse_command(self, text: str, available_exercises: list[str]):
         """
         Parses natural language command into structured data.
-        Returns: strictured dict or None if exercise not found.
+        Returns ({"exercise", "weight", "reps", "sets"}, None) or (None, error).
         """
-        text = text.lower()
-        
         if not process:
             return None, "NLP module not available (dependency missing)"
 
-        # 1. Find exercise
-        best_match, score = process.extractOne(text, available_exercises)
+        # Tokenized once: numbers/units drive the sets, the remaining words the exercise match
+        name, sets, error = _parse_phrase(text)
+
+        best_match, score = _match_exercise(name, tuple(available_exercises))
         if score < 60: # Threshold
             return None, "Exercise not found"
-            
-        exercise_name = best_match
-        
-        # 2. Extract numbers
-        # Remove exercise name roughly from text (not perfect but okay)
-        # We assume numbers are distinct from exercise name
-        
-        # Use regex to find weight and reps
-        # patterns: 
-        # "100 kg 5 reps"
-        # "100 for 5"
-        # "5 reps at 100"
-        
-        weight = 0
-        reps = 0
-        
-        # Explicit units
-        kg_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:kg|kilos|lbs|pounds)', text)
-        if kg_match:
-            weight = float(kg_match.group(1))
-            
-        reps_match = re.search(r'(\d+)\s*(?:reps|repetitions)', text)
-        if reps_match:
-            reps = int(reps_match.group(1))
-            
-        # If both found, great.
-        if weight > 0 and reps > 0:
-            return {"exercise": exercise_name, "weight": weight, "reps": reps}, None
-            
-        # Implicit "X for Y" or "X x Y"
-        # "100 x 5"
-        x_match = re.search(r'(\d+(?:\.\d+)?)\s*[xX*]\s*(\d+)', text)
-        if x_match:
-            return {"exercise": exercise_name, "weight": float(x_match.group(1)), "reps": int(x_match.group(2))}, None
-            
-        # "100 for 5"
-        for_match = re.search(r'(\d+(?:\.\d+)?)\s*for\s*(\d+)', text)
-        if for_match:
-            return {"exercise": exercise_name, "weight": float(for_match.group(1)), "reps": int(for_match.group(2))}, None
-            
-        # Fallback: Just 2 numbers in the string
-        numbers = re.findall(r'\d+(?:\.\d+)?', text)
-        numbers = [float(n) for n in numbers]
-        
-        # Filter out numbers that might be part of exercise name (e.g. "Sim 2")? 
-        # Hard to know without specific logic.
-        # Assuming exercise names don't have numbers usually.
-        
-        if len(numbers) >= 2:
-            # Assume first is weight, second is reps. heavy first.
-            if numbers[0] > numbers[1]:
-                 weight = numbers[0]
-                 reps = int(numbers[1])
-            else:
-                 # "12 reps 20 kg" -> 12, 20. 
-                 # Usually weight > reps? Not always (lateral raises).
-                 # Default logic: Weight, Reps.
-                 weight = numbers[0]
-                 reps = int(numbers[1])
-            return {"exercise": exercise_name, "weight": weight, "reps": reps}, None
-
-        if len(numbers) == 1:
-             # Assume text contains only one number?
-             # Could be reps? Or weight?
-             # "12 reps" (handled above)
-             # "20 kg" (handled above)
-             # Just "20"? Ambiguous.
-             return None, f"Could not extract both weight and reps from '{text}'"
-             
-        return None, "No numbers found"
+        if error:
+            return None, error
+
+        sets = [{"weight": weight, "reps": reps} for weight, reps in sets]
+        # weight/reps of the first set kept for single-set clients
+        return {"exercise": best_match, "weight": sets[0]["weight"], "reps": sets[0]["reps"], "sets": sets}, None
+
+    @staticmethod
+    def cache_info():
+        return {"phrases": _parse_phrase.cache_info()._asdict(), "matches": _match_exercise.cache_info()._asdict()}
 
+    @staticmethod
+    def clear_cache():
+        _parse_phrase.cache_clear()
+        _match_exercise.cache_clear()
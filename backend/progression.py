@@ -0,0 +1,59 @@
+"""
+Progressive-overload rules for the planned_sets targets (DataManager.plan_targets).
+
+A rule takes the sets of an exercise's last session as [(weight, reps), ...]
+in set order and returns the suggested sets for the next one.
+  - double_progression: work up to PLAN_REP_MAX reps at the same weight, one
+    rep per set per session; once every set reaches it, add
+    PLAN_WEIGHT_INCREMENT and start again at PLAN_REP_MIN.
+  - e1rm: aim for an estimated 1RM (Epley) PLAN_E1RM_PROGRESSION above the
+    last session's best, keeping each set's reps.
+PLAN_RULE picks the rule every target is computed with.
+"""
+import os
+
+PLAN_RULE = os.getenv("PLAN_RULE", "double_progression")
+PLAN_REP_MIN = int(os.getenv("PLAN_REP_MIN", "8"))
+PLAN_REP_MAX = int(os.getenv("PLAN_REP_MAX", "12"))
+PLAN_WEIGHT_INCREMENT = float(os.getenv("PLAN_WEIGHT_INCREMENT", "2.5"))
+PLAN_E1RM_PROGRESSION = float(os.getenv("PLAN_E1RM_PROGRESSION", "0.025"))
+
+
+def e1rm(weight: float, reps: int) -> float:
+    """Epley estimated one-rep max"""
+    return weight * (1 + reps / 30)
+
+
+def _round_weight(weight: float) -> float:
+    """Nearest loadable weight (a multiple of the increment)"""
+    return round(weight / PLAN_WEIGHT_INCREMENT) * PLAN_WEIGHT_INCREMENT
+
+
+def double_progression(sets):
+    if all(weight > 0 for weight, _ in sets) and all(reps >= PLAN_REP_MAX for _, reps in sets):
+        return [(weight + PLAN_WEIGHT_INCREMENT, PLAN_REP_MIN) for weight, _ in sets]
+    # Bodyweight sets (weight 0) just keep adding reps
+    return [(weight, reps + 1 if weight <= 0 or reps < PLAN_REP_MAX else reps) for weight, reps in sets]
+
+
+def e1rm_progression(sets):
+    target = max(e1rm(weight, reps) for weight, reps in sets) * (1 + PLAN_E1RM_PROGRESSION)
+    if target <= 0:
+        return double_progression(sets)
+    # Never suggest less than what was lifted last time for the same reps
+    return [(max(weight, _round_weight(target / (1 + reps / 30))), reps) for weight, reps in sets]
+
+
+RULES = {
+    "double_progression": double_progression,
+    "e1rm": e1rm_progression,
+}
+
+if PLAN_RULE not in RULES:
+    print(f"Warning: unknown PLAN_RULE '{PLAN_RULE}' (expected one of {', '.join(RULES)}), using double_progression")
+    PLAN_RULE = "double_progression"
+
+
+def plan_sets(sets, rule: str = PLAN_RULE):
+    """Suggested [(weight, reps), ...] for the session after sets"""
+    return RULES[rule](sets)
@@ -0,0 +1,55 @@
+"""
+Schema migrations: one path, Alembic.
+
+migrate() brings any database to the Alembic head and records it in
+alembic_version, so the app (startup, POST /api/run-migrations) and
+migrate_production.py / `alembic upgrade head` never disagree:
+  - an empty database gets the models (Base.metadata.create_all) and is
+    stamped head, there is nothing to migrate;
+  - a database from before Alembic (tables but no alembic_version) is stamped
+    at the initial revision, which matches the legacy schema; the next
+    revision reconciles whatever the legacy migrate_*.py scripts left out;
+  - everything else runs the pending revisions.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+
+from .database import Base
+from . import models_db # noqa: F401 - registers the models on Base.metadata
+from .search import ensure_notes_index, ensure_trigram_index
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# The schema the legacy (pre-Alembic) databases have
+BASELINE_REVISION = "10649d95ff7a"
+
+
+def _run(engine, fn, *args):
+    """Run an alembic command on engine (instead of env.py's DATABASE_URL)."""
+    config = Config(ALEMBIC_INI)
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        fn(config, *args)
+
+
+def migrate(engine):
+    """Bring the database at `engine` to the Alembic head. Returns the revision it started at."""
+    with engine.connect() as conn:
+        tables = set(inspect(conn).get_table_names()) - {"alembic_version"}
+        revision = MigrationContext.configure(conn).get_current_revision()
+
+    if not tables:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            ensure_trigram_index(conn)
+            ensure_notes_index(conn)
+        _run(engine, command.stamp, "head")
+        return None
+
+    if revision is None:
+        _run(engine, command.stamp, BASELINE_REVISION)
+    _run(engine, command.upgrade, "head")
+    return revision
@@ -0,0 +1,269 @@
+import re
+import threading
+from collections import Counter
+
+from sqlalchemy import text
+
+from .database import SessionLocal
+
+try:
+    from fuzzywuzzy import fuzz, process
+except ImportError:
+    fuzz = process = None
+
+# How many index candidates are handed to the (expensive) fuzzy scorer
+CANDIDATE_LIMIT = 50
+# Fuzzy scores below this are noise for autocomplete
+MIN_SCORE = 50
+
+PG_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_exercises_name_trgm ON exercises USING gin (name gin_trgm_ops)",
+]
+
+
+def ensure_trigram_index(conn):
+    """Create the pg_trgm GIN index on exercises.name (Postgres only; SQLite uses ExerciseSearchIndex)."""
+    if conn.dialect.name != "postgresql":
+        return
+    for ddl in PG_TRGM_DDL:
+        conn.execute(text(ddl))
+
+
+def trigrams(value: str) -> set:
+    """pg_trgm-style trigrams: per word, padded with two leading spaces and one trailing."""
+    grams = set()
+    for word in re.findall(r"[a-z0-9]+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ExerciseSearchIndex:
+    """
+    Autocomplete over every exercise name anyone has created.
+
+    Candidates come from a trigram index - pg_trgm's GIN index on Postgres, an
+    in-process trigram -> names inverted index on SQLite - and only those few
+    candidates are scored with fuzzywuzzy, so latency stays flat as the catalog grows.
+
+    The in-process index is built lazily. add_exercise adds names incrementally;
+    deletes/merges call invalidate() and the next search rebuilds it. With a
+    shared cache the version is shared too, so other workers rebuild as well.
+    """
+
+    def __init__(self, cache=None):
+        self._lock = threading.Lock()
+        self.cache = cache
+        self.version = 0
+        self._loaded_version = None
+        self._postings = {} # trigram -> set of names
+
+    def _current_version(self):
+        if self.cache:
+            return (self.version, self.cache.generation("exercise_names"))
+        return self.version
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+        if self.cache:
+            self.cache.bump("exercise_names")
+
+    def add(self, name: str):
+        with self._lock:
+            if self._loaded_version is None:
+                return # not built yet; the first search loads everything
+            for gram in trigrams(name):
+                self._postings.setdefault(gram, set()).add(name)
+        if self.cache:
+            # Our copy already has the name; only other workers need to rebuild
+            self.cache.bump("exercise_names")
+            with self._lock:
+                self._loaded_version = self._current_version()
+
+    def _ensure_loaded(self):
+        version = self._current_version()
+        with self._lock:
+            if self._loaded_version == version:
+                return
+            db = SessionLocal()
+            try:
+                names = [n for (n,) in db.execute(text("SELECT DISTINCT name FROM exercises WHERE name IS NOT NULL AND deleted_at IS NULL"))]
+            finally:
+                db.close()
+            postings = {}
+            for name in names:
+                for gram in trigrams(name):
+                    postings.setdefault(gram, set()).add(name)
+            self._postings = postings
+            self._loaded_version = version
+
+    def _candidates_memory(self, query: str):
+        self._ensure_loaded()
+        counts = Counter()
+        with self._lock:
+            for gram in trigrams(query):
+                counts.update(self._postings.get(gram, ()))
+        return [name for name, _ in counts.most_common(CANDIDATE_LIMIT)]
+
+    def _candidates_postgres(self, db, query: str):
+        # word_similarity (<%) suits autocomplete: "benc" matches inside "Incline bench press"
+        rows = db.execute(text(
+            "SELECT name FROM exercises WHERE :q <% name AND deleted_at IS NULL "
+            "GROUP BY name ORDER BY MAX(word_similarity(:q, name)) DESC LIMIT :n"
+        ), {"q": query, "n": CANDIDATE_LIMIT})
+        return [name for (name,) in rows]
+
+    def search(self, db, query: str, limit: int = 10):
+        query = (query or "").strip()
+        if not query:
+            return []
+        if db.get_bind().dialect.name == "postgresql":
+            candidates = self._candidates_postgres(db, query)
+        else:
+            candidates = self._candidates_memory(query)
+        if not candidates:
+            return []
+        if not process:
+            return [{"name": name, "score": None} for name in candidates[:limit]]
+        return [
+            {"name": name, "score": score}
+            for name, score in process.extractBests(
+                query, candidates, scorer=fuzz.WRatio, score_cutoff=MIN_SCORE, limit=limit
+            )
+        ]
+
+
+# --- Notes full-text search ---------------------------------------------------
+#
+# Exercise.setup_notes and WorkoutSession.notes. On Postgres, GIN indexes over
+# to_tsvector() expressions maintain themselves. On SQLite, an FTS5 table
+# (notes_fts) is kept in sync explicitly, in the same transaction as the write,
+# by add_exercise / update_exercise_notes / end_session and the delete paths.
+# rowid = ref_id * 2 (+1 for sessions), so every upsert/delete is a rowid lookup.
+
+NOTES_KINDS = {"exercise": 0, "session": 1}
+
+PG_NOTES_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_exercises_setup_notes_fts ON exercises "
+    "USING gin (to_tsvector('english', coalesce(setup_notes, '')))",
+    "CREATE INDEX IF NOT EXISTS ix_workout_sessions_notes_fts ON workout_sessions "
+    "USING gin (to_tsvector('english', coalesce(notes, '')))",
+]
+
+
+def ensure_notes_index(conn):
+    """Create the notes full-text index; on SQLite a new FTS5 table is filled from existing rows."""
+    if conn.dialect.name == "postgresql":
+        for ddl in PG_NOTES_DDL:
+            conn.execute(text(ddl))
+        return
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'")).scalar()
+    if not exists:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE notes_fts USING fts5(body, kind UNINDEXED, ref_id UNINDEXED, tokenize='porter unicode61')"
+        ))
+        rebuild_notes_index(conn)
+
+
+def rebuild_notes_index(conn):
+    """Re-fill notes_fts from the tables (after bulk changes such as dedup). No-op on Postgres."""
+    if conn.dialect.name == "postgresql":
+        return
+    conn.execute(text("DELETE FROM notes_fts"))
+    conn.execute(text(
+        "INSERT INTO notes_fts (rowid, body, kind, ref_id) "
+        "SELECT id * 2, setup_notes, 'exercise', id FROM exercises "
+        "WHERE setup_notes IS NOT NULL AND setup_notes != '' AND deleted_at IS NULL"
+    ))
+    conn.execute(text(
+        "INSERT INTO notes_fts (rowid, body, kind, ref_id) "
+        "SELECT id * 2 + 1, notes, 'session', id FROM workout_sessions WHERE notes IS NOT NULL AND notes != ''"
+    ))
+
+
+def index_notes(db, kind: str, ref_id: int, body: str | None):
+    """Upsert (or remove, if body is empty) the notes of one exercise/session in db's transaction."""
+    if db.get_bind().dialect.name == "postgresql":
+        return
+    rowid = ref_id * 2 + NOTES_KINDS[kind]
+    db.execute(text("DELETE FROM notes_fts WHERE rowid = :rowid"), {"rowid": rowid})
+    if body and body.strip():
+        db.execute(
+            text("INSERT INTO notes_fts (rowid, body, kind, ref_id) VALUES (:rowid, :body, :kind, :ref_id)"),
+            {"rowid": rowid, "body": body, "kind": kind, "ref_id": ref_id}
+        )
+
+
+def unindex_notes(db, kind: str, ref_ids):
+    if db.get_bind().dialect.name == "postgresql" or not ref_ids:
+        return
+    db.execute(
+        text("DELETE FROM notes_fts WHERE rowid = :rowid"),
+        [{"rowid": ref_id * 2 + NOTES_KINDS[kind]} for ref_id in ref_ids]
+    )
+
+
+def _query_terms(query: str):
+    return re.findall(r"\w+", (query or "").lower())
+
+
+def search_notes(db, user_id: int, query: str, limit: int = 20, offset: int = 0):
+    """
+    Ranked matches over the global/own exercises' setup notes and the user's own
+    session notes. Every term must match, as a prefix ("cab notch" finds
+    "Cable at notch 5"). Fetches limit + 1 rows so the caller knows if there's a next page.
+    """
+    terms = _query_terms(query)
+    if not terms:
+        return []
+    params = {"uid": user_id, "n": limit + 1, "o": offset}
+
+    if db.get_bind().dialect.name == "postgresql":
+        params["q"] = " & ".join(f"{t}:*" for t in terms)
+        rows = db.execute(text(
+            "SELECT kind, ref_id, workout, exercise, date, score, "
+            "ts_headline('english', body, to_tsquery('english', :q), "
+            "'StartSel=[, StopSel=], MaxWords=15, MinWords=5, MaxFragments=1') AS snippet "
+            "FROM ("
+            " SELECT 'exercise' AS kind, e.id AS ref_id, w.name AS workout, e.name AS exercise, NULL AS date,"
+            "  e.setup_notes AS body, ts_rank(to_tsvector('english', coalesce(e.setup_notes, '')), q) AS score"
+            " FROM exercises e JOIN workouts w ON w.id = e.workout_id, to_tsquery('english', :q) q"
+            " WHERE to_tsvector('english', coalesce(e.setup_notes, '')) @@ q"
+            "  AND (e.user_id IS NULL OR e.user_id = :uid) AND e.deleted_at IS NULL"
+            " UNION ALL"
+            " SELECT 'session', s.id, w.name, NULL, s.start_time,"
+            "  s.notes, ts_rank(to_tsvector('english', coalesce(s.notes, '')), q)"
+            " FROM workout_sessions s LEFT JOIN workouts w ON w.id = s.workout_id, to_tsquery('english', :q) q"
+            " WHERE to_tsvector('english', coalesce(s.notes, '')) @@ q AND s.user_id = :uid"
+            ") r ORDER BY score DESC, kind, ref_id LIMIT :n OFFSET :o"
+        ), params).all()
+    else:
+        params["q"] = " ".join(f'"{t}"*' for t in terms)
+        # Joining back to the live rows also enforces visibility and skips anything stale
+        rows = db.execute(text(
+            "SELECT notes_fts.kind AS kind, notes_fts.ref_id AS ref_id, w.name AS workout, e.name AS exercise,"
+            " s.start_time AS date, -bm25(notes_fts) AS score,"
+            " snippet(notes_fts, 0, '[', ']', '…', 12) AS snippet "
+            "FROM notes_fts"
+            " LEFT JOIN exercises e ON notes_fts.kind = 'exercise' AND e.id = notes_fts.ref_id"
+            " LEFT JOIN workout_sessions s ON notes_fts.kind = 'session' AND s.id = notes_fts.ref_id"
+            " LEFT JOIN workouts w ON w.id = coalesce(e.workout_id, s.workout_id) "
+            "WHERE notes_fts MATCH :q"
+            " AND ((e.id IS NOT NULL AND e.deleted_at IS NULL AND (e.user_id IS NULL OR e.user_id = :uid)) OR s.user_id = :uid) "
+            "ORDER BY bm25(notes_fts), notes_fts.kind, notes_fts.ref_id LIMIT :n OFFSET :o"
+        ), params).all()
+
+    return [
+        {
+            "kind": r.kind,
+            "id": r.ref_id,
+            "workout": r.workout,
+            "exercise": r.exercise,
+            "date": r.date if r.date is None or isinstance(r.date, str) else r.date.isoformat(),
+            "snippet": r.snippet,
+            "score": float(r.score)
+        }
+        for r in rows
+    ]
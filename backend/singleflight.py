@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+
+from starlette.concurrency import run_in_threadpool
+
+
+class SingleFlight:
+    """
+    Request coalescing for hot read endpoints: identical concurrent calls (same
+    endpoint + normalized params) share one in-flight computation instead of each
+    doing the full DB work. The computation runs in the threadpool, so the event
+    loop keeps serving while it waits.
+
+    Read-your-writes: keys carry a per-user write epoch (bumped by DataManager
+    after every committed write, like session_router.mark_write), so a request
+    arriving after the user's write never joins a computation that started
+    before it. Writes without a user bump the global epoch.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight = {} # key -> asyncio.Task (only touched on the event loop)
+        self._epochs = {} # username (or "*") -> write counter
+        self._lock = threading.Lock() # mark_write runs on worker/writer threads
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(enabled=os.getenv("REQUEST_COALESCING", "1").lower() in ("1", "true", "yes"))
+
+    def mark_write(self, username: str = None):
+        with self._lock:
+            key = username or "*"
+            self._epochs[key] = self._epochs.get(key, 0) + 1
+
+    def _epoch(self, username: str = None):
+        with self._lock:
+            return self._epochs.get(username, 0), self._epochs.get("*", 0)
+
+    async def do(self, key: tuple, username: str, fn, *args):
+        """Result of fn(*args), shared with any identical call already in flight."""
+        self.requests += 1
+        if not self.enabled:
+            self.executions += 1
+            return await run_in_threadpool(fn, *args)
+
+        key = (key, self._epoch(username))
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        # shield: one caller disconnecting must not cancel the others' result
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception() # mark as retrieved even if every waiter went away
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / self.requests, 4) if self.requests else 0.0,
+            "in_flight": len(self._inflight),
+        }
+
+request_coalescer = SingleFlight.from_env()
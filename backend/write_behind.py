@@ -0,0 +1,251 @@
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy.exc import OperationalError
+
+from .database import SessionLocal, sqlite_writer
+from .models_db import SetLog as DBSetLog
+
+
+class WriteBehindBuffer:
+    """
+    Optional write-behind mode for set logging (SET_WRITE_BEHIND=1).
+
+    log_set appends the new set to a per-user in-memory queue and to a local
+    append-only journal (fsync'd), then acknowledges immediately. A background
+    thread flushes all pending sets in one transaction every flush_ms, or as soon
+    as max_batch sets are waiting. On startup the journal is replayed, so
+    acknowledged sets survive a crash.
+
+    Delivery is at-least-once: a crash between the DB commit and the journal
+    rewrite re-inserts that last batch on restart. A set the DB rejects on its
+    own (e.g. its exercise was purged meanwhile) is moved to the dead-letter
+    file instead of failing every later batch with it.
+
+    Pending sets have no id (and no version) until they are flushed, so a client
+    can only edit or delete them after re-reading them a flush later.
+    """
+
+    def __init__(self, journal_path: str, flush_ms: int = 250, max_batch: int = 50,
+                 dead_letter_path: str = "./set_dead_letter.jsonl"):
+        self.journal_path = journal_path
+        self.dead_letter_path = dead_letter_path
+        self.flush_interval = flush_ms / 1000
+        self.max_batch = max_batch
+
+        # Guards the pending sets. Hold it (via consistent()) to read DB + pending
+        # as one view; it is not held during the DB commit itself.
+        self.lock = threading.RLock()
+        self._committed = threading.Condition(self.lock)
+        self._committing = False
+        self._pending = {} # user_id -> [row dict]
+        self._size = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        # Called with the user ids of each committed batch (e.g. to invalidate caches)
+        self.on_flush = None
+
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._replay_journal()
+
+        self._thread = threading.Thread(target=self._run, name="set-write-behind", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls):
+        """Build the buffer from env vars, or return None when write-behind is off."""
+        if os.getenv("SET_WRITE_BEHIND", "0").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            journal_path=os.getenv("SET_WRITE_BEHIND_JOURNAL", "./set_journal.jsonl"),
+            flush_ms=int(os.getenv("SET_WRITE_BEHIND_FLUSH_MS", "250")),
+            max_batch=int(os.getenv("SET_WRITE_BEHIND_BATCH", "50")),
+            dead_letter_path=os.getenv("SET_WRITE_BEHIND_DEAD_LETTER", "./set_dead_letter.jsonl"),
+        )
+
+    def append(self, row: dict):
+        """Queue a set (column values of DBSetLog) for the next flush. Durable on return."""
+        self.append_many([row])
+
+    def append_many(self, rows: list[dict]):
+        """Queue several sets with a single journal write + fsync."""
+        rows = [
+            {**row, "timestamp": row.get("timestamp") or datetime.utcnow(), "journal_id": uuid.uuid4().hex}
+            for row in rows
+        ]
+        with self.lock:
+            self._journal.write("".join(json.dumps(row, default=str) + "\n" for row in rows))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+
+            for row in rows:
+                self._pending.setdefault(row["user_id"], []).append(row)
+            self._size += len(rows)
+            if self._size >= self.max_batch:
+                self._wakeup.set()
+
+    def pending_count(self, user_id: int, exercise_id: int, week: int) -> int:
+        with self.lock:
+            return sum(
+                1 for r in self._pending.get(user_id, [])
+                if r["exercise_id"] == exercise_id and r["week"] == week
+            )
+
+    def pending_sets(self, user_id: int, exercise_ids, weeks):
+        """Unflushed sets shaped like DB rows (id and version are None until flushed)."""
+        exercise_ids = set(exercise_ids)
+        with self.lock:
+            return [
+                SimpleNamespace(id=None, version=None, **_columns(r))
+                for r in self._pending.get(user_id, [])
+                if r["exercise_id"] in exercise_ids and r["week"] in weeks
+            ]
+
+    @contextmanager
+    def consistent(self):
+        """Hold the lock, once no batch is mid-commit: DB rows + pending sets read inside are one view."""
+        with self.lock:
+            while self._committing:
+                self._committed.wait()
+            yield
+
+    def flush(self):
+        """Write every pending set in a single transaction (on the SQLite writer thread, if any)."""
+        if sqlite_writer is not None:
+            sqlite_writer.submit(self._flush)
+        else:
+            self._flush()
+
+    def _flush(self):
+        with self.consistent():
+            if not self._size:
+                return
+            batch = [r for rows in self._pending.values() for r in rows]
+            self._committing = True
+
+        # Appends carry on meanwhile; readers needing DB + pending wait in consistent()
+        done = set()
+        try:
+            done = self._insert(batch)
+        finally:
+            with self.lock:
+                flushed_user_ids = list({r["user_id"] for r in batch if r["journal_id"] in done})
+                if done:
+                    self._remove(done)
+                self._committing = False
+                self._committed.notify_all()
+        if flushed_user_ids and self.on_flush:
+            self.on_flush(flushed_user_ids)
+
+    def _insert(self, batch) -> set:
+        """Commit batch; returns the journal ids that left the buffer (inserted or dead-lettered)."""
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(DBSetLog, [_columns(r) for r in batch])
+            db.commit()
+            return {r["journal_id"] for r in batch}
+        except OperationalError as e:
+            # The DB itself is unavailable/locked: keep everything for the next flush
+            db.rollback()
+            print(f"Write-behind flush failed, will retry: {e}")
+            return set()
+        except Exception as e:
+            db.rollback()
+            print(f"Write-behind batch rejected, retrying set by set: {e}")
+        finally:
+            db.close()
+
+        # Find the offending rows: each set on its own savepoint, one commit
+        done, dead = set(), []
+        db = SessionLocal()
+        try:
+            for r in batch:
+                try:
+                    with db.begin_nested():
+                        db.bulk_insert_mappings(DBSetLog, [_columns(r)])
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    dead.append({**r, "error": str(e), "failed_at": datetime.utcnow()})
+                done.add(r["journal_id"])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Write-behind flush failed, will retry: {e}")
+            return set()
+        finally:
+            db.close()
+        self._dead_letter(dead)
+        return done
+
+    def _dead_letter(self, rows):
+        if not rows:
+            return
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(row, default=str) + "\n" for row in rows))
+            f.flush()
+            os.fsync(f.fileno())
+        print(f"Write-behind: {len(rows)} set(s) rejected by the DB, moved to {self.dead_letter_path}")
+
+    def _remove(self, journal_ids):
+        for user_id in list(self._pending):
+            rows = [r for r in self._pending[user_id] if r["journal_id"] not in journal_ids]
+            if rows:
+                self._pending[user_id] = rows
+            else:
+                del self._pending[user_id]
+        self._size = sum(len(rows) for rows in self._pending.values())
+        self._rewrite_journal()
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._journal.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _rewrite_journal(self):
+        # Everything left in the journal is still pending (sets appended during the commit)
+        self._journal.close()
+        with open(self.journal_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, default=str) + "\n" for rows in self._pending.values() for r in rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.journal_path + ".tmp", self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-write; it was never acknowledged
+                    continue
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+                self._pending.setdefault(row["user_id"], []).append(row)
+                self._size += 1
+        if self._size:
+            print(f"Write-behind: replaying {self._size} journaled sets")
+            self.flush()
+
+
+def _columns(row: dict) -> dict:
+    """DBSetLog column values of a buffered row"""
+    return {k: v for k, v in row.items() if k != "journal_id"}
@@ -0,0 +1,196 @@
+"""
+Benchmark + accuracy check for NLPProcessor.parse_command.
+
+Runs a corpus of commands (built in below, or --corpus file.jsonl with
+{"text", "exercise", "sets": [[weight, reps], ...]} per line; "exercise": null
+means the command must be rejected) through the tokenizer-based parser and the
+previous regex/fuzzy-on-raw-text implementation, and reports:
+  - accuracy: exercise and every set must match exactly
+  - throughput: cold (memo cleared before every pass) and warm (memoized)
+
+Exits non-zero if the current parser's accuracy is below --min-accuracy, so it
+can gate changes to the grammar.
+
+Usage:
+  python bench_nlp.py [--runs 200] [--corpus corpus.jsonl] [--min-accuracy 1.0] [--verbose]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.nlp import NLPProcessor
+
+try:
+    from fuzzywuzzy import process
+except ImportError:
+    process = None
+
+EXERCISES = [
+    "Bench press", "Inclined dumbell press", "Triceps bar push down", "Chest Decline cable",
+    "Shoulder cable side raise/press", "Triceps Skull crusher", "Squat", "Romanian deadlift",
+    "Leg press", "Lat pulldown", "Seated cable row", "Barbell curl", "Pull up",
+]
+
+CORPUS = [
+    ("bench 100kg 5 reps", "Bench press", [(100, 5)]),
+    ("bench press 100 kg for 5 reps", "Bench press", [(100, 5)]),
+    ("Bench 80 x 8", "Bench press", [(80, 8)]),
+    ("bench 80x8", "Bench press", [(80, 8)]),
+    ("bench 100 for 5", "Bench press", [(100, 5)]),
+    ("bench 100 5", "Bench press", [(100, 5)]),
+    ("bench 102.5kg x 3", "Bench press", [(102.5, 3)]),
+    ("bench 3x5 at 100", "Bench press", [(100, 5)] * 3),
+    ("bench 3 sets of 5 @ 100kg", "Bench press", [(100, 5)] * 3),
+    ("bench press 5x5 with 90", "Bench press", [(90, 5)] * 5),
+    ("squat 100x5, 105x5, 110x3", "Squat", [(100, 5), (105, 5), (110, 3)]),
+    ("squat 100x5; 105 for 5 then 110kg 3 reps", "Squat", [(100, 5), (105, 5), (110, 3)]),
+    ("squat 100x5x3", "Squat", [(100, 5)] * 3),
+    ("squat 140 kg 3 reps", "Squat", [(140, 3)]),
+    ("squats 12 reps at 60", "Squat", [(60, 12)]),
+    ("squat 5 reps 140kg", "Squat", [(140, 5)]),
+    ("did squat 120 × 6", "Squat", [(120, 6)]),
+    ("rdl 90 for 10", "Romanian deadlift", [(90, 10)]),
+    ("romanian deadlift 90kg x 10, 90kg x 9", "Romanian deadlift", [(90, 10), (90, 9)]),
+    ("leg press 200 x 12", "Leg press", [(200, 12)]),
+    ("leg press 3x12 at 180", "Leg press", [(180, 12)] * 3),
+    ("lat pulldown 60 for 10", "Lat pulldown", [(60, 10)]),
+    ("pulldown 55kg 12 reps", "Lat pulldown", [(55, 12)]),
+    ("seated row 70x10 then 75x8", "Seated cable row", [(70, 10), (75, 8)]),
+    ("cable row 4 sets of 10 at 65", "Seated cable row", [(65, 10)] * 4),
+    ("squat 3 sets of 5 100kg", "Squat", [(100, 5)] * 3),
+    ("pull ups 3 sets of 8", "Pull up", [(0, 8)] * 3),
+    ("pull up 4 sets of 6 reps", "Pull up", [(0, 6)] * 4),
+    ("bench 3 sets 5 reps 100kg", "Bench press", [(100, 5)] * 3),
+    ("bench 3 sets x 5 at 100", "Bench press", [(100, 5)] * 3),
+    ("bench 3 x 5 x 100 kg", "Bench press", [(100, 5)] * 3),
+    ("bench 100kg x 5 x 3", "Bench press", [(100, 5)] * 3),
+    ("curl 30 x 12", "Barbell curl", [(30, 12)]),
+    ("barbell curls 12 reps with 25 kg", "Barbell curl", [(25, 12)]),
+    ("skull crusher 25 for 12", "Triceps Skull crusher", [(25, 12)]),
+    ("skullcrushers 3x10 @ 20", "Triceps Skull crusher", [(20, 10)] * 3),
+    ("tricep pushdown 35 x 15", "Triceps bar push down", [(35, 15)]),
+    ("triceps bar push down 30kg 12 reps, 35kg 10 reps", "Triceps bar push down", [(30, 12), (35, 10)]),
+    ("incline dumbbell press 32 x 10", "Inclined dumbell press", [(32, 10)]),
+    ("inclined db press 30kg for 12", "Inclined dumbell press", [(30, 12)]),
+    ("decline cable 20 x 15", "Chest Decline cable", [(20, 15)]),
+    ("side raise 10 for 15", "Shoulder cable side raise/press", [(10, 15)]),
+    ("shoulder cable side raise 12.5 x 12", "Shoulder cable side raise/press", [(12.5, 12)]),
+    # Rejected: ambiguous numbers, unknown exercise, silly expansion
+    ("bench 100", None, None),
+    ("bench press", None, None),
+    ("zercher carry 60 x 30", None, None),
+    ("bench 100x5x50", None, None),
+    ("bench 100 x 5 x 0", None, None),
+    ("squat 100x5 110", None, None),
+]
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                sets = [tuple(s) for s in row["sets"]] if row.get("sets") else None
+                corpus.append((row["text"], row.get("exercise"), sets))
+    return corpus
+
+
+def legacy_parse(text, available_exercises):
+    """The previous implementation: fuzzy match over the raw text, then up to five regexes in sequence."""
+    text = text.lower()
+    best_match, score = process.extractOne(text, available_exercises)
+    if score < 60:
+        return None, "Exercise not found"
+    weight = reps = 0
+    kg_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:kg|kilos|lbs|pounds)', text)
+    if kg_match:
+        weight = float(kg_match.group(1))
+    reps_match = re.search(r'(\d+)\s*(?:reps|repetitions)', text)
+    if reps_match:
+        reps = int(reps_match.group(1))
+    if weight > 0 and reps > 0:
+        return {"exercise": best_match, "sets": [{"weight": weight, "reps": reps}]}, None
+    x_match = re.search(r'(\d+(?:\.\d+)?)\s*[xX*]\s*(\d+)', text)
+    if x_match:
+        return {"exercise": best_match, "sets": [{"weight": float(x_match.group(1)), "reps": int(x_match.group(2))}]}, None
+    for_match = re.search(r'(\d+(?:\.\d+)?)\s*for\s*(\d+)', text)
+    if for_match:
+        return {"exercise": best_match, "sets": [{"weight": float(for_match.group(1)), "reps": int(for_match.group(2))}]}, None
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', text)]
+    if len(numbers) >= 2:
+        return {"exercise": best_match, "sets": [{"weight": numbers[0], "reps": int(numbers[1])}]}, None
+    return None, "Could not extract both weight and reps"
+
+
+def is_correct(result, expected_exercise, expected_sets):
+    if expected_exercise is None:
+        return result is None
+    if result is None or result["exercise"] != expected_exercise:
+        return False
+    return [(s["weight"], s["reps"]) for s in result["sets"]] == [(float(w), r) for w, r in expected_sets]
+
+
+def accuracy(label, parse, corpus, verbose):
+    correct = 0
+    for text, exercise, sets in corpus:
+        result, error = parse(text, EXERCISES)
+        if is_correct(result, exercise, sets):
+            correct += 1
+        elif verbose:
+            got = error if result is None else f"{result['exercise']} {[(s['weight'], s['reps']) for s in result['sets']]}"
+            print(f"  [{label}] {text!r}: expected {exercise} {sets}, got {got}")
+    return correct / len(corpus)
+
+
+def throughput(parse, corpus, runs, before_pass=None):
+    start = time.perf_counter()
+    for _ in range(runs):
+        if before_pass:
+            before_pass()
+        for text, _, _ in corpus:
+            parse(text, EXERCISES)
+    return runs * len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--corpus", help="JSONL corpus (defaults to the built-in one)")
+    parser.add_argument("--min-accuracy", type=float, default=1.0)
+    parser.add_argument("--verbose", action="store_true", help="print every mismatch")
+    args = parser.parse_args()
+
+    if not process:
+        print("fuzzywuzzy is required")
+        sys.exit(1)
+
+    corpus = load_corpus(args.corpus) if args.corpus else CORPUS
+    nlp = NLPProcessor()
+
+    print(f"{len(corpus)} commands, {args.runs} passes")
+    print("-" * 70)
+    legacy_acc = accuracy("legacy", legacy_parse, corpus, args.verbose)
+    current_acc = accuracy("current", nlp.parse_command, corpus, args.verbose)
+    legacy_ops = throughput(legacy_parse, corpus, args.runs)
+    cold_ops = throughput(nlp.parse_command, corpus, args.runs, before_pass=NLPProcessor.clear_cache)
+    warm_ops = throughput(nlp.parse_command, corpus, args.runs)
+
+    print(f"{'legacy':<14} accuracy {legacy_acc:>6.1%} {legacy_ops:>12.0f} parses/s")
+    print(f"{'current cold':<14} accuracy {current_acc:>6.1%} {cold_ops:>12.0f} parses/s")
+    print(f"{'current warm':<14} {'':>15} {warm_ops:>12.0f} parses/s")
+    print("-" * 70)
+    print(f"cold speedup {cold_ops / legacy_ops:.2f}x, memoized {warm_ops / legacy_ops:.2f}x")
+
+    if current_acc < args.min_accuracy:
+        print(f"FAIL: accuracy {current_acc:.1%} below {args.min_accuracy:.1%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
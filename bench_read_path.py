@@ -0,0 +1,129 @@
+"""
+Benchmark: lean Core read path vs. the old ORM path for GET /api/workout/{type}.
+
+Seeds a throwaway SQLite database with one workout whose exercises have large
+per-week set counts, then compares latency and allocations (tracemalloc) of
+DataManager.get_workout_data against the previous ORM implementation.
+
+Usage:
+  python bench_read_path.py [--exercises 8] [--weeks 12] [--sets-per-week 40] [--runs 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Point the app at a scratch database before backend.database is imported
+_tmp_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.database import SessionLocal, Base, engine
+from backend.models_db import User, Workout, Exercise, SetLog as DBSetLog
+from backend.models import Exercise as APIExercise, SetLog as APISetLog
+from backend.data_manager import DataManager
+
+
+def seed(n_exercises, n_weeks, sets_per_week):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(username="bench")
+        workout = Workout(name="Push")
+        db.add_all([user, workout])
+        db.commit()
+
+        exercises = [Exercise(workout_id=workout.id, name=f"Exercise {i}", split="A") for i in range(n_exercises)]
+        db.add_all(exercises)
+        db.commit()
+
+        db.bulk_insert_mappings(DBSetLog, [
+            {"user_id": user.id, "exercise_id": ex.id, "week": week, "set_number": n + 1, "weight": 60 + n, "reps": 8}
+            for ex in exercises
+            for week in range(1, n_weeks + 1)
+            for n in range(sets_per_week)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def orm_get_workout_data(dm, workout_type, week, username, split="A"):
+    """The previous implementation: ORM entities, two queries per exercise, Pydantic copies."""
+    db = SessionLocal()
+    try:
+        workout = db.query(Workout).filter(Workout.name == workout_type).first()
+        if not workout:
+            return []
+        user = dm.ensure_user(db, username)
+        exercises_db = db.query(Exercise).filter(
+            Exercise.workout_id == workout.id,
+            (Exercise.split == split) | (Exercise.split == None)
+        ).all()
+        result = []
+        for ex in exercises_db:
+            sets_db = db.query(DBSetLog).filter(
+                DBSetLog.user_id == user.id,
+                DBSetLog.exercise_id == ex.id,
+                DBSetLog.week == week
+            ).order_by(DBSetLog.set_number).all()
+            current_sets = [APISetLog(id=s.id, set_number=s.set_number, weight=s.weight, reps=s.reps) for s in sets_db]
+            prev_summary = None
+            if week > 1:
+                prev_sets = db.query(DBSetLog).filter(
+                    DBSetLog.user_id == user.id,
+                    DBSetLog.exercise_id == ex.id,
+                    DBSetLog.week == week - 1
+                ).order_by(DBSetLog.set_number).all()
+                if prev_sets:
+                    prev_summary = ", ".join([f"{s.weight}x{s.reps}" for s in prev_sets])
+            result.append(APIExercise(id=ex.id, name=ex.name, sets=current_sets,
+                                      prev_week_summary=prev_summary, setup_notes=ex.setup_notes))
+        return result
+    finally:
+        db.close()
+
+
+def measure(label, fn, runs):
+    fn()  # warm up (statement cache, catalog)
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / runs
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label:<8} {elapsed_ms:>10.2f} ms/call {peak / 1024:>12.1f} KiB peak allocated")
+    return elapsed_ms, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--exercises", type=int, default=8)
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--sets-per-week", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.exercises, args.weeks, args.sets_per_week)
+    print(f"{args.exercises} exercises x {args.weeks} weeks x {args.sets_per_week} sets/week, week={args.weeks}")
+    print("-" * 70)
+
+    dm = DataManager()
+    # Both paths share one DataManager: only the per-call query work is compared
+    orm_ms, orm_peak = measure("orm", lambda: orm_get_workout_data(dm, "Push", args.weeks, "bench"), args.runs)
+    core_ms, core_peak = measure("core", lambda: dm.get_workout_data("Push", args.weeks, "bench"), args.runs)
+
+    print("-" * 70)
+    print(f"speedup {orm_ms / core_ms:.2f}x, peak memory {orm_peak / max(core_peak, 1):.2f}x lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: mixed read/write load against SQLite, default vs. tuned profile.
+
+Runs concurrent threads calling DataManager directly (mostly get_workout_data,
+some log_set) for a fixed duration, once with SQLITE_TUNING=0 (plain SQLite,
+no writer queue) and once with the tuned profile (WAL + pragmas + single-writer
+queue). Each mode runs in its own process because the profile is applied when
+backend.database is imported.
+
+Usage:
+  python bench_sqlite_load.py [--threads 8] [--seconds 10] [--write-ratio 0.2]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def run_mode(args):
+    """Child process: seed a scratch DB and hammer it."""
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from backend.database import SessionLocal, Base, engine
+    from backend.models_db import User, Workout, Exercise
+    from backend.data_manager import DataManager
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        workout = Workout(name="Push")
+        db.add(workout)
+        db.commit()
+        db.add_all([Exercise(workout_id=workout.id, name=name, split="A") for name in ("Bench press", "Dips", "Triceps bar push down")])
+        db.add_all([User(username=f"user{i}") for i in range(args.threads)])
+        db.commit()
+    finally:
+        db.close()
+
+    dm = DataManager()
+    deadline = time.perf_counter() + args.seconds
+    read_latencies, write_latencies, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker(i):
+        username = f"user{i}"
+        rng = random.Random(i)
+        while time.perf_counter() < deadline:
+            is_write = rng.random() < args.write_ratio
+            start = time.perf_counter()
+            try:
+                if is_write:
+                    ok, message = dm.log_set("Push", "Bench press", 100, 5, 1, username)
+                    if not ok:
+                        raise RuntimeError(message)
+                else:
+                    dm.get_workout_data("Push", 1, username)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e).splitlines()[0])
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                (write_latencies if is_write else read_latencies).append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    def pct(values, p):
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(len(values) * p))], 2) if values else None
+
+    print(json.dumps({
+        "reads": len(read_latencies),
+        "writes": len(write_latencies),
+        "errors": len(errors),
+        "sample_error": errors[0] if errors else None,
+        "read_p50_ms": pct(read_latencies, 0.5),
+        "read_p95_ms": pct(read_latencies, 0.95),
+        "write_p50_ms": pct(write_latencies, 0.5),
+        "write_p95_ms": pct(write_latencies, 0.95),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args)
+        return
+
+    print(f"{args.threads} threads, {args.seconds}s, {int(args.write_ratio * 100)}% writes")
+    print("-" * 70)
+    for label, tuning in (("default", "0"), ("tuned", "1")):
+        tmp_dir = tempfile.mkdtemp()
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp_dir, 'load.db')}",
+            "SQLITE_TUNING": tuning,
+            "CACHE_BACKEND": "none",
+            "SET_WRITE_BEHIND": "0",
+        }
+        env.pop("DATABASE_READ_URL", None)
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--threads", str(args.threads),
+             "--seconds", str(args.seconds), "--write-ratio", str(args.write_ratio)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        ops = (result["reads"] + result["writes"]) / args.seconds
+        print(f"{label:<8} {ops:>8.0f} ops/s  reads p50/p95 {result['read_p50_ms']}/{result['read_p95_ms']} ms"
+              f"  writes p50/p95 {result['write_p50_ms']}/{result['write_p95_ms']} ms  errors {result['errors']}")
+        if result["sample_error"]:
+            print(f"         e.g. {result['sample_error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Find and merge duplicate workouts/exercises ("Pull 🧗", "Pulll", "Jeff Pull Workout",
+"Bench press" vs "Bench Press ", ...).
+
+Prints the merge plan and changes nothing unless --apply is given.
+
+Usage:
+  python dedup_data.py [--threshold 90] [--exact-only] [--apply]
+"""
+import argparse
+import json
+
+from backend.database import engine
+from backend.dedup import build_merge_plan, apply_merge_plan
+
+DEFAULT_WORKOUTS = ("Push", "Pull", "Legs")
+
+def dedup_data():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=int, default=90, help="fuzz.ratio needed to merge two names")
+    parser.add_argument("--exact-only", action="store_true", help="only merge names that normalize identically")
+    parser.add_argument("--apply", action="store_true", help="apply the plan (default: dry run)")
+    args = parser.parse_args()
+
+    threshold = None if args.exact_only else args.threshold
+
+    with engine.begin() as conn:
+        plan = build_merge_plan(conn, threshold, preferred_workouts=DEFAULT_WORKOUTS)
+        print(json.dumps(plan, indent=2, ensure_ascii=False))
+
+        if not args.apply:
+            print("\nDry run - nothing changed. Re-run with --apply to merge.")
+            return
+
+        result = apply_merge_plan(conn, plan)
+        print(f"\n✓ Applied: {result}")
+
+if __name__ == "__main__":
+    dedup_data()
@@ -1,12 +1,12 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, useSearchParams, Link } from 'react-router-dom';
-import { getWorkout, logSet, updateSet, deleteSet, parseCommand, startSession, endSession, updateExerciseNotes } from '../services/api';
+import { getWorkout, getPlan, logSet, updateSet, deleteSet, parseCommand, startSession, endSession, waitForJob, updateExerciseNotes } from '../services/api';
 import { ChevronLeft, ChevronDown, Mic, Check, Trash2, Trophy, Clock, BarChart2, Activity } from 'lucide-react';
 import { useUser } from '../context/UserContext';
 import EditSetModal from './EditSetModal';
 import { useNavigate } from 'react-router-dom';
 
-const ExerciseCard = ({ exercise, onLog, onUpdate, onDelete, onDeleteExercise, week, isEditing, onUpdateNotes, workoutType, user, split }) => {
+const ExerciseCard = ({ exercise, target, onLog, onUpdate, onDelete, onDeleteExercise, week, isEditing, onUpdateNotes, workoutType, user, split }) => {
     const [expanded, setExpanded] = useState(false);
     const [notesExpanded, setNotesExpanded] = useState(false);
     const sets = exercise.sets || [];
@@ -29,7 +29,7 @@ const ExerciseCard = ({ exercise, onLog, onUpdate, onDelete, onDeleteExercise, w
     };
 
     const handleEditSave = async (id, w, r) => {
-        await onUpdate(id, w, r);
+        await onUpdate(id, w, r, editingSet.version);
         setEditingSet(null);
     };
 
@@ -47,7 +47,10 @@ const ExerciseCard = ({ exercise, onLog, onUpdate, onDelete, onDeleteExercise, w
                 <span style={{ fontWeight: '600', fontSize: '1.2rem' }}>{exercise.name}</span>
                 <div style={{ display: 'flex', alignItems: 'center', gap: '8px' }}>
                     {exercise.prev_week_summary && (
-                        <span style={{ fontSize: '0.85rem', color: 'var(--text-dim)' }}>Last: {exercise.prev_week_summary}</span>
+                        <span style={{ fontSize: '0.85rem', color: 'var(--text-dim)' }}>Last{exercise.last_performed_week ? ` (Wk ${exercise.last_performed_week})` : ''}: {exercise.prev_week_summary}</span>
+                    )}
+                    {target && (
+                        <span style={{ fontSize: '0.85rem', color: 'var(--primary-color)' }}>Target: {target}</span>
                     )}
                     {onDeleteExercise && isEditing && (
                         <button
@@ -239,6 +242,7 @@ export default function WorkoutView() {
     const navigate = useNavigate();
 
     const [exercises, setExercises] = useState([]);
+    const [targets, setTargets] = useState({}); // exercise id -> "100x8, 100x8"
     const [loading, setLoading] = useState(true);
     const [listening, setListening] = useState(false);
     const [voiceStatus, setVoiceStatus] = useState('');
@@ -285,6 +289,16 @@ export default function WorkoutView() {
         load();
     }, [type, week, split, trigger, user]);
 
+    // Targets only change with the weekly plan run / a finished session, not with every logged set
+    useEffect(() => {
+        if (!user) return;
+        getPlan(type, week, user, split)
+            .then(data => setTargets(Object.fromEntries((data.exercises || []).map(ex => [
+                ex.exercise_id, ex.sets.map(s => `${s.weight}x${s.reps}`).join(', ')
+            ]))))
+            .catch(e => console.error(e));
+    }, [type, week, split, user]);
+
     // Scroll to active week
     useEffect(() => {
         const el = document.getElementById(`week-${week}`);
@@ -329,13 +343,20 @@ export default function WorkoutView() {
         await handleStartWorkout();
     };
 
-    const handleUpdateSet = async (id, weight, reps) => {
-        await updateSet({
-            set_id: id,
-            weight: weight,
-            reps: reps,
-            user: user
-        });
+    const handleUpdateSet = async (id, weight, reps, version) => {
+        try {
+            await updateSet({
+                set_id: id,
+                weight: weight,
+                reps: reps,
+                user: user,
+                version: version
+            });
+        } catch (e) {
+            if (e.response?.status !== 409) throw e;
+            const current = e.response.data.set;
+            alert(`This set was changed on another device (now ${current.weight}x${current.reps}). Reloaded it, edit again if needed.`);
+        }
         setTrigger(t => t + 1);
     };
 
@@ -455,6 +476,14 @@ export default function WorkoutView() {
             if (res.success) {
                 setSummaryData(res);
                 setShowSummary(true);
+                // Volume / PRs are computed in the background
+                if (res.job_id) {
+                    waitForJob(res.job_id, user).then((job) => {
+                        if (job && job.status === "done") {
+                            setSummaryData((prev) => ({ ...prev, ...job.result }));
+                        }
+                    }).catch(console.error);
+                }
                 // Clear session
                 setStartTime(null);
                 setSessionId(null);
@@ -580,6 +609,7 @@ export default function WorkoutView() {
                         <div key={ex.id} className="animate-slide-up" style={{ animationDelay: `${i * 0.05}s` }}>
                             <ExerciseCard
                                 exercise={ex}
+                                target={targets[ex.id]}
                                 onLog={handleLogSet}
                                 onUpdate={handleUpdateSet}
                                 onDelete={handleDeleteSet}
@@ -702,7 +732,7 @@ export default function WorkoutView() {
                                 <div className="card" style={{ display: 'flex', flexDirection: 'column', alignItems: 'center', padding: '16px' }}>
                                     <BarChart2 size={24} color="var(--success-color)" style={{ marginBottom: '8px' }} />
                                     <span style={{ fontSize: '0.9rem', color: 'var(--text-dim)' }}>Volume</span>
-                                    <span style={{ fontSize: '1.5rem', fontWeight: 'bold' }}>{(summaryData.total_volume / 1000).toFixed(1)}k</span>
+                                    <span style={{ fontSize: '1.5rem', fontWeight: 'bold' }}>{summaryData.total_volume == null ? '…' : `${(summaryData.total_volume / 1000).toFixed(1)}k`}</span>
                                     <span style={{ fontSize: '0.8rem', color: 'var(--text-dim)' }}>kg</span>
                                 </div>
                             </div>
@@ -6,6 +6,13 @@ const api = axios.create({
 
 console.log('API Base URL:', api.defaults.baseURL);
 
+// Write endpoints accept an Idempotency-Key header. The key lives in the request
+// config, so any retry of the same request re-sends it and the backend replays
+// the original result instead of logging the set / session again.
+const idempotencyHeaders = (key = crypto.randomUUID()) => ({
+  headers: { 'Idempotency-Key': key },
+});
+
 export const getUsers = async () => {
     const response = await api.get('/users');
     return response.data; // returns { users: [] }
@@ -21,6 +28,28 @@ export const getWorkout = async (type, week, user, split = "A") => {
   return response.data;
 };
 
+// Every week of a block (e.g. 1..8) in one request
+export const getWorkoutWeeks = async (type, startWeek, endWeek, user, split = "A") => {
+  const response = await api.get(`/workout/${type}/weeks`, {
+    params: { weeks: `${startWeek}..${endWeek}`, user, split }
+  });
+  return response.data;
+};
+
+// Global workouts + default exercises. The versioned URL is cached by the CDN
+// for good; the version changes whenever an admin edits the defaults.
+export const getCatalog = async () => {
+  const { data: { version } } = await api.get('/catalog/version');
+  const response = await api.get('/catalog', { params: { v: version } });
+  return response.data;
+};
+
+// Suggested weight/reps per exercise for a week (precomputed weekly)
+export const getPlan = async (type, week, user, split = "A") => {
+  const response = await api.get(`/plan/${type}`, { params: { week, user, split } });
+  return response.data;
+};
+
 export const getWorkouts = async (user) => {
   const response = await api.get('/workouts', { params: { user } });
   // If we start filtering by user on backend for real, we'd pass user here:
@@ -30,8 +59,8 @@ export const getWorkouts = async (user) => {
 
 // ...
 
-export const logSet = async (payload) => {
-  const response = await api.post('/log', payload);
+export const logSet = async (payload, idempotencyKey) => {
+  const response = await api.post('/log', payload, idempotencyHeaders(idempotencyKey));
   return response.data;
 };
 
@@ -50,6 +79,16 @@ export const parseCommand = async (text, workoutType, user) => {
   return response.data;
 };
 
+// Parses a command like "squat 100x5, 105x5" and logs every set in one request
+export const parseAndLog = async (text, workoutType, week, user, idempotencyKey) => {
+  const response = await api.post(
+    '/parse-and-log',
+    { text, workout_type: workoutType, week, user },
+    idempotencyHeaders(idempotencyKey)
+  );
+  return response.data;
+};
+
 export const healthCheck = async () => {
     try {
         const response = await api.get('/health');
@@ -81,21 +120,49 @@ export const deleteWorkout = async (workoutType) => {
     return response.data;
 };
 
-export const startSession = async (user, workoutType, split = "A") => {
-    const response = await api.post('/session/start', { user, workout_type: workoutType, split });
+// Undo a delete: { kind: "workout" | "exercise" | "set", user, workout_type, exercise_name, set_id }
+export const restoreDeleted = async (payload) => {
+    const response = await api.post('/restore', payload);
+    return response.data;
+};
+
+export const startSession = async (user, workoutType, split = "A", idempotencyKey) => {
+    const response = await api.post('/session/start', { user, workout_type: workoutType, split }, idempotencyHeaders(idempotencyKey));
     return response.data;
 };
 
-export const endSession = async (sessionId, user, notes = "") => {
-    const response = await api.post('/session/end', { session_id: sessionId, user, notes });
+export const endSession = async (sessionId, user, notes = "", idempotencyKey) => {
+    const response = await api.post('/session/end', { session_id: sessionId, user, notes }, idempotencyHeaders(idempotencyKey));
     return response.data;
 };
 
+export const getJob = async (jobId, user) => {
+    const response = await api.get(`/jobs/${jobId}`, { params: { user } });
+    return response.data; // { status: "pending" | "running" | "done" | "failed", result }
+};
+
+// Polls a background job until it is done or failed (or we give up)
+export const waitForJob = async (jobId, user, { intervalMs = 1000, attempts = 30 } = {}) => {
+    for (let i = 0; i < attempts; i++) {
+        const job = await getJob(jobId, user);
+        if (!job.success || job.status === "done" || job.status === "failed") {
+            return job;
+        }
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    return null;
+};
+
 export const getDashboardStats = async (user) => {
     const response = await api.get(`/dashboard/stats?user=${user}`);
     return response.data;
 };
 
+export const getSessionHistory = async (user, cursor = null, limit = 20) => {
+    const response = await api.get('/sessions', { params: { user, cursor, limit } });
+    return response.data; // { sessions: [], next_cursor }
+};
+
 export const updateExerciseNotes = async (workoutType, exerciseName, setupNotes, user, split = "A") => {
     const response = await api.put('/exercise/notes', {
         workout_type: workoutType,
@@ -1,10 +1,11 @@
 from backend.database import SessionLocal
 from backend.models_db import Exercise, Workout
+from sqlalchemy.orm import joinedload
 
 def inspect_exercises():
     db = SessionLocal()
     try:
-        exercises = db.query(Exercise).all()
+        exercises = db.query(Exercise).options(joinedload(Exercise.workout)).all()
         print(f"{'ID':<5} {'Workout':<15} {'Name':<30} {'User ID':<10} {'Split':<5}")
         print("-" * 70)
         for e in exercises:
@@ -1,5 +1,6 @@
 from backend.database import engine, Base
 from backend.models_db import User, Workout, Exercise, SetLog, WorkoutSession
+from backend.movements import ensure_movement
 
 def reset_database():
     print("Resetting database...")
@@ -47,6 +48,7 @@ def reset_database():
                 name=ex_name,
                 default_sets=3,
                 split="A",
+                movement_id=ensure_movement(db, ex_name),
                 user_id=None # Global default
             )
             db.add(ex)
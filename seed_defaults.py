@@ -2,6 +2,7 @@
 from backend.database import SessionLocal
 from backend.models_db import Workout, Exercise
 from backend.data_manager import DataManager
+from backend.movements import ensure_movement
 
 def seed_defaults():
     db = SessionLocal()
@@ -37,6 +38,7 @@ def seed_defaults():
                     name=ex_name,
                     default_sets=3,
                     split="A",
+                    movement_id=ensure_movement(db, ex_name),
                     # user_id is null for global defaults
                     user_id=None 
                 )
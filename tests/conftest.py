@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+# Must run before backend.database is imported: a throwaway SQLite database, and
+# strict loading, so a relationship a read path forgot to eager-load raises
+_tmp = tempfile.mkdtemp(prefix="gym_buddy_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["SQL_STRICT_LOADING"] = "1"
+os.environ.setdefault("CACHE_BACKEND", "none")
+os.environ.setdefault("JOB_WORKER", "0")
+
+import pytest
+
+from backend import models_db  # noqa: F401 - registers the models on Base.metadata
+from backend.database import Base, engine
+from backend.search import ensure_notes_index
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        ensure_notes_index(conn)
+    yield
+    engine.dispose()
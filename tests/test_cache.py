@@ -0,0 +1,78 @@
+import pytest
+
+from backend import cache as cache_module
+from backend.cache import MemoryLRUCache, SQLiteCache, RedisCache
+from backend.data_manager import DataManager
+from backend.database import session_router
+
+
+def _fake_redis():
+    return pytest.importorskip("fakeredis").FakeRedis()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryLRUCache(max_entries=4)
+    if request.param == "sqlite":
+        return SQLiteCache(str(tmp_path / "cache.db"), max_entries=4)
+    return RedisCache(client=_fake_redis())
+
+
+def test_get_set_roundtrip(cache):
+    assert cache.get("k") is None
+    cache.set("k", {"sets": [1, 2]})
+    assert cache.get("k") == {"sets": [1, 2]}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_bump_orphans_entries(cache):
+    key = f"users:{cache.generation('users')}"
+    cache.set(key, ["alice"])
+    assert cache.generation("users") == int(key.split(":")[1])
+
+    cache.bump("users")
+    assert cache.get(f"users:{cache.generation('users')}") is None
+
+
+def test_generation_starts_from_clock(cache):
+    # An evicted generation must not restart at a value old entries were built on
+    assert cache.generation("fresh") > 1_000_000
+
+
+def test_ttl_expires(cache, monkeypatch):
+    cache.set("short", 1, ttl=1)
+    assert cache.get("short") == 1
+    if isinstance(cache, RedisCache):
+        cache.client.expire(cache.prefix + "short", 0)
+    else:
+        clock = cache_module.time.monotonic() if isinstance(cache, MemoryLRUCache) else cache_module.time.time()
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: clock + 10)
+        monkeypatch.setattr(cache_module.time, "time", lambda: clock + 10)
+    assert cache.get("short") is None
+
+
+def test_redis_keys_are_prefixed():
+    client = _fake_redis()
+    cache = RedisCache(client=client, prefix="t:")
+    cache.set("k", 1)
+    cache.bump("users")
+    assert set(client.keys()) == {b"t:k", b"t:gen:users"}
+
+
+def test_replica_reads_are_cached_with_ttl(monkeypatch):
+    dm = DataManager()
+    dm.cache = MemoryLRUCache()
+    monkeypatch.setattr(session_router, "is_replica", lambda db: True)
+    dm.get_users()
+    entries = [v for k, v in dm.cache._data.items() if k.startswith("users:")]
+    assert entries and entries[0][1] is not None
+
+
+def test_primary_reads_are_cached_for_good():
+    dm = DataManager()
+    dm.cache = MemoryLRUCache()
+    dm.get_users()
+    entries = [v for k, v in dm.cache._data.items() if k.startswith("users:")]
+    assert entries and entries[0][1] is None
@@ -0,0 +1,31 @@
+"""WorkoutCatalog's cached user ids across workers without a shared cache."""
+from backend.data_manager import DataManager
+
+USER = "ghost"
+
+
+def _last_set_id(dm):
+    dm.flush_pending_sets()
+    exercise, = dm.get_workout_data("Ghost Push", 1, USER)
+    return exercise["sets"][-1]["id"]
+
+
+def test_write_after_delete_user_in_another_worker():
+    # Two workers: their catalogs only share the database
+    this, other = DataManager(), DataManager()
+    this.create_workout("Ghost Push", "admin")
+    this.add_exercise("Ghost Push", "Dips", 3, None, "A")
+    assert this.log_set("Ghost Push", "Dips", 10, 8, 1, USER)[0]
+    old_id = this.catalog.user_id(None, USER, this._read_user_id)
+
+    assert other.delete_user(USER)[0]
+    # SQLite may hand the freed id to the next new user
+    assert other.log_set("Ghost Push", "Dips", 30, 5, 1, "ghost_neighbour")[0]
+    assert other.log_set("Ghost Push", "Dips", 20, 5, 1, USER)[0]
+    set_id = _last_set_id(other)
+
+    # this worker still has the deleted user's id cached
+    assert this.catalog._user_ids[USER] == old_id
+    status, _, version, _ = this.update_set(set_id, 22.5, 5, USER, version=1)
+    assert (status, version) == ("updated", 2)
+    assert this.catalog._user_ids[USER] == other.catalog.user_id(None, USER, other._read_user_id) != old_id
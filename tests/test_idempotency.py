@@ -0,0 +1,62 @@
+"""Idempotency-Key handling of the write endpoints (backend/idempotency.py)."""
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.idempotency import IdempotencyStore
+
+USER = "idem_user"
+
+
+@pytest.fixture(scope="module")
+def client():
+    assert main.data_manager.create_workout("Idem Push", USER)[0]
+    assert main.data_manager.add_exercise("Idem Push", "Bench press", 3, USER, "A")[0]
+    # No startup event: the schema comes from conftest
+    return TestClient(main.app)
+
+
+def _log(client, key, exercise="Bench press", weight=100):
+    return client.post(
+        "/api/log",
+        json={"workout_type": "Idem Push", "exercise_name": exercise, "weight": weight, "reps": 5, "week": 1, "user": USER},
+        headers={"Idempotency-Key": key},
+    )
+
+
+def _bench_sets():
+    main.data_manager.flush_pending_sets()
+    exercises = main.data_manager.get_workout_data("Idem Push", 1, USER)
+    return [(s["weight"], s["reps"]) for e in exercises if e["name"] == "Bench press" for s in e["sets"]]
+
+
+def test_retry_replays_the_first_response(client):
+    first = _log(client, "k-replay")
+    assert first.status_code == 200 and first.json()["success"]
+    retry = _log(client, "k-replay", weight=999)
+    assert retry.json() == first.json()
+    assert _bench_sets() == [(100.0, 5)]
+
+
+def test_key_in_flight_is_a_conflict(client):
+    IdempotencyStore().reserve("k-busy", USER, "log")
+    response = _log(client, "k-busy", weight=120)
+    assert response.status_code == 409
+    assert not response.json()["success"]
+    assert (120.0, 5) not in _bench_sets()
+
+
+def test_failed_attempt_releases_the_key(client):
+    failed = _log(client, "k-retry", exercise="Nope press")
+    assert not failed.json()["success"]
+    # Not replayed: the retry runs and succeeds
+    retry = _log(client, "k-retry", weight=110)
+    assert retry.json()["success"]
+    assert (110.0, 5) in _bench_sets()
+
+
+def test_keys_are_scoped_per_endpoint(client):
+    store = IdempotencyStore()
+    assert store.reserve("k-scope", USER, "log") is None
+    assert store.reserve("k-scope", USER, "session/start") is None
+    assert store.reserve("k-scope", "someone_else", "log") is None
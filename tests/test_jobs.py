@@ -0,0 +1,98 @@
+"""JobQueue claim / lease / retry cycle (backend/jobs.py)."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.database import SessionLocal
+from backend.jobs import JobQueue
+from backend.models_db import Job
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(worker=False, max_attempts=2)
+    queue.calls = []
+
+    def flaky(payload):
+        queue.calls.append(payload)
+        if len(queue.calls) <= payload["failures"]:
+            raise RuntimeError("boom")
+        return {"ok": True}
+
+    queue.register("test_flaky", flaky)
+    return queue
+
+
+def _enqueue(queue, failures=0):
+    db = SessionLocal()
+    try:
+        job_id = queue.enqueue(db, "test_flaky", {"failures": failures}, owner="jobber")
+        db.commit()
+        return job_id
+    finally:
+        db.close()
+
+
+def _update(job_id, **values):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        for key, value in values.items():
+            setattr(job, key, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_runs_once(queue):
+    job_id = _enqueue(queue)
+    assert queue.run(job_id)
+    assert not queue.run(job_id)
+    job = queue.get(job_id)
+    assert (job["status"], job["result"], job["attempts"]) == ("done", {"ok": True}, 1)
+    assert len(queue.calls) == 1
+
+
+def test_failed_job_is_retried_after_backoff(queue):
+    job_id = _enqueue(queue, failures=1)
+    assert queue.run(job_id)
+    job = queue.get(job_id)
+    assert (job["status"], job["error"], job["attempts"]) == ("pending", "boom", 1)
+    # Not due until the backoff has passed
+    assert not queue.run(job_id)
+
+    _update(job_id, run_after=datetime.utcnow())
+    assert queue.run(job_id)
+    assert queue.get(job_id)["status"] == "done"
+
+
+def test_gives_up_after_max_attempts(queue):
+    job_id = _enqueue(queue, failures=5)
+    assert queue.run(job_id)
+    _update(job_id, run_after=datetime.utcnow())
+    assert queue.run(job_id)
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 2)
+    assert not queue.run(job_id)
+
+
+def test_expired_lease_is_taken_over(queue):
+    job_id = _enqueue(queue)
+    # Claimed by a worker that is still within its lease
+    _update(job_id, status="running", started_at=datetime.utcnow(), attempts=1)
+    assert not queue.run(job_id)
+
+    # ... or one that died
+    _update(job_id, started_at=datetime.utcnow() - queue.lease - timedelta(seconds=1))
+    assert queue.run(job_id)
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("done", 2)
+
+
+def test_run_due_only_without_worker(queue):
+    job_id = _enqueue(queue)
+    queue.worker = True
+    assert not queue.run_due(job_id)
+    queue.worker = False
+    assert queue.run_due(job_id)
+    assert queue.get(job_id)["status"] == "done"
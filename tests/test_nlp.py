@@ -0,0 +1,59 @@
+"""NLPProcessor.parse_command grammar (backend/nlp.py)."""
+import pytest
+
+from backend.nlp import NLPProcessor
+
+pytest.importorskip("fuzzywuzzy")
+
+EXERCISES = ["Bench press", "Squat", "Pull up"]
+
+
+def parse(text):
+    result, error = NLPProcessor().parse_command(text, EXERCISES)
+    return (None, error) if result is None else ([(s["weight"], s["reps"]) for s in result["sets"]], None)
+
+
+@pytest.mark.parametrize("text", [
+    "bench 3 sets of 5 at 100",
+    "bench 3 sets 5 reps 100kg",
+    "bench 3 sets x 5 100kg",
+    "bench 3 x 5 x 100 kg",
+    "bench 100kg x 5 x 3",
+    "bench 100 x 5 x 3",
+])
+def test_sets_reps_weight(text):
+    assert parse(text) == ([(100.0, 5)] * 3, None)
+
+
+def test_sets_without_weight_are_bodyweight():
+    assert parse("pull up 3 sets 8 reps") == ([(0.0, 8)] * 3, None)
+
+
+@pytest.mark.parametrize("text", ["bench 100 x 5 x 0", "bench 0 sets of 5"])
+def test_zero_sets(text):
+    sets, error = parse(text)
+    assert sets is None
+    assert "at least 1" in error
+
+
+def test_too_many_sets():
+    assert parse("bench 100x5x50") == (None, "Too many sets (50) in one command")
+
+
+@pytest.mark.parametrize("text", ["squat 100x5 110", "squat 3x5 at 100 2", "squat 100 kg 5 reps 3", "squat 100 5 5"])
+def test_unexplained_numbers_are_rejected(text):
+    sets, error = parse(text)
+    assert sets is None
+    assert "Could not tell" in error
+
+
+def test_bench_corpus():
+    """The accuracy gate of bench_nlp.py: every command of its corpus parses exactly as expected."""
+    import bench_nlp
+
+    nlp = NLPProcessor()
+    wrong = [
+        text for text, exercise, sets in bench_nlp.CORPUS
+        if not bench_nlp.is_correct(nlp.parse_command(text, bench_nlp.EXERCISES)[0], exercise, sets)
+    ]
+    assert wrong == []
@@ -0,0 +1,122 @@
+"""planned_sets targets (DataManager._plan_batch) and the weekly plan_targets chain."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select
+
+from backend.data_manager import DataManager, PLAN_INTERVAL
+from backend.database import SessionLocal
+from backend.jobs import JobQueue
+from backend.models_db import Exercise, Job, PlannedSet, User
+
+USER = "planner"
+
+
+@pytest.fixture(scope="module")
+def dm():
+    dm = DataManager()
+    assert dm.create_workout("Plan Pull", USER)[0]
+    assert dm.add_exercise("Plan Pull", "Row", 3, USER, "A")[0]
+    assert dm.add_exercise("Plan Pull", "Curl", 3, USER, "A")[0]
+    # Row was done this week (2) already, Curl only last week
+    for week in (1, 2):
+        assert dm.log_sets("Plan Pull", "Row", [{"weight": 60, "reps": 8}] * 2, week, USER)[0]
+    assert dm.log_set("Plan Pull", "Curl", 20, 10, 1, USER)[0]
+    dm.flush_pending_sets()
+    return dm
+
+
+def _targets(user):
+    db = SessionLocal()
+    try:
+        return dict(db.execute(
+            select(Exercise.name, PlannedSet.week)
+            .join(Exercise, Exercise.id == PlannedSet.exercise_id)
+            .join(User, User.id == PlannedSet.user_id)
+            .where(User.username == user)
+            .distinct()
+        ).all())
+    finally:
+        db.close()
+
+
+def test_target_week(dm):
+    db = SessionLocal()
+    user_id = db.execute(select(User.id).where(User.username == USER)).scalar()
+    db.close()
+    assert dm._plan_batch([user_id]) == 3
+    # Done in the current week: plan the next one; not done yet: the current one
+    assert _targets(USER) == {"Row": 3, "Curl": 2}
+
+
+def test_weekly_run_is_not_absorbed_by_a_user_run(dm):
+    db = SessionLocal()
+    try:
+        db.execute(delete(Job).where(Job.kind.in_(("plan_targets", "plan_targets_weekly"))))
+        # A per-user run waiting out a retry backoff
+        user_job = dm.jobs.enqueue(db, "plan_targets", {"user_ids": [1]}, run_after=datetime.utcnow() + timedelta(hours=1))
+        db.commit()
+    finally:
+        db.close()
+
+    run_after = datetime.utcnow()
+    dm.schedule_plans(run_after)
+    dm.schedule_plans(run_after)
+
+    db = SessionLocal()
+    try:
+        weekly = db.execute(select(Job.id).where(Job.kind == "plan_targets_weekly")).scalars().all()
+    finally:
+        db.close()
+    assert len(weekly) == 1 and weekly[0] != user_job
+
+
+def test_next_run_is_queued_when_claimed():
+    queue = JobQueue(worker=False)
+    queue.register("test_recurring", lambda payload: 1 / 0, every=PLAN_INTERVAL)
+    db = SessionLocal()
+    try:
+        job_id = queue.enqueue(db, "test_recurring", {})
+        db.commit()
+    finally:
+        db.close()
+
+    def pending():
+        db = SessionLocal()
+        try:
+            return db.execute(
+                select(Job.id, Job.run_after).where(Job.kind == "test_recurring", Job.status == "pending", Job.id != job_id)
+            ).all()
+        finally:
+            db.close()
+
+    # The run fails, next week's run is queued anyway
+    assert queue.run(job_id)
+    assert queue.get(job_id)["status"] == "pending"
+    (next_id, next_run), = pending()
+    assert next_run > datetime.utcnow() + PLAN_INTERVAL - timedelta(minutes=1)
+
+    # Retrying the failed run doesn't queue another one
+    db = SessionLocal()
+    try:
+        db.get(Job, job_id).run_after = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+    assert queue.run(job_id)
+    assert [r.id for r in pending()] == [next_id]
+
+
+def test_coalesce_matches_payload():
+    db = SessionLocal()
+    try:
+        queue = JobQueue(worker=False)
+        later = datetime.utcnow() + timedelta(hours=1)
+        first = queue.enqueue(db, "test_coalesce", {"a": 1, "b": 2}, run_after=later)
+        assert queue.enqueue(db, "test_coalesce", {"b": 2, "a": 1}, coalesce=True) == first
+        assert queue.enqueue(db, "test_coalesce", {"a": 2}, coalesce=True) != first
+        assert json.loads(db.get(Job, first).payload) == {"a": 1, "b": 2}
+        db.rollback()
+    finally:
+        db.close()
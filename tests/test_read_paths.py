@@ -0,0 +1,86 @@
+"""DataManager read paths under SQL_STRICT_LOADING=1 (see conftest): any lazy load raises."""
+import pytest
+
+from backend import database
+from backend.data_manager import DataManager
+
+USER = "strict_reader"
+
+
+@pytest.fixture(scope="module")
+def dm():
+    dm = DataManager()
+    assert dm.create_workout("Strict Push", USER)[0]
+    assert dm.add_exercise("Strict Push", "Bench press", 3, USER, "A", "Seat at 4")[0]
+    assert dm.add_exercise("Strict Push", "Dips", 3, USER, "A")[0]
+    success, session_id = dm.start_session(USER, "Strict Push", "A")
+    assert success
+    for week in (1, 2):
+        assert dm.log_sets("Strict Push", "Bench press", [{"weight": 60 + week, "reps": 8}] * 2, week, USER)[0]
+        assert dm.log_set("Strict Push", "Dips", 0, 12, week, USER)[0]
+    success, _, _, _ = dm.end_session(session_id, USER, "felt strong")
+    assert success
+    dm.summarize_session({"session_id": session_id})
+    dm.plan_targets({})
+    return dm
+
+
+def test_strict_loading_is_on():
+    assert database.RELATIONSHIP_LAZY == "raise"
+
+
+def test_workout_data(dm):
+    exercises = dm.get_workout_data("Strict Push", 2, USER)
+    bench = next(e for e in exercises if e["name"] == "Bench press")
+    assert [(s["weight"], s["reps"]) for s in bench["sets"]] == [(62.0, 8), (62.0, 8)]
+    assert bench["last_performed_week"] == 1
+    assert bench["setup_notes"] == "Seat at 4"
+
+
+def test_workout_weeks(dm):
+    exercises = dm.get_workout_weeks("Strict Push", 1, 2, USER)
+    assert {e["name"] for e in exercises} == {"Bench press", "Dips"}
+
+
+def test_users_workouts_catalog(dm):
+    assert USER in {u["username"] for u in dm.get_users()}
+    assert "Strict Push" in {w["name"] for w in dm.get_workouts(USER)}
+    version, workouts = dm.get_catalog()
+    assert version and isinstance(workouts, list)
+
+
+def test_search(dm):
+    success, results = dm.search_exercises("bench")
+    assert success and any(r["name"] == "Bench press" for r in results)
+    success, data = dm.search_notes(USER, "strong")
+    assert success and data["results"]
+
+
+def test_stats_history_movements(dm):
+    success, stats = dm.get_user_stats(USER)
+    assert success, stats
+    success, history = dm.get_session_history(USER)
+    assert success and history["sessions"]
+    success, movements = dm.get_movements(USER)
+    assert success, movements
+    for movement in movements:
+        success, progress = dm.get_movement_progress(USER, movement["id"])
+        assert success, progress
+
+
+def test_plan(dm):
+    success, plan = dm.get_plan("Strict Push", 3, USER)
+    assert success, plan
+    assert {p["name"] for p in plan} == {"Bench press", "Dips"}
+
+
+def test_lazy_load_raises(dm):
+    from sqlalchemy.exc import InvalidRequestError
+    from backend.models_db import SetLog
+    db = database.SessionLocal()
+    try:
+        s = db.query(SetLog).first()
+        with pytest.raises(InvalidRequestError):
+            s.exercise
+    finally:
+        db.close()
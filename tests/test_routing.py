@@ -0,0 +1,22 @@
+"""Read-replica session routing (RoutingSessionFactory in backend/database.py)."""
+from backend.database import RoutingSessionFactory
+
+
+def test_reads_go_to_primary_without_replica():
+    router = RoutingSessionFactory()
+    db = router.reader("anyone")
+    try:
+        assert not router.has_replica
+        assert not router.is_replica(db)
+    finally:
+        db.close()
+
+
+def test_writers_stay_sticky_on_primary(monkeypatch):
+    monkeypatch.setattr(RoutingSessionFactory, "has_replica", property(lambda self: True))
+    router = RoutingSessionFactory(sticky_seconds=60)
+    router.mark_write("alice")
+    assert router._is_sticky("alice")
+    assert not router._is_sticky("bob")
+    router.mark_write(None) # a write without a user makes everyone sticky
+    assert router._is_sticky("bob")
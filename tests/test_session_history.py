@@ -0,0 +1,70 @@
+"""Keyset (cursor) pagination of DataManager.get_session_history."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.data_manager import DataManager
+from backend.database import SessionLocal
+from backend.models_db import WorkoutSession
+
+USER = "history_pager"
+
+
+@pytest.fixture(scope="module")
+def dm():
+    dm = DataManager()
+    assert dm.create_workout("History Legs", USER)[0]
+    base = datetime(2026, 1, 1, 8, 0)
+    # Two sessions share a start time: the id breaks the tie
+    starts = [base, base + timedelta(days=1), base + timedelta(days=1), base + timedelta(days=2), base + timedelta(days=3)]
+    ids = []
+    for start in starts:
+        success, session_id = dm.start_session(USER, "History Legs", "A")
+        assert success
+        ids.append(session_id)
+    db = SessionLocal()
+    try:
+        for session_id, start in zip(ids, starts):
+            db.get(WorkoutSession, session_id).start_time = start
+        db.commit()
+    finally:
+        db.close()
+    dm.expected = [i for _, i in sorted(zip(starts, ids), reverse=True)]
+    return dm
+
+
+def _pages(dm, limit):
+    pages, cursor = [], None
+    while True:
+        success, data = dm.get_session_history(USER, cursor, limit)
+        assert success
+        pages.append([s["id"] for s in data["sessions"]])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_session_once_newest_first(dm):
+    pages = _pages(dm, 2)
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert [i for p in pages for i in p] == dm.expected
+
+
+def test_last_full_page_has_no_cursor(dm):
+    success, data = dm.get_session_history(USER, None, len(dm.expected))
+    assert success
+    assert [s["id"] for s in data["sessions"]] == dm.expected
+    assert data["next_cursor"] is None
+
+
+def test_cursor_is_stable_when_newer_sessions_arrive(dm):
+    success, first = dm.get_session_history(USER, None, 2)
+    assert success
+    assert dm.start_session(USER, "History Legs", "A")[0]
+    success, second = dm.get_session_history(USER, first["next_cursor"], 2)
+    assert success
+    assert [s["id"] for s in second["sessions"]] == dm.expected[2:4]
+
+
+def test_invalid_cursor(dm):
+    assert dm.get_session_history(USER, "not-a-cursor", 2) == (False, "Invalid cursor")
@@ -0,0 +1,56 @@
+"""Optimistic concurrency of DataManager.update_set (sets.version)."""
+import pytest
+
+from backend.data_manager import DataManager
+from backend.database import SessionLocal
+from backend.models_db import SetLog
+
+USER = "versioned"
+
+
+@pytest.fixture
+def set_id():
+    dm = DataManager()
+    dm.create_workout("Version Push", USER)
+    dm.add_exercise("Version Push", "Dips", 3, USER, "A")
+    assert dm.log_set("Version Push", "Dips", 10, 8, 1, USER)[0]
+    dm.flush_pending_sets()
+    exercise, = dm.get_workout_data("Version Push", 1, USER)
+    return exercise["sets"][-1]["id"]
+
+
+def _row(set_id):
+    db = SessionLocal()
+    try:
+        row = db.get(SetLog, set_id)
+        return row.weight, row.reps, row.version
+    finally:
+        db.close()
+
+
+def test_update_bumps_the_version(set_id):
+    dm = DataManager()
+    assert dm.update_set(set_id, 12.5, 8, USER, version=1) == ("updated", "Set updated", 2, None)
+    assert _row(set_id) == (12.5, 8, 2)
+
+
+def test_stale_version_is_a_conflict_and_writes_nothing(set_id):
+    dm = DataManager()
+    assert dm.update_set(set_id, 12.5, 8, USER, version=1)[0] == "updated"
+
+    status, _, version, current = dm.update_set(set_id, 15, 6, USER, version=1)
+    assert (status, version) == ("conflict", 2)
+    assert (current["weight"], current["reps"], current["version"]) == (12.5, 8, 2)
+    assert _row(set_id) == (12.5, 8, 2)
+
+
+def test_no_version_is_last_write_wins(set_id):
+    dm = DataManager()
+    assert dm.update_set(set_id, 12.5, 8, USER, version=1)[0] == "updated"
+    assert dm.update_set(set_id, 15, 6, USER)[:3] == ("updated", "Set updated", 3)
+    assert _row(set_id) == (15, 6, 3)
+
+
+def test_someone_elses_set_is_not_found(set_id):
+    assert DataManager().update_set(set_id, 99, 1, "intruder", version=1)[0] == "not_found"
+    assert _row(set_id) == (10, 8, 1)
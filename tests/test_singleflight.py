@@ -0,0 +1,83 @@
+"""Request coalescing for identical concurrent reads (SingleFlight in backend/singleflight.py)."""
+import asyncio
+import threading
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def _slow(calls, started, release, value):
+    calls.append(value)
+    started.set()
+    release.wait(5)
+    return value
+
+
+def _gather(flight, calls_args):
+    async def run():
+        return await asyncio.gather(*(flight.do(*args) for args in calls_args))
+    return asyncio.run(run())
+
+
+def test_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls, started, release = [], threading.Event(), threading.Event()
+    threading.Timer(0.1, release.set).start()
+
+    results = _gather(flight, [(("workout", 1), "alice", _slow, calls, started, release, "rows")] * 5)
+
+    assert results == ["rows"] * 5
+    assert calls == ["rows"]
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    calls, started, release = [], threading.Event(), threading.Event()
+    release.set()
+    _gather(flight, [
+        (("workout", 1), "alice", _slow, calls, started, release, 1),
+        (("workout", 2), "alice", _slow, calls, started, release, 2),
+    ])
+    assert sorted(calls) == [1, 2]
+
+
+def test_call_after_a_write_does_not_join_older_computation():
+    flight = SingleFlight()
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(flight.do(("k",), "alice", _slow, calls, started, release, "before"))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        flight.mark_write("alice")
+        second = asyncio.ensure_future(flight.do(("k",), "alice", _slow, calls, started, release, "after"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(run()) == ["before", "after"]
+    assert calls == ["before", "after"]
+
+
+def test_exceptions_reach_every_waiter():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("db down")
+
+    async def run():
+        return await asyncio.gather(*(flight.do(("k",), None, boom) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.stats()["executions"] == 1
+
+
+def test_disabled_runs_every_call():
+    flight = SingleFlight(enabled=False)
+    calls, started, release = [], threading.Event(), threading.Event()
+    release.set()
+    _gather(flight, [(("k",), "alice", _slow, calls, started, release, "x")] * 3)
+    assert calls == ["x"] * 3
@@ -0,0 +1,107 @@
+"""Soft delete, restore and compaction (DataManager.restore / compact_deleted)."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, update
+
+from backend.data_manager import DataManager, SOFT_DELETE_RETENTION
+from backend.database import SessionLocal
+from backend.models_db import Exercise, SetLog, Workout
+
+USER = "undoer"
+
+
+@pytest.fixture(scope="module")
+def dm():
+    return DataManager()
+
+
+def _log(dm, workout, exercise, weights, week=1):
+    dm.create_workout(workout, USER)
+    dm.add_exercise(workout, exercise, 3, USER, "A")
+    assert dm.log_sets(workout, exercise, [{"weight": w, "reps": 5} for w in weights], week, USER)[0]
+    dm.flush_pending_sets()
+
+
+def _sets(dm, workout, week=1):
+    exercise, = dm.get_workout_data(workout, week, USER)
+    return [(s["set_number"], s["weight"]) for s in exercise["sets"]]
+
+
+def _age(workout_id):
+    """Move the soft delete of a workout and its exercises past the retention period"""
+    db = SessionLocal()
+    try:
+        expired = datetime.utcnow() - SOFT_DELETE_RETENTION * 2
+        for model, where in ((Workout, Workout.id == workout_id), (Exercise, Exercise.workout_id == workout_id)):
+            db.execute(update(model).where(where).values(deleted_at=expired).execution_options(include_deleted=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _count(model, *where):
+    db = SessionLocal()
+    try:
+        return len(db.execute(select(model.id).where(*where).execution_options(include_deleted=True)).all())
+    finally:
+        db.close()
+
+
+def test_restored_set_goes_back_to_its_position(dm):
+    _log(dm, "Undo Push", "Bench press", [60, 70, 80])
+    second = dm.get_workout_data("Undo Push", 1, USER)[0]["sets"][1]["id"]
+
+    assert dm.delete_set(second, USER)[0]
+    assert _sets(dm, "Undo Push") == [(1, 60), (2, 80)]
+
+    assert dm.restore("set", USER, set_id=second) == (True, "Set restored")
+    assert _sets(dm, "Undo Push") == [(1, 60), (2, 70), (3, 80)]
+
+
+def test_restored_set_goes_last_when_fewer_are_left(dm):
+    _log(dm, "Undo Pull", "Row", [50, 55, 60])
+    ids = [s["id"] for s in dm.get_workout_data("Undo Pull", 1, USER)[0]["sets"]]
+    assert dm.delete_set(ids[2], USER)[0]
+    assert dm.delete_set(ids[0], USER)[0]
+
+    assert dm.restore("set", USER, set_id=ids[2])[0]
+    assert _sets(dm, "Undo Pull") == [(1, 55), (2, 60)]
+
+
+def test_set_of_a_deleted_exercise_needs_the_exercise_first(dm):
+    _log(dm, "Undo Legs", "Squat", [100, 110])
+    first = dm.get_workout_data("Undo Legs", 1, USER)[0]["sets"][0]["id"]
+    assert dm.delete_set(first, USER)[0]
+    assert dm.delete_exercise("Undo Legs", "Squat", USER)[0]
+
+    success, message = dm.restore("set", USER, set_id=first)
+    assert not success and "restore the exercise first" in message
+    assert dm.restore("exercise", USER, "Undo Legs", "Squat")[0]
+    assert dm.restore("set", USER, set_id=first)[0]
+    assert _sets(dm, "Undo Legs") == [(1, 100), (2, 110)]
+
+
+def test_compaction_purges_children_first_and_only_expired_rows(dm):
+    _log(dm, "Undo Arms", "Curl", [20, 25])
+    _log(dm, "Undo Core", "Plank", [0])
+    db = SessionLocal()
+    arms = db.execute(select(Workout.id).where(Workout.name == "Undo Arms")).scalar()
+    core = db.execute(select(Workout.id).where(Workout.name == "Undo Core")).scalar()
+    db.close()
+
+    assert dm.delete_workout("Undo Arms")[0]
+    _age(arms)
+    # Deleted within the retention period: kept, still restorable
+    assert dm.delete_workout("Undo Core")[0]
+
+    purged = dm.compact_deleted()
+    assert purged["exercise_sets"] >= 2 and purged["exercises"] >= 1 and purged["workouts"] >= 1
+    assert _count(Workout, Workout.id == arms) == 0
+    assert _count(Exercise, Exercise.workout_id == arms) == 0
+    assert _count(SetLog, SetLog.exercise_id.not_in(select(Exercise.id))) == 0
+    assert dm.restore("workout", workout_type="Undo Arms")[0] is False
+
+    assert _count(Workout, Workout.id == core) == 1
+    assert dm.restore("workout", workout_type="Undo Core")[0]
+    assert _sets(dm, "Undo Core") == [(1, 0)]
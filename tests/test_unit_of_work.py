@@ -0,0 +1,84 @@
+"""Request-scoped unit of work (RequestSession in backend/database.py)."""
+import threading
+
+import pytest
+from sqlalchemy import select
+
+from backend import database
+from backend.database import RequestSessionLocal, SessionLocal, serialized_write
+from backend.models_db import User
+
+
+def _user_exists(username):
+    db = SessionLocal()
+    try:
+        return db.execute(select(User.id).where(User.username == username)).scalar() is not None
+    finally:
+        db.close()
+
+
+def _request_session():
+    db = RequestSessionLocal()
+    db.in_request = True
+    return db
+
+
+def test_request_commits_once_at_finish():
+    db = _request_session()
+    hooks = []
+    db.add(User(username="uow_commit"))
+    db.commit() # only flushes inside a request
+    db.on_commit(hooks.append, "committed")
+    db.close() # no-op inside a request
+    assert hooks == []
+    assert not _user_exists("uow_commit")
+
+    db.finish()
+    db.close()
+    assert hooks == ["committed"]
+    assert _user_exists("uow_commit")
+    assert db.transactions == 1 and len(db.connections) == 1
+
+
+def test_request_abort_discards_writes_and_hooks():
+    db = _request_session()
+    hooks = []
+    db.add(User(username="uow_abort"))
+    db.commit()
+    db.on_commit(hooks.append, "committed")
+    db.abort()
+    db.close()
+    assert hooks == []
+    assert not _user_exists("uow_abort")
+
+
+def test_on_commit_runs_now_outside_a_request():
+    db = RequestSessionLocal()
+    hooks = []
+    db.on_commit(hooks.append, "now")
+    db.close()
+    assert hooks == ["now"]
+
+
+@pytest.mark.skipif(database.sqlite_writer is None, reason="single-writer queue is SQLite-only")
+def test_request_keeps_the_writer_until_it_commits():
+    @serialized_write
+    def add_user(username, db=None):
+        db.add(User(username=username))
+        db.commit()
+
+    db = _request_session()
+    add_user("uow_pinned", db=db)
+    assert database.sqlite_writer.serves(db)
+
+    # Another write waits for the request instead of for SQLite's lock
+    other = threading.Thread(target=lambda: add_user("uow_other", db=SessionLocal()))
+    other.start()
+    other.join(0.2)
+    assert other.is_alive()
+
+    db.finish()
+    db.close()
+    other.join(5)
+    assert not database.sqlite_writer.serves(db)
+    assert _user_exists("uow_pinned") and _user_exists("uow_other")
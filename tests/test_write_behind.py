@@ -0,0 +1,91 @@
+import json
+import threading
+
+import pytest
+from sqlalchemy import select, func
+
+from backend import write_behind
+from backend.database import SessionLocal
+from backend.models_db import SetLog
+from backend.write_behind import WriteBehindBuffer
+
+
+def _row(user_id, set_number, **extra):
+    return {"user_id": user_id, "exercise_id": 1, "week": 1, "set_number": set_number, "weight": 50.0, "reps": 5, **extra}
+
+
+def _count(user_id):
+    db = SessionLocal()
+    try:
+        return db.execute(select(func.count()).select_from(SetLog).where(SetLog.user_id == user_id)).scalar()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    # Long interval: the tests flush explicitly
+    buf = WriteBehindBuffer(str(tmp_path / "journal.jsonl"), flush_ms=60_000, dead_letter_path=str(tmp_path / "dead.jsonl"))
+    yield buf
+    buf.close()
+
+
+def test_flush_writes_pending_and_empties_journal(buffer):
+    buffer.append_many([_row(101, 1), _row(101, 2)])
+    assert buffer.pending_count(101, 1, 1) == 2
+    assert [s.id for s in buffer.pending_sets(101, [1], [1])] == [None, None]
+
+    buffer.flush()
+    assert _count(101) == 2
+    assert buffer.pending_count(101, 1, 1) == 0
+    assert open(buffer.journal_path).read() == ""
+
+
+def test_rejected_set_goes_to_dead_letter(buffer):
+    # The driver can't bind this value: the set can never be inserted
+    buffer.append_many([_row(102, 1), _row(102, 2, weight={"kg": 50}), _row(102, 3)])
+    buffer.flush()
+
+    assert _count(102) == 2
+    assert buffer.pending_count(102, 1, 1) == 0
+    dead = [json.loads(line) for line in open(buffer.dead_letter_path)]
+    assert [(d["set_number"], "error" in d) for d in dead] == [(2, True)]
+
+    # The next batch is not held back by it
+    buffer.append(_row(102, 4))
+    buffer.flush()
+    assert _count(102) == 3
+
+
+def test_appends_during_commit_stay_pending(buffer, monkeypatch):
+    committing, resume = threading.Event(), threading.Event()
+    insert = buffer._insert
+
+    def slow_insert(batch):
+        committing.set()
+        resume.wait(5)
+        return insert(batch)
+    monkeypatch.setattr(buffer, "_insert", slow_insert)
+
+    buffer.append(_row(103, 1))
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    assert committing.wait(5)
+    # The lock is free while the batch commits
+    buffer.append(_row(103, 2))
+    resume.set()
+    flusher.join(5)
+
+    assert _count(103) == 1
+    assert buffer.pending_count(103, 1, 1) == 1
+    assert [json.loads(line)["set_number"] for line in open(buffer.journal_path)] == [2]
+
+
+def test_journal_is_replayed(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text(json.dumps({**_row(104, 1), "timestamp": "2026-10-19 12:00:00", "journal_id": "x"}) + "\n{torn")
+    buf = WriteBehindBuffer(str(journal), flush_ms=60_000, dead_letter_path=str(tmp_path / "dead.jsonl"))
+    try:
+        assert _count(104) == 1
+    finally:
+        buf.close()
@@ -0,0 +1,45 @@
+"""SQLite single-writer queue (SerializedWriter in backend/database.py)."""
+import threading
+import time
+
+import pytest
+
+from backend.database import SerializedWriter
+
+
+@pytest.fixture
+def writer():
+    return SerializedWriter()
+
+
+def test_writer_runs_calls_one_at_a_time_on_its_thread(writer):
+    active, overlaps, threads = [], [], set()
+
+    def work(i):
+        active.append(i)
+        overlaps.append(len(active))
+        threads.add(threading.current_thread().name)
+        time.sleep(0.005)
+        active.remove(i)
+        return i * 2
+
+    results = {}
+    callers = [threading.Thread(target=lambda i=i: results.__setitem__(i, writer.submit(work, i))) for i in range(8)]
+    [t.start() for t in callers]
+    [t.join(5) for t in callers]
+
+    assert results == {i: i * 2 for i in range(8)}
+    assert max(overlaps) == 1
+    assert threads == {"sqlite-writer"}
+
+
+def test_writer_is_reentrant(writer):
+    assert writer.submit(lambda: writer.submit(lambda: "inner")) == "inner"
+
+
+def test_writer_propagates_exceptions(writer):
+    def boom():
+        raise ValueError("nope")
+    with pytest.raises(ValueError):
+        writer.submit(boom)
+    assert writer.submit(lambda: "still running") == "still running"